@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Recall@k and query latency of the IVF index against exact cosine search
+
+Usage:
+    python -m benchmarks.ann_benchmark --jobs 100000 --nprobe 1 4 8 16 32
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_jobs, generate_queries
+from src.matcher.ann_index import IVFIndex
+from src.matcher.ml_job_matcher import MLJobMatcher
+
+
+def exact_top_k(job_vectors, query, k):
+    scores = job_vectors @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def run(n_jobs, nprobes, k, n_queries, candidates):
+    matcher = MLJobMatcher()
+    t0 = time.perf_counter()
+    matcher.train_model(generate_jobs(n_jobs))
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = IVFIndex(candidates=candidates).build(matcher.job_vectors)
+    build_s = time.perf_counter() - t0
+
+    queries = [matcher._user_vector(q.split(', ')) for q in generate_queries(n_queries)]
+
+    exact_ms = []
+    truth = []
+    for query in queries:
+        t0 = time.perf_counter()
+        truth.append(set(exact_top_k(matcher.job_vectors, query, k).tolist()))
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+
+    results = []
+    for nprobe in nprobes:
+        recalls = []
+        latencies = []
+        for query, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            ids, _ = index.search(query, k=k, nprobe=nprobe, exact_vectors=matcher.job_vectors)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recalls.append(len(expected & set(ids.tolist())) / k)
+        results.append({
+            "nprobe": nprobe,
+            "recall_at_k": float(np.mean(recalls)),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+        })
+
+    return {
+        "jobs": n_jobs,
+        "k": k,
+        "n_lists": len(index.centroids),
+        "candidates": candidates,
+        "fit_s": fit_s,
+        "index_build_s": build_s,
+        "exact_p50_ms": float(np.percentile(exact_ms, 50)),
+        "exact_p95_ms": float(np.percentile(exact_ms, 95)),
+        "ann": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    report = run(args.jobs, args.nprobe, args.k, args.queries, args.candidates)
+
+    print(f"{report['jobs']} jobs, {report['n_lists']} lists, k={report['k']}")
+    print(f"exact search: p50 {report['exact_p50_ms']:.2f} ms, p95 {report['exact_p95_ms']:.2f} ms")
+    print(f"{'nprobe':>8} {'recall@k':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in report["ann"]:
+        print(f"{row['nprobe']:>8} {row['recall_at_k']:>10.3f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
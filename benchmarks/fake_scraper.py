@@ -0,0 +1,148 @@
+"""
+Stand-in for RealJobScraper that never touches LinkedIn
+
+Jobs are built from response.json-style fixtures (any of matched_jobs,
+recommended_jobs or jobs), with the search keywords worked into each one
+so the scoring engines have something to match. Scrape latency and
+result count are drawn from configurable distributions. The same search
+always returns the same jobs, like a real scrape a few minutes apart.
+
+Distributions are written as name:parameters, for example
+    fixed:0.5            always 0.5
+    uniform:0.2,1.5      between 0.2 and 1.5
+    exp:1.0              exponential with mean 1.0
+    lognormal:1.5,0.6    median 1.5, sigma 0.6 (long tail, like page loads)
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from src.monitoring.metrics import jobs_scraped_per_source, scrape_seconds, scrapes
+from src.monitoring.tracing import span
+from src.scraper.job_record import JobRecord
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_FIXTURES = (ROOT / "response.json", ROOT / "response_with_score.json")
+
+SOURCE = "Fake"
+
+# Fields the API adds to scraped jobs; fixtures saved from responses carry them
+_RESPONSE_FIELDS = ("match_percentage",)
+
+
+class Distribution:
+    """A parsed distribution spec; sample() draws from it with the given random source"""
+
+    KINDS = {"fixed": 1, "uniform": 2, "exp": 1, "lognormal": 2}
+
+    def __init__(self, spec: str):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown distribution '{kind}'; use one of: {', '.join(self.KINDS)}")
+        try:
+            self.params = [float(p) for p in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid distribution parameters in '{spec}'")
+        if len(self.params) != self.KINDS[kind]:
+            raise ValueError(f"'{kind}' takes {self.KINDS[kind]} parameter(s), got '{spec}'")
+        self.kind = kind
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self):
+        return f"Distribution({self.spec!r})"
+
+
+def load_fixture_jobs(paths: Sequence = DEFAULT_FIXTURES) -> List[Dict]:
+    """Distinct jobs from response.json-style files, without response-only fields"""
+    jobs, seen = [], set()
+    for path in paths:
+        payload = json.loads(Path(path).read_text())
+        if isinstance(payload, list):
+            found = payload
+        else:
+            found = [job for key in ("matched_jobs", "recommended_jobs", "jobs") for job in payload.get(key, [])]
+        for job in found:
+            key = job.get("job_id") or job.get("apply_link") or job.get("title")
+            if key in seen:
+                continue
+            seen.add(key)
+            jobs.append({k: v for k, v in job.items() if k not in _RESPONSE_FIELDS})
+    if not jobs:
+        raise ValueError("No jobs found in the fixtures")
+    return jobs
+
+
+class FakeJobScraper:
+    """Drop-in replacement for RealJobScraper with synthetic latency and results
+
+    Args:
+        fixtures: Template jobs, e.g. from load_fixture_jobs()
+        latency: Seconds each scrape takes
+        results: Jobs each scrape finds, capped by max_results
+        error_rate: Fraction of scrapes that fail (returning no jobs, as RealJobScraper does)
+        seed: Seed for the latency and failure draws
+    """
+
+    def __init__(self, fixtures: Optional[List[Dict]] = None, latency: str = "lognormal:1.5,0.6",
+                 results: str = "uniform:20,60", error_rate: float = 0.0, seed: int = 0):
+        self.fixtures = fixtures if fixtures is not None else load_fixture_jobs()
+        self.latency = Distribution(latency)
+        self.results = Distribution(results)
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def jobs_for(self, skills: str, location: str, count: int) -> List[JobRecord]:
+        """The jobs a search finds, as the real scraper's records; stable for the same search"""
+        rng = random.Random(zlib.crc32(f"{skills}|{location}".lower().encode()))
+        keywords = skills.strip() or "Software"
+        jobs = []
+        for i in range(count):
+            template = self.fixtures[rng.randrange(len(self.fixtures))]
+            job_id = f"fake-{zlib.crc32(keywords.lower().encode()):08x}-{i}"
+            link = f"https://in.linkedin.com/jobs/view/{job_id}"
+            job = dict(template)
+            job.update(
+                job_id=job_id,
+                title=f"{keywords} {template.get('title', 'Developer')}",
+                location=location if rng.random() < 0.7 else template.get("location", location),
+                apply_link=link,
+                url=link,
+                skills=[keywords] + list(template.get("skills") or [])[:4],
+                description=f"{keywords} role. {template.get('description', '')}",
+                source=SOURCE,
+                apply_source=SOURCE,
+            )
+            jobs.append(JobRecord.from_dict(job))
+        return jobs
+
+    async def get_all_jobs(self, skills: str, location: str = "India", max_results: int = 50) -> List[JobRecord]:
+        self.calls += 1
+        started = time.perf_counter()
+        with span("scrape", source=SOURCE):
+            await asyncio.sleep(max(0.0, self.latency.sample(self._rng)))
+            if self._rng.random() < self.error_rate:
+                scrapes.inc(source=SOURCE, outcome="error")
+                return []
+            count = min(max_results, max(0, int(round(self.results.sample(self._rng)))))
+            jobs = self.jobs_for(skills, location, count)
+        scrape_seconds.observe(time.perf_counter() - started, source=SOURCE)
+        scrapes.inc(source=SOURCE, outcome="ok" if jobs else "empty")
+        jobs_scraped_per_source.inc(len(jobs), source=SOURCE)
+        return jobs
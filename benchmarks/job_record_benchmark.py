@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Memory held by cached jobs: scraper dicts against JobRecord
+
+Scraped strings are distinct objects (they come from inner_text()), so the
+synthetic jobs are rebuilt with fresh strings before measuring.
+
+Usage:
+    python -m benchmarks.job_record_benchmark --jobs 100000 --json records.json
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_jobs
+from src.scraper.job_record import JobRecord, job_to_dict
+
+
+def _fresh(value):
+    if isinstance(value, str):
+        return value.encode().decode()
+    if isinstance(value, list):
+        return [_fresh(item) for item in value]
+    return value
+
+
+def scraped_jobs(n_jobs):
+    """Synthetic jobs with no string objects shared between postings"""
+    return [{key: _fresh(value) for key, value in job.items()} for job in generate_jobs(n_jobs)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    jobs = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return jobs, size
+
+
+def run(n_jobs, page_size):
+    dicts, dict_bytes = measure(lambda: scraped_jobs(n_jobs))
+    # Built from fresh dicts inside the measurement so the records' own strings are counted
+    records, record_bytes = measure(lambda: [JobRecord.from_dict(job) for job in scraped_jobs(n_jobs)])
+
+    source = scraped_jobs(n_jobs)
+    started = time.perf_counter()
+    for job in source:
+        JobRecord.from_dict(job)
+    convert_s = time.perf_counter() - started
+    del source
+
+    assert [record.to_dict() for record in records[:100]] == dicts[:100]
+
+    started = time.perf_counter()
+    for start in range(0, n_jobs, page_size):
+        json.dumps([job_to_dict(job) for job in records[start:start + page_size]])
+    record_encode_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start in range(0, n_jobs, page_size):
+        json.dumps([job_to_dict(job) for job in dicts[start:start + page_size]])
+    dict_encode_s = time.perf_counter() - started
+
+    return {
+        "jobs": n_jobs,
+        "dict_bytes_per_job": dict_bytes / n_jobs,
+        "record_bytes_per_job": record_bytes / n_jobs,
+        "saving": 1 - record_bytes / dict_bytes,
+        "convert_us_per_job": convert_s / n_jobs * 1e6,
+        "dict_encode_us_per_job": dict_encode_s / n_jobs * 1e6,
+        "record_encode_us_per_job": record_encode_s / n_jobs * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of job dicts and JobRecords")
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=50, help="Jobs serialised per response")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    result = run(args.jobs, args.page_size)
+    print(f"{result['jobs']} jobs")
+    print(f"  dict      {result['dict_bytes_per_job']:8.0f} B/job   encode {result['dict_encode_us_per_job']:6.1f} us/job")
+    print(f"  JobRecord {result['record_bytes_per_job']:8.0f} B/job   encode {result['record_encode_us_per_job']:6.1f} us/job")
+    print(f"  saving    {result['saving']:8.0%}         convert {result['convert_us_per_job']:5.1f} us/job")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
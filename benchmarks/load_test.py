@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Load test of the API against a fake scraper
+
+Starts the app (uvicorn, in a child process) with FakeJobScraper injected
+in place of RealJobScraper, then drives /api/match, /api/jobs and
+/api/search with open-loop Poisson arrivals at a target rate over a pool
+of keep-alive client connections. Latency is measured from each request's
+scheduled start, so time spent waiting for a free connection counts.
+Queries follow a Zipf-like popularity so caches see realistic reuse.
+
+Reports throughput, latency percentiles (overall and per endpoint), status
+codes, error rate (non-2xx/304 statuses, connection failures and 200s
+carrying an "error"), server RSS over the run and the server's own
+/api/stats view (cache hit ratios, scrapes, admission rejections).
+Server settings such as CACHE_URL or SCRAPE_CONCURRENCY are read from the
+environment as usual.
+
+Usage:
+    python -m benchmarks.load_test --rps 50 --duration 30 --clients 64
+    python -m benchmarks.load_test --latency lognormal:2,0.8 --results uniform:10,100 --json load.json
+    CACHE_URL=sqlite:///tmp/cache.db python -m benchmarks.load_test --workers 4 --mix match=1
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from benchmarks.fake_scraper import DEFAULT_FIXTURES, Distribution
+from benchmarks.synthetic import SKILLS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Environment variable carrying the fake scraper settings to the server process(es)
+SCRAPER_ENV = "LOAD_TEST_SCRAPER"
+
+ENDPOINTS = ("match", "jobs", "search")
+
+
+def create_app():
+    """uvicorn app factory: the API with a FakeJobScraper configured from SCRAPER_ENV"""
+    from benchmarks.fake_scraper import FakeJobScraper, load_fixture_jobs
+    import src.api.main as api
+
+    config = json.loads(os.environ.get(SCRAPER_ENV, "{}"))
+    api.job_scraper = FakeJobScraper(
+        load_fixture_jobs(config.get("fixtures", DEFAULT_FIXTURES)),
+        latency=config.get("latency", "lognormal:1.5,0.6"),
+        results=config.get("results", "uniform:20,60"),
+        error_rate=config.get("error_rate", 0.0),
+        seed=os.getpid()
+    )
+    return api.app
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, workers, scraper_config, show_logs=False, timeout=120.0):
+    """Start uvicorn with the fake scraper and wait until /ready answers 200"""
+    env = dict(os.environ, **{SCRAPER_ENV: json.dumps(scraper_config)})
+    output = None if show_logs else subprocess.DEVNULL
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_test:create_app", "--factory",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=output, stderr=output
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}; rerun with --server-logs")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    server.terminate()
+    raise TimeoutError("Server did not become ready in time")
+
+
+def server_rss_mb(pid: int) -> float:
+    """Resident memory of a process and its children (uvicorn workers), in MB"""
+    try:
+        output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], capture_output=True, text=True).stdout
+    except OSError:
+        return 0.0
+    total = 0
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 3 and (int(fields[0]) == pid or int(fields[1]) == pid):
+            total += int(fields[2])
+    # ps reports KiB
+    return total / 1024
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client connection for GET requests"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, target: str) -> Tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n\r\n".encode())
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by the server")
+        status = int(status_line.split()[1])
+        length, chunked, close = None, False, False
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+
+        if chunked:
+            parts = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                parts.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            body = b"".join(parts)
+        elif length is not None:
+            body = await self._reader.readexactly(length)
+        else:
+            body, close = await self._reader.read(), True
+        if close:
+            self.close()
+        return status, body
+
+
+class RequestPlan:
+    """Random endpoint and query for each request
+
+    Args:
+        mix: Relative weight per endpoint
+        queries: Distinct search keywords, most popular first
+        zipf: Popularity skew; 0 makes every query equally likely
+        max_results: max_results sent with every request
+        engine: Scoring engine for /api/match
+        seed: Seed for the draws
+    """
+
+    def __init__(self, mix: Dict[str, float], queries: List[str], zipf: float = 1.1,
+                 max_results: int = 30, engine: str = "keyword", seed: int = 0):
+        self.endpoints = [name for name in ENDPOINTS if mix.get(name)]
+        self.endpoint_weights = [mix[name] for name in self.endpoints]
+        self.queries = queries
+        self.query_weights = [1 / (rank ** zipf) for rank in range(1, len(queries) + 1)]
+        self.max_results = max_results
+        self.engine = engine
+        self._rng = random.Random(seed)
+
+    def next(self) -> Tuple[str, str]:
+        endpoint = self._rng.choices(self.endpoints, self.endpoint_weights)[0]
+        query = self._rng.choices(self.queries, self.query_weights)[0]
+        if endpoint == "match":
+            params = {"skills": query, "max_results": self.max_results, "limit": 15, "engine": self.engine}
+        elif endpoint == "jobs":
+            params = {"skills": query, "max_results": self.max_results, "limit": 20}
+        else:
+            params = {"query": query, "max_results": self.max_results, "limit": 20}
+        return endpoint, f"/api/{endpoint}?{urlencode(params)}"
+
+
+async def drive(host: str, port: int, plan: RequestPlan, rps: float, duration: float, clients: int,
+                timeout: float, server_pid: Optional[int] = None, seed: int = 0) -> Dict:
+    """Send Poisson arrivals at rps for duration seconds; returns raw samples and RSS readings"""
+    pending: asyncio.Queue = asyncio.Queue()
+    samples = []
+
+    async def client():
+        connection = HttpConnection(host, port)
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            endpoint, target, scheduled = item
+            try:
+                status, body = await asyncio.wait_for(connection.get(target), timeout)
+                outcome = str(status)
+                if status == 200 and b'"error":' in body:
+                    outcome = "200 with error"
+            except asyncio.TimeoutError:
+                connection.close()
+                outcome = "timeout"
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                connection.close()
+                outcome = type(e).__name__
+            samples.append((endpoint, outcome, time.perf_counter() - scheduled, scheduled))
+        connection.close()
+
+    rss = []
+
+    async def sample_rss():
+        while True:
+            rss.append(await asyncio.to_thread(server_rss_mb, server_pid))
+            await asyncio.sleep(0.5)
+
+    rss_task = asyncio.create_task(sample_rss()) if server_pid else None
+    workers = [asyncio.create_task(client()) for _ in range(clients)]
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    next_at = started
+    sent = 0
+    while next_at < started + duration:
+        now = time.perf_counter()
+        if next_at > now:
+            await asyncio.sleep(next_at - now)
+        # Catch up on every arrival that is due, so a slow wake-up doesn't lower the rate
+        while next_at <= time.perf_counter() and next_at < started + duration:
+            endpoint, target = plan.next()
+            pending.put_nowait((endpoint, target, next_at))
+            sent += 1
+            next_at += rng.expovariate(rps)
+    backlog = pending.qsize()
+    for _ in workers:
+        pending.put_nowait(None)
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+    if rss_task is not None:
+        rss_task.cancel()
+        rss.append(server_rss_mb(server_pid))
+    return {"samples": samples, "sent": sent, "backlog_at_end": backlog, "elapsed": elapsed, "rss": rss}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest rank
+    index = min(len(sorted_values), max(1, math.ceil(q * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+def _is_error(outcome: str) -> bool:
+    return not (outcome.startswith("2") and outcome != "200 with error") and outcome != "304"
+
+
+def latency_summary(samples: List[tuple]) -> Dict:
+    latencies = sorted(latency for _, _, latency, _ in samples)
+    errors = sum(1 for _, outcome, _, _ in samples if _is_error(outcome))
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p90_ms": _percentile(latencies, 0.9) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def summarise(run: Dict, rps: float, duration: float) -> Dict:
+    samples = run["samples"]
+    rss = [value for value in run["rss"] if value] or [0.0]
+    # Requests that got a response; the ones still queued when the window closes drain after it
+    completed = [s for s in samples if s[1][0].isdigit()]
+    return {
+        "target_rps": rps,
+        "duration_s": duration,
+        "sent": run["sent"],
+        "completed": len(completed),
+        "throughput_rps": len(completed) / run["elapsed"] if run["elapsed"] else 0.0,
+        "backlog_at_end": run["backlog_at_end"],
+        "latency": latency_summary(samples),
+        "endpoints": {
+            name: latency_summary([s for s in samples if s[0] == name])
+            for name in ENDPOINTS if any(s[0] == name for s in samples)
+        },
+        "outcomes": dict(Counter(outcome for _, outcome, _, _ in samples).most_common()),
+        "server_rss_mb": {"start": rss[0], "peak": max(rss), "end": rss[-1]},
+    }
+
+
+def server_stats(port: int) -> Dict:
+    """The parts of /api/stats that explain a load test result"""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/stats", timeout=5) as response:
+            stats = json.load(response)
+    except (urllib.error.URLError, OSError, ValueError):
+        return {}
+    keys = ("cache_hit_ratio", "jobs_scraped_per_source", "scraper_error_rate", "scrape_admission", "requests")
+    return {key: stats[key] for key in keys if key in stats}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'; use {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def distribution(text: str) -> str:
+    try:
+        Distribution(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def print_report(report: Dict) -> None:
+    latency = report["latency"]
+    print(f"target {report['target_rps']:.0f} rps for {report['duration_s']:.0f}s: "
+          f"sent {report['sent']}, completed {report['completed']} "
+          f"({report['throughput_rps']:.1f} rps), backlog at end {report['backlog_at_end']}")
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, row in [("all", latency), *report["endpoints"].items()]:
+        print(f"{name:<10} {row['requests']:>9} {row['error_rate']:>7.1%} {row['p50_ms']:>9.1f} "
+              f"{row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+    print("outcomes: " + ", ".join(f"{outcome}: {n}" for outcome, n in report["outcomes"].items()))
+    rss = report["server_rss_mb"]
+    print(f"server RSS: {rss['start']:.0f} MB at start, {rss['peak']:.0f} MB peak, {rss['end']:.0f} MB at end")
+    server = report.get("server", {})
+    if server.get("cache_hit_ratio"):
+        print("cache hit ratio: " + ", ".join(f"{name} {ratio:.0%}" for name, ratio in server["cache_hit_ratio"].items()))
+    if server.get("jobs_scraped_per_source"):
+        print(f"jobs scraped: {server['jobs_scraped_per_source']}")
+    if server.get("scrape_admission", {}).get("rejected"):
+        print(f"scrapes rejected: {server['scrape_admission']['rejected']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a fake scraper")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent client connections")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request counts as timed out")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("match=3,jobs=1,search=1"),
+                        help="Endpoint weights, e.g. match=3,jobs=1,search=1")
+    parser.add_argument("--queries", type=int, default=40, help="Distinct search keywords")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Query popularity skew (0 = uniform)")
+    parser.add_argument("--max-results", type=int, default=30)
+    parser.add_argument("--engine", default="keyword", help="Scoring engine for /api/match")
+    parser.add_argument("--latency", type=distribution, default="lognormal:1.5,0.6",
+                        help="Fake scrape latency in seconds, e.g. fixed:0.5, uniform:0.2,1.5, lognormal:1.5,0.6")
+    parser.add_argument("--results", type=distribution, default="uniform:20,60",
+                        help="Jobs per fake scrape, capped by max_results")
+    parser.add_argument("--scrape-error-rate", type=float, default=0.0, help="Fraction of fake scrapes that fail")
+    parser.add_argument("--fixtures", nargs="+", default=[str(path) for path in DEFAULT_FIXTURES],
+                        help="response.json-style files the fake jobs are built from")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--server-logs", action="store_true", help="Show the server's log output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    scraper_config = {
+        "fixtures": args.fixtures,
+        "latency": args.latency,
+        "results": args.results,
+        "error_rate": args.scrape_error_rate,
+    }
+    queries = SKILLS[:args.queries] if args.queries <= len(SKILLS) else [
+        f"{SKILLS[i % len(SKILLS)]} {i // len(SKILLS)}" for i in range(args.queries)
+    ]
+    plan = RequestPlan(args.mix, queries, args.zipf, args.max_results, args.engine, args.seed)
+
+    port = _free_port()
+    server = start_server(port, args.workers, scraper_config, args.server_logs)
+    try:
+        run = asyncio.run(drive("127.0.0.1", port, plan, args.rps, args.duration, args.clients,
+                                args.timeout, server.pid, args.seed))
+        report = summarise(run, args.rps, args.duration)
+        report["server"] = server_stats(port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report["config"] = {**vars(args), "mix": args.mix, "env": {
+        name: os.environ[name] for name in ("CACHE_URL", "SCRAPE_CONCURRENCY", "SCRAPE_QUEUE_SIZE",
+                                            "SCRAPE_WAIT_TIMEOUT", "WARMUP") if name in os.environ
+    }}
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+MLJobMatcher benchmark over synthetic corpora
+
+Measures fit time, whole-corpus query latency, cluster recommendation
+latency and peak RSS for each matcher mode and corpus size. Every
+(size, mode) runs in a fresh process so peak RSS is not shared.
+
+Usage:
+    python -m benchmarks.matcher_benchmark --sizes 1000 10000 100000 1000000 --json bench.json
+    python -m benchmarks.matcher_benchmark --json new.json --compare bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+
+import numpy as np
+
+MODES = {
+    "exact": {},
+    "ann": {"use_ann": True},
+    "sharded": {"scoring_workers": os.cpu_count(), "shard_threshold": 0},
+}
+
+
+def _percentiles(samples_ms):
+    return {
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+    }
+
+
+def _run_case(n_jobs, mode, n_queries, queue):
+    # Imported here so the parent process stays small
+    import sklearn
+    from benchmarks.synthetic import generate_jobs, generate_queries
+    from src.matcher.ml_job_matcher import MLJobMatcher
+
+    jobs = generate_jobs(n_jobs)
+    queries = generate_queries(n_queries)
+    matcher = MLJobMatcher(**MODES[mode])
+
+    started = time.perf_counter()
+    matcher.train_model(jobs)
+    fit_s = time.perf_counter() - started
+
+    # Warm up caches and lazy structures before timing
+    matcher.rank_jobs(queries[0])
+
+    query_ms = []
+    recommend_ms = []
+    for query in queries:
+        started = time.perf_counter()
+        matcher.rank_jobs(query)
+        query_ms.append((time.perf_counter() - started) * 1000)
+
+        skills = matcher.parse_user_skills(query)
+        started = time.perf_counter()
+        matcher.get_cluster_recommendations(skills)
+        recommend_ms.append((time.perf_counter() - started) * 1000)
+
+    matcher.close()
+    queue.put({
+        "jobs": n_jobs,
+        "mode": mode,
+        "fit_s": fit_s,
+        "n_features": len(matcher.tfidf_vectorizer.vocabulary_),
+        "n_clusters": 0 if matcher.cluster_centers is None else len(matcher.cluster_centers),
+        "job_matrix_nnz": int(matcher.job_vectors.nnz),
+        "query": _percentiles(query_ms),
+        "recommend": _percentiles(recommend_ms),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "sklearn_version": sklearn.__version__,
+    })
+
+
+def run_case(n_jobs, mode, n_queries):
+    """Run one benchmark case in a child process and return its results"""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case, args=(n_jobs, mode, n_queries, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline, threshold=0.1):
+    """Print cases that are more than threshold slower or larger than the baseline"""
+    previous = {(r["jobs"], r["mode"]): r for r in baseline["results"]}
+    for result in current["results"]:
+        before = previous.get((result["jobs"], result["mode"]))
+        if not before:
+            continue
+        for metric, now, then in [
+            ("fit_s", result["fit_s"], before["fit_s"]),
+            ("query p95", result["query"]["p95_ms"], before["query"]["p95_ms"]),
+            ("recommend p95", result["recommend"]["p95_ms"], before["recommend"]["p95_ms"]),
+            ("peak_rss_mb", result["peak_rss_mb"], before["peak_rss_mb"]),
+        ]:
+            change = (now - then) / then if then else 0.0
+            flag = "REGRESSION" if change > threshold else ""
+            print(f"{result['jobs']:>8} {result['mode']:<6} {metric:<14} {then:>10.2f} -> {now:>10.2f} ({change:+.0%}) {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MLJobMatcher on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=sorted(MODES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": [],
+    }
+
+    print(f"{'jobs':>8} {'mode':<6} {'fit s':>8} {'q p50':>8} {'q p95':>8} {'q p99':>8} "
+          f"{'rec p50':>8} {'rec p95':>8} {'rss MB':>8}")
+    for n_jobs in args.sizes:
+        for mode in args.modes:
+            result = run_case(n_jobs, mode, args.queries)
+            report["results"].append(result)
+            print(f"{n_jobs:>8} {mode:<6} {result['fit_s']:>8.2f} "
+                  f"{result['query']['p50_ms']:>8.2f} {result['query']['p95_ms']:>8.2f} {result['query']['p99_ms']:>8.2f} "
+                  f"{result['recommend']['p50_ms']:>8.2f} {result['recommend']['p95_ms']:>8.2f} "
+                  f"{result['peak_rss_mb']:>8.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Payload size and encode time of /api/match responses
+
+Bodies are built from response_with_score.json, with its jobs repeated up
+to each page size, and measured in full and with the fields=list
+projection: stdlib json against encode_json (orjson when installed), then
+gzip and brotli (when installed) on the encoded bytes. Repeated jobs
+compress better than distinct ones, so compressed sizes are a lower bound.
+
+Usage:
+    python -m benchmarks.response_benchmark --jobs 5 30 100 --json responses.json
+"""
+
+import argparse
+import gzip
+import json
+import time
+from pathlib import Path
+
+from src.api.responses import brotli, compress, encode_json, orjson, parse_fields, project_payload
+
+SAMPLE = Path(__file__).resolve().parent.parent / "response_with_score.json"
+
+
+def sample_payload(n_jobs):
+    payload = json.loads(SAMPLE.read_text())
+    jobs = payload["matched_jobs"]
+    payload["matched_jobs"] = [dict(jobs[i % len(jobs)], job_id=str(i)) for i in range(n_jobs)]
+    payload["total_jobs_found"] = n_jobs
+    return payload
+
+
+def _per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def stdlib_json(payload):
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def measure(payload, repeat):
+    body = encode_json(payload)
+    result = {
+        "bytes": len(body),
+        "json_encode_us": _per_call_us(lambda: stdlib_json(payload), repeat),
+        "encode_us": _per_call_us(lambda: encode_json(payload), repeat),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6, mtime=0)),
+        "gzip_us": _per_call_us(lambda: compress(body, "gzip"), repeat),
+    }
+    if brotli is not None:
+        result["br_bytes"] = len(compress(body, "br"))
+        result["br_us"] = _per_call_us(lambda: compress(body, "br"), repeat)
+    return result
+
+
+def run(sizes, repeat):
+    list_fields = parse_fields("list")
+    results = []
+    for n_jobs in sizes:
+        payload = sample_payload(n_jobs)
+        results.append({
+            "jobs": n_jobs,
+            "full": measure(payload, repeat),
+            "list": measure(project_payload(payload, list_fields), repeat),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /api/match payload size and encode time")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[5, 30, 100], help="Jobs per response")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.jobs, args.repeat)
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"encoder: {encoder}, brotli: {'yes' if brotli is not None else 'not installed'}")
+    for result in results:
+        print(f"{result['jobs']} jobs")
+        for view in ("full", "list"):
+            m = result[view]
+            line = (f"  {view:4} {m['bytes']:8d} B  json {m['json_encode_us']:7.1f} us  "
+                    f"{encoder} {m['encode_us']:7.1f} us  gzip {m['gzip_bytes']:7d} B ({m['gzip_us']:.0f} us)")
+            if "br_bytes" in m:
+                line += f"  br {m['br_bytes']:7d} B ({m['br_us']:.0f} us)"
+            print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"encoder": encoder, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cold start of the API: import time and time to first request
+
+Each run starts a fresh interpreter. Import time is measured around
+"import src.api.main"; time to first request starts a uvicorn server and
+polls /health (process up) and /ready (model loaded and engines warm)
+until they answer 200.
+
+Usage:
+    python -m benchmarks.startup_benchmark --runs 5 --json startup.json
+    MODEL_PATH=models/matcher python -m benchmarks.startup_benchmark
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import src.api.main
+elapsed = time.perf_counter() - started
+heavy = [name for name in ("playwright", "sklearn", "scipy") if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def import_time():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer 200 in time")
+
+
+def first_request_times(timeout=120.0):
+    """Seconds from process start until /health and /ready answer"""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        health = _wait_for(f"http://127.0.0.1:{port}/health", deadline)
+        ready = _wait_for(f"http://127.0.0.1:{port}/ready", deadline)
+        return health - started, ready - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(runs):
+    imports, heavy = [], set()
+    health, ready = [], []
+    for _ in range(runs):
+        seconds, modules = import_time()
+        imports.append(seconds)
+        heavy.update(modules)
+        to_health, to_ready = first_request_times()
+        health.append(to_health)
+        ready.append(to_ready)
+    return {
+        "runs": runs,
+        "model_path": os.environ.get("MODEL_PATH"),
+        "warmup": os.environ.get("WARMUP", "1") != "0",
+        "import_s": statistics.median(imports),
+        "heavy_modules_at_import": sorted(heavy),
+        "first_health_s": statistics.median(health),
+        "first_ready_s": statistics.median(ready),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time and time to first request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print(f"median of {result['runs']} runs (warm-up {'on' if result['warmup'] else 'off'})")
+    print(f"  import src.api.main  {result['import_s'] * 1000:8.0f} ms")
+    print(f"  first /health        {result['first_health_s'] * 1000:8.0f} ms")
+    print(f"  first /ready         {result['first_ready_s'] * 1000:8.0f} ms")
+    print(f"  heavy modules loaded at import: {', '.join(result['heavy_modules_at_import']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
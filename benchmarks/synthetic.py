@@ -0,0 +1,91 @@
+"""
+Synthetic job corpora shaped like the /api/match job records
+Used by the benchmarks so they can run at any size without scraping
+"""
+
+import random
+from datetime import datetime
+
+SKILLS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'Go', 'Rust', 'Scala', 'Kotlin',
+    'Swift', 'PHP', 'Ruby', 'React', 'Angular', 'Vue', 'Node.js', 'Django', 'Flask', 'FastAPI',
+    'Spring', 'Express', 'HTML', 'CSS', 'SQL', 'MySQL', 'PostgreSQL', 'MongoDB', 'Redis',
+    'Elasticsearch', 'Kafka', 'Spark', 'Hadoop', 'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes',
+    'Terraform', 'Jenkins', 'Git', 'Linux', 'GraphQL', 'REST API', 'Microservices',
+    'Machine Learning', 'Deep Learning', 'Data Science', 'TensorFlow', 'PyTorch', 'Pandas',
+    'NumPy', 'Scikit-Learn', 'NLP', 'Computer Vision', 'Flutter', 'React Native', 'Android',
+    'iOS', 'DevOps', 'CI/CD', 'Selenium', 'Power BI', 'Tableau', 'Excel', 'SAP', 'Salesforce',
+]
+
+ROLES = [
+    'Developer', 'Engineer', 'Software Engineer', 'Senior Engineer', 'Lead', 'Architect',
+    'Consultant', 'Analyst', 'Intern', 'Trainee', 'Specialist', 'Manager', 'Tech Lead',
+]
+
+DOMAINS = [
+    'fintech', 'payments', 'healthcare', 'e-commerce', 'logistics', 'edtech', 'gaming',
+    'banking', 'insurance', 'telecom', 'retail', 'media', 'travel', 'saas', 'security',
+]
+
+CITIES = [
+    'Bengaluru, Karnataka, India', 'Pune, Maharashtra, India', 'Hyderabad, Telangana, India',
+    'Chennai, Tamil Nadu, India', 'Mumbai, Maharashtra, India', 'Gurugram, Haryana, India',
+    'Noida, Uttar Pradesh, India', 'Kolkata, West Bengal, India', 'Ahmedabad, Gujarat, India',
+    'Remote',
+]
+
+LEVELS = ['Entry level', 'Associate', 'Mid-Senior level', 'Director', 'Internship', 'All levels']
+POSTED = ['3 hours ago', '1 day ago', '2 days ago', '3 days ago', '1 week ago', '2 weeks ago']
+
+
+def generate_jobs(n, seed=42, companies=2000):
+    """Generate n job dicts with the same keys as the scraper output"""
+    rng = random.Random(seed)
+    company_names = [f"Company {i}" for i in range(companies)]
+    scraped_at = datetime(2025, 11, 21).isoformat()
+    jobs = []
+    for i in range(n):
+        # A skewed skill distribution, like real postings
+        skills = sorted({SKILLS[min(int(rng.expovariate(1 / 12)), len(SKILLS) - 1)] for _ in range(rng.randint(1, 5))})
+        primary = rng.choice(skills)
+        title = f"{primary} {rng.choice(ROLES)}"
+        company = rng.choice(company_names)
+        location = rng.choice(CITIES)
+        link = f"https://in.linkedin.com/jobs/view/{title.lower().replace(' ', '-')}-at-{i}"
+        description = (
+            f"Apply for {title} at {company}. Work on {rng.choice(DOMAINS)} products using "
+            f"{', '.join(skills)} with a team in {location.split(',')[0]}."
+        )
+        jobs.append({
+            "job_id": str(100000 + i),
+            "title": title,
+            "company": company,
+            "location": location,
+            "apply_link": link,
+            "url": link,
+            "apply_source": "LinkedIn",
+            "source": "LinkedIn",
+            "posted_date": rng.choice(POSTED),
+            "thumbnail": None,
+            "company_logo": None,
+            "description": description,
+            "salary": "Competitive",
+            "schedule_type": "Full-time",
+            "is_remote": location == 'Remote',
+            "experience_level": rng.choice(LEVELS),
+            "applicants": "N/A",
+            "skills": skills,
+            "qualifications": [],
+            "requirements": [],
+            "experience": "Varies",
+            "benefits": [],
+            "responsibilities": [],
+            "scraped_at": scraped_at,
+        })
+    return jobs
+
+
+def generate_queries(n, seed=7):
+    """Generate n comma-separated user skill strings"""
+    rng = random.Random(seed)
+    return [', '.join(rng.sample(SKILLS, rng.randint(1, 4))) for _ in range(n)]
@@ -0,0 +1,186 @@
+"""
+Admission control for browser scrapes
+A fixed number of scrapes run at once; the rest wait in a bounded,
+prioritised queue for a limited time, and anything beyond that is turned
+away at once with a retry hint instead of launching another browser.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from src.monitoring.metrics import REGISTRY
+from src.monitoring.tracing import span
+
+INTERACTIVE = "interactive"
+PREFETCH = "prefetch"
+PRIORITIES = (INTERACTIVE, PREFETCH)
+
+_request_priority: ContextVar[str] = ContextVar("request_priority", default=INTERACTIVE)
+
+admission_rejections = REGISTRY.counter(
+    "admission_rejections_total", "Scrapes turned away, by priority and reason", ("priority", "reason")
+)
+admission_wait_seconds = REGISTRY.histogram(
+    "admission_wait_seconds", "Time scrapes waited for a slot", ("priority",)
+)
+
+
+class Rejected(Exception):
+    """Raised when a scrape can't be admitted; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def current_priority() -> str:
+    return _request_priority.get()
+
+
+class PriorityMiddleware:
+    """Classifies each request as interactive or prefetch
+
+    Prefetches are marked by browsers with Sec-Purpose (or the older
+    Purpose) header, or explicitly with X-Request-Priority: prefetch.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        markers = (headers.get(b"x-request-priority", b""), headers.get(b"sec-purpose", b""),
+                   headers.get(b"purpose", b""))
+        priority = PREFETCH if any(marker.lower().startswith(b"prefetch") for marker in markers) else INTERACTIVE
+        token = _request_priority.set(priority)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_priority.reset(token)
+
+
+class AdmissionController:
+    """Bounded scrape concurrency with a bounded, prioritised wait queue
+
+    Interactive scrapes are always admitted before prefetches, and
+    prefetches never take the last interactive_reserve slots. Waiting is
+    first come, first served within a priority. Must be used from a single
+    event loop.
+
+    Args:
+        max_concurrent: Scrapes running at once (browsers)
+        max_waiting: Interactive scrapes allowed to wait for a slot
+        max_waiting_prefetch: Prefetches allowed to wait; a quarter of max_waiting when None
+        timeout: Seconds a scrape waits for a slot before it is rejected
+        interactive_reserve: Slots only interactive scrapes may use
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_waiting: int = 16,
+                 max_waiting_prefetch: Optional[int] = None, timeout: float = 30.0,
+                 interactive_reserve: int = 1):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_waiting_prefetch = max_waiting // 4 if max_waiting_prefetch is None else max_waiting_prefetch
+        self.timeout = timeout
+        # Prefetches can always use at least one slot
+        self.interactive_reserve = max(0, min(interactive_reserve, max_concurrent - 1))
+        self.active = 0
+        self._waiters = {priority: deque() for priority in PRIORITIES}
+        # Moving average of how long a scrape holds its slot, for Retry-After
+        self._hold_seconds = 5.0
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        if priority is not None:
+            return sum(1 for future in self._waiters[priority] if not future.done())
+        return sum(self.waiting(p) for p in PRIORITIES)
+
+    def retry_after(self) -> int:
+        """Seconds until a new scrape would probably get a slot"""
+        backlog = self.waiting() / self.max_concurrent + 1
+        return max(1, math.ceil(self._hold_seconds * backlog))
+
+    def _limit(self, priority: str) -> int:
+        return self.max_concurrent if priority == INTERACTIVE else self.max_concurrent - self.interactive_reserve
+
+    def _can_start(self, priority: str) -> bool:
+        if self.active >= self._limit(priority):
+            return False
+        # Don't overtake anyone of the same or a higher priority
+        if self.waiting(INTERACTIVE) or (priority == PREFETCH and self.waiting(PREFETCH)):
+            return False
+        return True
+
+    def _reject(self, priority: str, reason: str, message: str):
+        admission_rejections.inc(priority=priority, reason=reason)
+        raise Rejected(message, self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self, priority: Optional[str] = None, timeout: Optional[float] = None):
+        """Hold a scrape slot for the block
+
+        Args:
+            priority: INTERACTIVE or PREFETCH; the current request's when None
+            timeout: Seconds to wait for a slot; the controller's timeout when None
+
+        Raises:
+            Rejected: The wait queue is full or no slot freed up in time
+        """
+        priority = priority or current_priority()
+        await self._acquire(priority, self.timeout if timeout is None else timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    async def _acquire(self, priority: str, timeout: float) -> None:
+        if self._can_start(priority):
+            self.active += 1
+            admission_wait_seconds.observe(0.0, priority=priority)
+            return
+
+        limit = self.max_waiting if priority == INTERACTIVE else self.max_waiting_prefetch
+        if self.waiting(priority) >= limit:
+            self._reject(priority, "queue_full", "Too many scrapes in progress, try again shortly")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiters[priority]
+        queue.append(future)
+        started = time.monotonic()
+        try:
+            with span("admission_wait", priority=priority):
+                await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended
+                self._release()
+            elif future in queue:
+                queue.remove(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(priority, "timeout", f"No scrape slot freed up within {timeout:g}s, try again shortly")
+        admission_wait_seconds.observe(time.monotonic() - started, priority=priority)
+
+    def _release(self) -> None:
+        self.active -= 1
+        # Hand freed slots to waiters, interactive first
+        while self.active < self.max_concurrent:
+            for priority in PRIORITIES:
+                queue = self._waiters[priority]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if queue and self.active < self._limit(priority):
+                    queue.popleft().set_result(None)
+                    self.active += 1
+                    break
+            else:
+                return
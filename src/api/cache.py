@@ -0,0 +1,174 @@
+"""
+In-process TTL + LRU cache for scrape results and ranked result sets
+Shared backends with the same interface are in src.api.shared_cache
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CacheLock:
+    """Lease on a name that one holder (worker) has at a time
+
+    Leases expire after lease seconds so a crashed holder can't block the
+    others for long; a live holder keeps its lease with renew() or the
+    renewing() block. Backends implement try_acquire(), renew() and
+    release(), and override the async variants when those block on I/O.
+    """
+
+    def __init__(self, name: Hashable, lease: float):
+        self.name = name
+        self.lease = lease
+        self.token = uuid.uuid4().hex
+
+    def try_acquire(self) -> bool:
+        raise NotImplementedError
+
+    def renew(self) -> bool:
+        """Extend a held lease to lease seconds from now; False if it was lost"""
+        raise NotImplementedError
+
+    def release(self) -> None:
+        raise NotImplementedError
+
+    async def try_acquire_async(self) -> bool:
+        return self.try_acquire()
+
+    async def renew_async(self) -> bool:
+        return self.renew()
+
+    async def release_async(self) -> None:
+        self.release()
+
+    @asynccontextmanager
+    async def renewing(self):
+        """Renew the held lease every third of its length for the block, however long it runs"""
+        async def renew():
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                if not await self.renew_async():
+                    logger.warning(f"Lease on {self.name!r} was lost before it was released")
+                    return
+
+        renewer = asyncio.ensure_future(renew())
+        try:
+            yield self
+        finally:
+            renewer.cancel()
+            await asyncio.gather(renewer, return_exceptions=True)
+
+    async def acquire(self, timeout: Optional[float] = None, poll: float = 0.1) -> bool:
+        """Wait for the lease; False if timeout seconds passed first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not await self.try_acquire_async():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release_async()
+
+
+class _LocalLock(CacheLock):
+    def __init__(self, leases: Dict[Hashable, Tuple[str, float]], guard: threading.Lock,
+                 name: Hashable, lease: float):
+        super().__init__(name, lease)
+        self._leases = leases
+        self._guard = guard
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._guard:
+            held = self._leases.get(self.name)
+            if held is not None and held[1] >= now and held[0] != self.token:
+                return False
+            self._leases[self.name] = (self.token, now + self.lease)
+            return True
+
+    def renew(self) -> bool:
+        now = time.monotonic()
+        with self._guard:
+            held = self._leases.get(self.name)
+            if held is None or held[0] != self.token or held[1] < now:
+                return False
+            self._leases[self.name] = (self.token, now + self.lease)
+            return True
+
+    def release(self) -> None:
+        with self._guard:
+            held = self._leases.get(self.name)
+            if held is not None and held[0] == self.token:
+                del self._leases[self.name]
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._leases: Dict[Hashable, Tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        return self.get(key, default)
+
+    async def set_async(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def values(self) -> list:
+        """Values of the entries that haven't expired"""
+        now = time.monotonic()
+        with self._lock:
+            return [value for expires, value in self._entries.values() if expires >= now]
+
+    def lock(self, name: Hashable, lease: float = 120.0) -> CacheLock:
+        """Lease on name among the users of this cache (one process here)"""
+        return _LocalLock(self._leases, self._lock, name, lease)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,166 @@
+"""
+Conditional GET and serialised response caching for the JSON endpoints
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+from typing import Dict, Optional
+
+from fastapi import Query, Request
+from fastapi.responses import Response
+
+from src.monitoring.tracing import current_trace, span
+from src.api.responses import (
+    COMPRESS_MIN_BYTES, available_encodings, compress, encode_json, negotiate_encoding, parse_fields,
+    project_payload
+)
+from src.api.shared_cache import make_cache
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison, as RFC 9110 asks for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def request_key(request: Request) -> tuple:
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+class EncodedBody:
+    """A serialised payload, its ETag and its compressed variants, made on first use"""
+
+    __slots__ = ("etag", "body", "_variants")
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, variants: Optional[Dict[str, bytes]] = None):
+        self.etag = etag or body_etag(body)
+        self.body = body
+        self._variants: Dict[str, bytes] = variants or {}
+
+    def variant(self, encoding: Optional[str]):
+        """(content, etag) for a content coding; small bodies are always sent as they are"""
+        if encoding is None or len(self.body) < COMPRESS_MIN_BYTES:
+            return self.body, self.etag
+        content = self._variants.get(encoding)
+        if content is None:
+            content = self._variants[encoding] = compress(self.body, encoding)
+        # Each representation needs its own strong validator
+        return content, self.etag[:-1] + "-" + encoding + '"'
+
+    def dumps(self) -> bytes:
+        """The body, ETag and every compressed variant, for a shared cache
+
+        Variants are all made now, so hits in other workers neither hash
+        nor compress. A one-line JSON header lists the parts that follow.
+        """
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            for encoding in available_encodings():
+                self.variant(encoding)
+        parts = [("identity", self.body), *self._variants.items()]
+        header = json.dumps({"etag": self.etag, "parts": [[name, len(data)] for name, data in parts]})
+        return b"\n".join([header.encode(), *(data for _, data in parts)])
+
+    @classmethod
+    def loads(cls, data: bytes) -> "EncodedBody":
+        header, _, rest = data.partition(b"\n")
+        meta = json.loads(header)
+        parts, offset = {}, 0
+        for name, length in meta["parts"]:
+            parts[name] = rest[offset:offset + length]
+            # Skip the separator after the part
+            offset += length + 1
+        body = parts.pop("identity")
+        return cls(body, meta["etag"], parts)
+
+
+# Encoded bodies by request; an identical request skips scraping, scoring and encoding.
+# Kept for less time than result sets so a cached page never hands out a dead cursor
+response_cache = make_cache("responses", max_entries=512, ttl=300,
+                            dumps=EncodedBody.dumps, loads=EncodedBody.loads)
+
+
+def conditional_json(total_field: str, max_age: int = 60, cursor_max_age: int = 300):
+    """Serve an endpoint's dict payload with an ETag, 304s and a body cache
+
+    The ETag is a digest of the encoded body, so it only changes when the
+    result set (or the page of it) does. Successful non-empty payloads are
+    cached encoded, keyed by path and query string. Cursor pages are
+    immutable for their result set's lifetime and may be cached longer.
+    The wrapped endpoint also takes fields= to project its job lists, and
+    bodies are gzip or brotli compressed when the client accepts it.
+    debug=trace bypasses the cache and adds the request's span tree to
+    the payload under "debug".
+
+    Args:
+        total_field: Payload key holding the result count; empty results aren't cached
+        max_age: Cache-Control max-age for first pages
+        cursor_max_age: Cache-Control max-age for cursor pages
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, request: Request, fields: Optional[str] = None,
+                          debug: Optional[str] = None, **kwargs):
+            tracing = debug == "trace"
+            key = request_key(request)
+            entry = None if tracing else await response_cache.get_async(key)
+            if entry is None:
+                with span("endpoint"):
+                    payload = await endpoint(*args, **kwargs)
+                if isinstance(payload, Response):
+                    return payload
+                with span("encode"):
+                    payload = project_payload(payload, parse_fields(fields))
+                    if tracing and current_trace() is not None:
+                        payload = {**payload, "debug": {"trace": current_trace().to_dict()}}
+                    entry = EncodedBody(encode_json(payload))
+                if not tracing and "error" not in payload and payload.get(total_field):
+                    await response_cache.set_async(key, entry)
+
+            encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+            content, etag = entry.variant(encoding)
+            age = cursor_max_age if "cursor" in request.query_params else max_age
+            headers: Dict[str, str] = {
+                "ETag": etag,
+                "Cache-Control": f"private, max-age={age}, must-revalidate",
+                "Vary": "Accept-Encoding",
+            }
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            if content is not entry.body:
+                headers["Content-Encoding"] = encoding
+            return Response(content=content, media_type="application/json", headers=headers)
+
+        # FastAPI reads the parameters from the signature; add the request, fields= and debug= to them
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(
+                "fields", inspect.Parameter.KEYWORD_ONLY, annotation=Optional[str],
+                default=Query(None, description="Comma-separated job fields to return, or 'list' "
+                                                "for title, company, location, link and score")
+            ),
+            inspect.Parameter(
+                "debug", inspect.Parameter.KEYWORD_ONLY, annotation=Optional[str],
+                default=Query(None, description="'trace' returns the request's span tree, uncached")
+            ),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+
+    return decorator
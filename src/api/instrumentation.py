@@ -0,0 +1,70 @@
+"""
+ASGI middleware recording request metrics and per-request traces
+"""
+
+import time
+
+from src.monitoring.metrics import api_in_flight, api_latency, api_requests
+from src.monitoring.tracing import server_timing, trace
+
+
+class MetricsMiddleware:
+    """Counts and times every HTTP request under its route template
+
+    Routes are labelled by their path template (/api/searches/{search_id}),
+    so ids in URLs don't create new series; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        api_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            api_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            api_latency.observe(time.perf_counter() - started, route=path, method=method)
+            api_requests.inc(route=path, method=method, status=str(status["code"]))
+
+
+class TracingMiddleware:
+    """Traces every HTTP request and reports its spans in a Server-Timing header
+
+    The header is built when the response starts, so it covers everything
+    the endpoint did before returning.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with trace(f"{scope['method']} {scope['path']}") as root:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(root).encode("latin-1")))
+                    headers.append((b"timing-allow-origin", b"*"))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -1,28 +1,234 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
 from typing import Optional, List
+import asyncio
+import json
 import os
-import sys
+import threading
+import time
 import logging
 
-sys.path.append('/Users/prathamgupta/Downloads/yuvanova-production')
+# Playwright and scikit-learn are imported on first use, not here
 from src.scraper.linkedin_scraper import RealJobScraper
+from src.matcher.scoring import SCORERS, JobScorer
+from src.api.admission import (
+    PREFETCH, PRIORITIES, AdmissionController, PriorityMiddleware, Rejected, admission_rejections,
+    current_priority
+)
+from src.api.pagination import RankedResults, decode_cursor
+from src.api.http_cache import conditional_json, response_cache
+from src.api.instrumentation import MetricsMiddleware, TracingMiddleware
+from src.api.responses import FastJSONResponse, encode_json, parse_fields, project_jobs
+from src.api.search_queue import QueueFull, SearchQueue, SearchTask, SqliteTaskStore
+from src.api.shared_cache import make_cache
+from src.api.static_assets import StaticAssets
+from src.monitoring.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, api_latency, api_requests, browsers_active,
+    jobs_scraped_per_source, scoring_seconds, scraper_error_rate
+)
+from src.monitoring.tracing import span
+from src.scraper.job_record import JobRecord, job_key, job_to_dict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Set up in the lifespan; assign job_scraper before startup to inject another scraper
+job_scraper: Optional[RealJobScraper] = None
+
+# One instance per scoring engine, created on first use or at warm-up;
+# each keeps its precomputed job features
+scorers = {}
+# Scorers are created from request handlers, scoring threads and the warm-up thread
+scorers_lock = threading.Lock()
+
+# Reported by /ready; the process serves requests before it is warm
+readiness = {"ready": False, "warm_seconds": None, "model_version": None, "error": None}
+
+
+def get_job_scraper() -> RealJobScraper:
+    global job_scraper
+    if job_scraper is None:
+        job_scraper = RealJobScraper()
+        logger.info("✅ LinkedIn job scraper initialized with Playwright + Chromium")
+    return job_scraper
+
+
+def get_scorer(engine: str) -> JobScorer:
+    scorer = scorers.get(engine)
+    if scorer is None:
+        with scorers_lock:
+            scorer = scorers.get(engine)
+            if scorer is None:
+                scorer = scorers[engine] = SCORERS[engine]()
+    return scorer
+
+
+def prepare_resources(warm_up: bool) -> None:
+    """Load the saved matcher model (MODEL_PATH) and optionally warm up every engine
+
+    Runs in a thread at startup. Warming creates each scorer, importing
+    scikit-learn, and runs one query against a loaded model.
+    """
+    started = time.perf_counter()
+    model_path = os.environ.get("MODEL_PATH")
+    try:
+        if model_path:
+            from src.matcher.model_store import load_model
+            from src.matcher.scoring import TfidfScorer
+
+            matcher = load_model(model_path)
+            loaded = TfidfScorer(matcher)
+            with scorers_lock:
+                scorer = scorers.setdefault(TfidfScorer.name, loaded)
+            if scorer.matcher is matcher:
+                readiness["model_version"] = matcher.model_version
+                logger.info(f"Loaded matcher model {matcher.model_version} from {model_path}")
+            else:
+                # A request created the engine first; keep the jobs it has already seen
+                matcher.close()
+                logger.warning(f"TF-IDF engine was created before the model in {model_path} loaded; not using it")
+        if warm_up:
+            for engine in SCORERS:
+                scorer = get_scorer(engine)
+                matcher = getattr(scorer, "matcher", None)
+                if matcher is not None and matcher.is_fitted:
+                    matcher.rank_jobs("python")
+    except Exception as e:
+        logger.error(f"Error preparing resources: {str(e)}")
+        readiness["error"] = str(e)
+    readiness["warm_seconds"] = round(time.perf_counter() - started, 3)
+    readiness["ready"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_job_scraper()
+    warm_up = os.environ.get("WARMUP", "1") != "0"
+    # Readiness flips once this finishes; liveness (/health) answers meanwhile
+    setup = asyncio.create_task(asyncio.to_thread(prepare_resources, warm_up))
+    await search_queue.start()
+    yield
+    await search_queue.stop()
+    await setup
+    # Background refits are joined before the interpreter tears down
+    for scorer in list(scorers.values()):
+        matcher = getattr(scorer, "matcher", None)
+        if matcher is not None:
+            await asyncio.to_thread(matcher.close)
+
+
 app = FastAPI(
     title="YuvaNova Job Matching API",
     description="Real-time LinkedIn job scraping powered by Playwright",
-    version="2.0"
+    version="2.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+
+def dump_jobs(jobs: List) -> bytes:
+    return encode_json([job_to_dict(job) for job in jobs])
+
+
+def load_jobs(data: bytes) -> List[JobRecord]:
+    return [JobRecord.from_dict(job) for job in json.loads(data)]
+
+
+# In the process, or shared by every worker when CACHE_URL names a SQLite file or Redis.
+# Raw scrape results per search, shared by every endpoint
+scrape_cache = make_cache("scrape", max_entries=256, ttl=600, dumps=dump_jobs, loads=load_jobs)
+# Ranked result sets by id, and the current result set id per query
+result_sets = make_cache("result_sets", max_entries=1024, ttl=600,
+                         dumps=lambda results: encode_json(results.to_dict()),
+                         loads=lambda data: RankedResults.from_dict(json.loads(data)))
+query_results = make_cache("query_results", max_entries=1024, ttl=600)
+
+# Browser scrapes running at once, across endpoints and queued searches; others wait
+# up to SCRAPE_WAIT_TIMEOUT seconds in a queue of SCRAPE_QUEUE_SIZE, then get a 429
+scrape_admission = AdmissionController(
+    max_concurrent=int(os.environ.get("SCRAPE_CONCURRENCY", "2")),
+    max_waiting=int(os.environ.get("SCRAPE_QUEUE_SIZE", "16")),
+    timeout=float(os.environ.get("SCRAPE_WAIT_TIMEOUT", "30"))
 )
+# Lease on a search's scrape between workers; renewed while the scrape runs,
+# so it only runs out when the worker holding it dies
+SCRAPE_LEASE = 60.0
+
+
+async def fetch_jobs(keywords: str, location: str, max_results: int,
+                     priority: Optional[str] = None) -> List[dict]:
+    """
+    Scrape jobs, reusing a recent scrape of the same search
+    Raises Rejected when no scrape slot is available; priority defaults to the request's
+    """
+    key = (keywords.strip().lower(), location.strip().lower(), max_results)
+    with span("fetch_jobs") as step:
+        jobs = await scrape_cache.get_async(key)
+        if step is not None:
+            step.attributes["cached"] = jobs is not None
+        if jobs is None:
+            # One worker scrapes a search at a time; the others wait and read its result
+            lock = scrape_cache.lock(key, lease=SCRAPE_LEASE)
+            with span("scrape_lock"):
+                acquired = await lock.acquire(timeout=scrape_admission.timeout)
+            if not acquired:
+                # Waited as long as for a scrape slot; back off the same way
+                priority = priority or current_priority()
+                admission_rejections.inc(priority=priority, reason="timeout")
+                raise Rejected(
+                    f"This search's scrape didn't finish within {scrape_admission.timeout:g}s, try again shortly",
+                    scrape_admission.retry_after()
+                )
+            try:
+                jobs = await scrape_cache.get_async(key)
+                if jobs is None:
+                    async with scrape_admission.admit(priority), lock.renewing():
+                        jobs = await get_job_scraper().get_all_jobs(keywords, location, max_results)
+                    if jobs:
+                        await scrape_cache.set_async(key, jobs)
+            finally:
+                await lock.release_async()
+    return jobs
+
+
+def overloaded(error: Rejected) -> FastJSONResponse:
+    """429 telling the client when to retry a scrape that wasn't admitted"""
+    return FastJSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(error.retry_after)},
+        content={"error": str(error), "retry_after": error.retry_after}
+    )
+
+
+async def cached_results(query_key: tuple) -> Optional[RankedResults]:
+    result_id = await query_results.get_async(query_key)
+    return await result_sets.get_async(result_id) if result_id else None
 
-# Initialize LinkedIn job scraper
-job_scraper = RealJobScraper()
-logger.info("✅ LinkedIn job scraper initialized with Playwright + Chromium")
+
+async def remember_results(query_key: tuple, results: RankedResults) -> RankedResults:
+    await result_sets.set_async(results.id, results)
+    await query_results.set_async(query_key, results.id)
+    return results
+
+
+async def results_for_cursor(cursor: str, endpoint: str):
+    """(results, offset, None) for a valid cursor, or (None, 0, error response)"""
+    try:
+        result_id, offset = decode_cursor(cursor)
+    except ValueError as e:
+        return None, 0, JSONResponse(status_code=400, content={"error": str(e)})
+    results = await result_sets.get_async(result_id)
+    if results is None:
+        return None, 0, JSONResponse(
+            status_code=410,
+            content={"error": "Cursor expired. Repeat the search to get a new one."}
+        )
+    if results.meta.get("endpoint") != endpoint:
+        return None, 0, JSONResponse(status_code=400, content={"error": "Cursor belongs to another endpoint"})
+    return results, offset, None
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,24 +237,58 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(PriorityMiddleware)
+
+
+def cache_stats() -> dict:
+    """name -> (hits, misses, entries) for every cache the API reads through"""
+    caches = {
+        "scrape": scrape_cache,
+        "result_sets": result_sets,
+        "query_results": query_results,
+        "responses": response_cache,
+    }
+    stats = {name: (cache.hits, cache.misses, len(cache)) for name, cache in caches.items()}
+    matcher = getattr(scorers.get("tfidf"), "matcher", None)
+    if matcher is not None:
+        stats["job_profiles"] = (matcher.profiles.hits, matcher.profiles.misses, len(matcher.profiles))
+    return stats
+
+
+def hit_ratio(hits: int, misses: int) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="web"), name="static")
 
-# Serve index.html at root
-@app.get("/")
-async def read_index():
-    return FileResponse('web/index.html')
+def count_cached_jobs() -> int:
+    """Distinct jobs held by unexpired scrapes"""
+    return len({job_key(job) for jobs in scrape_cache.values() for job in jobs})
 
-# Serve other static files directly if needed (e.g. app.js, style.css)
-@app.get("/{filename}")
-async def read_static(filename: str):
-    file_path = os.path.join("web", filename)
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
-    return JSONResponse(status_code=404, content={"message": "File not found"})
 
+REGISTRY.collector("cache_hits_total", "Cache lookups that found an entry",
+                   lambda: {(name,): s[0] for name, s in cache_stats().items()}, ("cache",), type="counter")
+REGISTRY.collector("cache_misses_total", "Cache lookups that found nothing",
+                   lambda: {(name,): s[1] for name, s in cache_stats().items()}, ("cache",), type="counter")
+REGISTRY.collector("cache_hit_ratio", "Hits over lookups since start",
+                   lambda: {(name,): hit_ratio(s[0], s[1]) for name, s in cache_stats().items()}, ("cache",))
+REGISTRY.collector("cache_entries", "Entries held",
+                   lambda: {(name,): s[2] for name, s in cache_stats().items()}, ("cache",))
+REGISTRY.collector("jobs_cached", "Distinct jobs held by unexpired scrapes", count_cached_jobs)
+REGISTRY.collector("search_queue_depth", "Searches waiting for a worker", lambda: search_queue.depth)
+REGISTRY.collector("search_workers", "Search workers", lambda: search_queue.workers)
+REGISTRY.collector("search_workers_busy", "Search workers running a search", lambda: search_queue.running)
+REGISTRY.collector("search_worker_utilisation", "Busy search workers over all of them",
+                   lambda: search_queue.running / search_queue.workers if search_queue.workers else 0.0)
+REGISTRY.collector("scrape_slots", "Browser scrapes allowed at once", lambda: scrape_admission.max_concurrent)
+REGISTRY.collector("scrape_slots_in_use", "Browser scrapes running", lambda: scrape_admission.active)
+REGISTRY.collector("scrape_waiting", "Scrapes waiting for a slot, by priority",
+                   lambda: {(p,): scrape_admission.waiting(p) for p in PRIORITIES}, ("priority",))
 
+# Web UI assets are held in memory and served from an exact route map
+WEB_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "web"))
+static_assets = StaticAssets(WEB_DIR)
+static_assets.mount(app)
 
 @app.get("/health")
 async def health():
@@ -58,45 +298,103 @@ async def health():
         "engine": "Playwright + Chromium"
     }
 
-def calculate_match_score(user_skills: str, job: dict) -> int:
-    """Calculate a match score (0-100) based on skills overlap"""
-    if not user_skills:
-        return 0
-        
-    user_skills_list = [s.strip().lower() for s in user_skills.split(',')]
-    job_title = job.get('title', '').lower()
-    job_skills = [s.lower() for s in job.get('skills', [])]
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the model is loaded and the engines are warm, 503 before"""
+    status = "ready" if readiness["ready"] else "starting"
+    return FastJSONResponse(status_code=200 if readiness["ready"] else 503, content={"status": status, **readiness})
+
+def parse_must_have(must_have: Optional[str]) -> List[str]:
+    return [s.strip() for s in (must_have or "").split(",") if s.strip()]
+
+
+def match_query_key(skills: str, location: str, max_results: int, engine: str, required: List[str]) -> tuple:
+    return ("match", skills, location, max_results, engine, tuple(required))
+
+
+def score_matches(scorer: JobScorer, all_jobs: List[dict], skills: str, location: str,
+                  engine: str, required: List[str]) -> RankedResults:
+    """Score scraped jobs for a match query; runs in a worker thread"""
+    # Job features are prepared once per job; scoring only does query work
+    with span("prepare", engine=engine, jobs=len(all_jobs)), scoring_seconds.time(engine=engine, step="prepare"):
+        scorer.prepare(all_jobs)
+    if required:
+        with span("require", engine=engine), scoring_seconds.time(engine=engine, step="require"):
+            all_jobs = scorer.require(required, all_jobs)
+    with span("score", engine=engine), scoring_seconds.time(engine=engine, step="score"):
+        scores = scorer.score(skills, all_jobs)
+    return RankedResults(all_jobs, scores, meta={
+        "endpoint": "match",
+        "response": {
+            "skills": [s.strip() for s in skills.split(",") if s.strip()],
+            "location": location,
+            "engine": engine,
+            "must_have": required,
+            "source": "LinkedIn (Real-time)"
+        }
+    })
+
+
+async def rank_matches(query_key: tuple, all_jobs: List[dict], skills: str, location: str,
+                       engine: str, required: List[str]) -> RankedResults:
+    """Score scraped jobs for a match query off the event loop and remember the ranked result set"""
+    scorer = get_scorer(engine)
+    results = await asyncio.to_thread(score_matches, scorer, all_jobs, skills, location, engine, required)
+    # Scores from a model that hasn't caught up with these jobs aren't worth reusing
+    if len(results) and scorer.covers(skills):
+        await remember_results(query_key, results)
+    return results
+
+
+def match_payload(results: RankedResults, skills: str, limit: int) -> dict:
+    """First page of a match result set: top limit matches, then limit recommendations"""
+    if not results:
+        logger.warning(f"No jobs found for: {skills}")
+        return {
+            "matched_jobs": [],
+            "recommended_jobs": [],
+            "total_jobs_found": 0,
+            "skills": [s.strip() for s in skills.split(",") if s.strip()],
+            "message": "No jobs found. Try different keywords or location.",
+            "source": "LinkedIn"
+        }
     
-    score = 0
-    total_weight = 0
+    # Split into matches and recommendations; only these jobs are ranked
+    direct_matches = results.page(0, limit)
+    recommendations = results.page(limit, limit)
     
-    # Check for skills in job title (high weight)
-    for skill in user_skills_list:
-        if not skill: continue
-        total_weight += 2
-        if skill in job_title:
-            score += 2
-        # Check for skills in job skills list (medium weight)
-        elif any(skill in js for js in job_skills):
-            score += 1
-            
-    # Normalize to 0-100
-    if total_weight == 0:
-        return 0
-        
-    final_score = int((score / total_weight) * 100)
-    # Ensure a minimum score for relevance if it appeared in search results
-    return max(final_score, 60) if final_score > 0 else 40
+    logger.info(f"Found {len(results)} jobs: {len(direct_matches)} matches, {len(recommendations)} recommendations")
+    
+    return {
+        "matched_jobs": direct_matches,
+        "recommended_jobs": recommendations,
+        "total_jobs_found": len(results),
+        "next_cursor": results.next_cursor(limit, limit),
+        **results.meta["response"],
+        "message": f"Found {len(results)} real LinkedIn job openings"
+    }
+
+def calculate_match_score(user_skills: str, job: dict) -> int:
+    """Calculate a match score (0-100) based on skills overlap"""
+    return get_scorer("keyword").score(user_skills, [job])[0]
 
 @app.get("/api/match")
+@conditional_json("total_jobs_found")
 async def match_jobs(
     skills: str = Query(..., description="Job keywords (e.g., 'React Developer', 'Python Engineer')"),
     location: str = Query("India", description="Job location"),
-    max_results: int = Query(30, description="Maximum number of jobs")
+    max_results: int = Query(30, description="Maximum number of jobs"),
+    engine: str = Query("keyword", description="Scoring engine: 'keyword' or 'tfidf'"),
+    must_have: Optional[str] = Query(None, description="Comma-separated skills every job must list"),
+    limit: int = Query(15, ge=1, le=100, description="Jobs per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response")
 ):
     """
     Search for real LinkedIn jobs matching your skills
     Returns actual job listings with working application links
+    
+    The first page splits the top 2 * limit jobs into matched and recommended
+    jobs; next_cursor pages through the rest of the same ranked result set.
     """
     if not skills:
         return {
@@ -106,47 +404,42 @@ async def match_jobs(
             "error": "Please provide keywords"
         }
     
+    if engine not in SCORERS:
+        return {
+            "matched_jobs": [],
+            "recommended_jobs": [],
+            "skills": [],
+            "error": f"Unknown scoring engine '{engine}'. Use one of: {', '.join(SCORERS)}"
+        }
+    
+    if cursor:
+        results, offset, error = await results_for_cursor(cursor, "match")
+        if error:
+            return error
+        return {
+            "matched_jobs": results.page(offset, limit),
+            "recommended_jobs": [],
+            "total_jobs_found": len(results),
+            "next_cursor": results.next_cursor(offset, limit),
+            **results.meta["response"]
+        }
+    
     try:
-        logger.info(f"Searching LinkedIn jobs for: '{skills}' in '{location}'")
-        
-        # Fetch real jobs from LinkedIn
-        # Fetch real jobs from LinkedIn
-        all_jobs = await job_scraper.get_all_jobs(skills, location, max_results)
+        required = parse_must_have(must_have)
+        query_key = match_query_key(skills, location, max_results, engine, required)
+        results = await cached_results(query_key)
         
-        # Calculate match scores for each job
-        for job in all_jobs:
-            job['match_percentage'] = calculate_match_score(skills, job)
+        if results is None:
+            logger.info(f"Searching LinkedIn jobs for: '{skills}' in '{location}'")
             
-        # Sort by match percentage
-        all_jobs.sort(key=lambda x: x['match_percentage'], reverse=True)
+            # Fetch real jobs from LinkedIn
+            all_jobs = await fetch_jobs(skills, location, max_results)
+            results = await rank_matches(query_key, all_jobs, skills, location, engine, required)
         
-        if not all_jobs:
-            logger.warning(f"No jobs found for: {skills}")
-            return {
-                "matched_jobs": [],
-                "recommended_jobs": [],
-                "total_jobs_found": 0,
-                "skills": [s.strip() for s in skills.split(",") if s.strip()],
-                "message": "No jobs found. Try different keywords or location.",
-                "source": "LinkedIn"
-            }
-        
-        # Split into matches and recommendations
-        direct_matches = all_jobs[:15] if len(all_jobs) > 15 else all_jobs
-        recommendations = all_jobs[15:30] if len(all_jobs) > 15 else []
-        
-        logger.info(f"Found {len(all_jobs)} jobs: {len(direct_matches)} matches, {len(recommendations)} recommendations")
-        
-        return {
-            "matched_jobs": direct_matches,
-            "recommended_jobs": recommendations,
-            "total_jobs_found": len(all_jobs),
-            "skills": [s.strip() for s in skills.split(",") if s.strip()],
-            "location": location,
-            "source": "LinkedIn (Real-time)",
-            "message": f"Found {len(all_jobs)} real LinkedIn job openings"
-        }
+        return match_payload(results, skills, limit)
         
+    except Rejected as e:
+        return overloaded(e)
     except Exception as e:
         logger.error(f"Error in job matching: {str(e)}")
         return {
@@ -156,27 +449,149 @@ async def match_jobs(
             "error": str(e)
         }
 
+class SearchRequest(BaseModel):
+    skills: str = Field(..., min_length=1, description="Job keywords (e.g., 'React Developer')")
+    location: str = Field("India", description="Job location")
+    max_results: int = Field(30, ge=1, le=500, description="Maximum number of jobs")
+    engine: str = Field("keyword", description="Scoring engine: 'keyword' or 'tfidf'")
+    must_have: Optional[str] = Field(None, description="Comma-separated skills every job must list")
+    limit: int = Field(15, ge=1, le=100, description="Jobs per page")
+
+
+async def run_search(task: SearchTask, report) -> dict:
+    """Scrape and rank one queued search; the result is the /api/match response"""
+    params = task.params
+    skills, location, engine = params["skills"], params["location"], params["engine"]
+    required = parse_must_have(params["must_have"])
+    query_key = match_query_key(skills, location, params["max_results"], engine, required)
+    
+    results = await cached_results(query_key)
+    if results is None:
+        report("scraping", 0.1)
+        # Queued searches scrape at prefetch priority and wait out overloads
+        while True:
+            try:
+                all_jobs = await fetch_jobs(skills, location, params["max_results"], priority=PREFETCH)
+                break
+            except Rejected as e:
+                report("waiting", 0.05)
+                await asyncio.sleep(e.retry_after)
+                report("scraping", 0.1)
+        # Unranked jobs so far, in the list view
+        report("ranking", 0.8, partial={
+            "jobs_found": len(all_jobs),
+            "jobs": project_jobs(all_jobs[:params["limit"]], parse_fields("list"))
+        })
+        results = await rank_matches(query_key, all_jobs, skills, location, engine, required)
+    return match_payload(results, skills, params["limit"])
+
+
+# Searches run by a fixed number of workers (concurrent scrapes); SEARCH_QUEUE_PATH
+# keeps queued searches in SQLite across restarts
+search_queue = SearchQueue(
+    run_search,
+    workers=int(os.environ.get("SEARCH_WORKERS", "2")),
+    max_queued=int(os.environ.get("SEARCH_QUEUE_SIZE", "1000")),
+    store=SqliteTaskStore(os.environ["SEARCH_QUEUE_PATH"]) if os.environ.get("SEARCH_QUEUE_PATH") else None
+)
+
+
+@app.post("/api/searches", status_code=202)
+async def create_search(search: SearchRequest):
+    """
+    Queue a scrape-and-rank search and return its id immediately
+    Poll /api/searches/{id} or follow /api/searches/{id}/progress for the result
+    """
+    if search.engine not in SCORERS:
+        return FastJSONResponse(status_code=400, content={
+            "error": f"Unknown scoring engine '{search.engine}'. Use one of: {', '.join(SCORERS)}"
+        })
+    try:
+        task = await search_queue.submit(dict(search))
+    except QueueFull as e:
+        return FastJSONResponse(status_code=503, headers={"Retry-After": "30"}, content={"error": str(e)})
+    
+    return {
+        "search_id": task.id,
+        "status": task.status,
+        "queue_depth": search_queue.depth,
+        "status_url": f"/api/searches/{task.id}",
+        "progress_url": f"/api/searches/{task.id}/progress"
+    }
+
+@app.get("/api/searches/{search_id}")
+async def get_search(search_id: str):
+    """Status of a queued search, with partial results while running and the result when done"""
+    task = await search_queue.get(search_id)
+    if task is None:
+        return FastJSONResponse(status_code=404, content={"error": "Unknown or expired search id"})
+    return task.snapshot()
+
+@app.websocket("/api/searches/{search_id}/progress")
+async def search_progress(websocket: WebSocket, search_id: str):
+    """Push the search's state on every update until it finishes"""
+    await websocket.accept()
+    task = await search_queue.get(search_id)
+    if task is None:
+        await websocket.send_json({"error": "Unknown or expired search id"})
+        await websocket.close(code=4404)
+        return
+    
+    # Searches run by another worker are followed through the queue's store
+    states = search_queue.watch(task)
+    try:
+        async for state in states:
+            await websocket.send_json(state)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await states.aclose()
+
 @app.get("/api/jobs")
+@conditional_json("total")
 async def get_jobs(
     skills: str = Query(..., description="Search keywords"),
     location: str = Query("India", description="Job location"),
     max_results: int = Query(50, description="Maximum results"),
     remote: bool = Query(False, description="Filter for remote jobs"),
-    entry_level: bool = Query(False, description="Filter for entry-level positions")
+    entry_level: bool = Query(False, description="Filter for entry-level positions"),
+    limit: int = Query(50, ge=1, le=200, description="Jobs per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response")
 ):
     """
     Get all jobs with optional filters
     Returns real LinkedIn job listings
     """
+    if cursor:
+        results, offset, error = await results_for_cursor(cursor, "jobs")
+        if error:
+            return error
+        return {
+            "jobs": results.page(offset, limit),
+            "total": len(results),
+            "next_cursor": results.next_cursor(offset, limit),
+            **results.meta["response"]
+        }
+    
     if not skills:
         return {"jobs": [], "total": 0, "error": "Keywords required"}
     
     try:
+        query_key = ("jobs", skills, location, max_results, remote, entry_level)
+        results = await cached_results(query_key)
+        if results is not None:
+            return {
+                "jobs": results.page(0, limit),
+                "total": len(results),
+                "next_cursor": results.next_cursor(0, limit),
+                **results.meta["response"]
+            }
+        
         logger.info(f"Fetching LinkedIn jobs for: '{skills}'")
         
         # Fetch all jobs
-        # Fetch all jobs
-        jobs = await job_scraper.get_all_jobs(skills, location, max_results)
+        jobs = await fetch_jobs(skills, location, max_results)
         logger.info(f"Found {len(jobs)} jobs before filtering")
         
         # Apply filters
@@ -200,29 +615,81 @@ async def get_jobs(
         
         logger.info(f"Returning {len(filtered_jobs)} filtered jobs")
         
+        results = RankedResults(filtered_jobs, meta={
+            "endpoint": "jobs",
+            "response": {
+                "filters_applied": {
+                    "remote": remote,
+                    "entry_level": entry_level
+                },
+                "source": "LinkedIn"
+            }
+        })
+        if jobs:
+            await remember_results(query_key, results)
+        
         return {
-            "jobs": filtered_jobs,
-            "total": len(filtered_jobs),
-            "filters_applied": {
-                "remote": remote,
-                "entry_level": entry_level
-            },
-            "source": "LinkedIn"
+            "jobs": results.page(0, limit),
+            "total": len(results),
+            "next_cursor": results.next_cursor(0, limit),
+            **results.meta["response"]
         }
         
+    except Rejected as e:
+        return overloaded(e)
     except Exception as e:
         logger.error(f"Error fetching jobs: {str(e)}")
         return {"jobs": [], "total": 0, "error": str(e)}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    # Cache collectors read shared backends, which block
+    return Response(await asyncio.to_thread(REGISTRY.render), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/api/stats")
 async def get_stats():
-    """Get system statistics"""
+    """Get system statistics, read from the same registry as /metrics"""
     try:
+        # Shared cache backends block; read them off the event loop
+        caches, cached_jobs = await asyncio.to_thread(lambda: (cache_stats(), count_cached_jobs()))
+        requests = api_requests.values()
+        routes = {}
+        for (route, method), _ in sorted(api_latency.series().items()):
+            summary = api_latency.summary((route, method))
+            routes[f"{method} {route}"] = {
+                "requests": summary["count"],
+                "mean_seconds": round(summary["mean"], 4),
+                "p95_seconds": round(summary["p95"], 4)
+            }
+        workers = search_queue.workers
         return {
             "system_status": "operational",
             "api_version": "3.0",
             "job_sources": ["LinkedIn"],
-            "active_jobs_estimate": 100000,
+            "active_jobs_estimate": cached_jobs,
+            "jobs_scraped_per_source": {source: int(n) for (source,), n in jobs_scraped_per_source.values().items()},
+            "scraper_error_rate": {source: round(rate, 4) for (source,), rate in scraper_error_rate.values().items()},
+            "requests": {
+                "total": int(sum(requests.values())),
+                "server_errors": int(sum(n for (_, _, status), n in requests.items() if status.startswith("5"))),
+                "p95_latency_seconds": round(api_latency.summary()["p95"], 4)
+            },
+            "routes": routes,
+            "cache_hit_ratio": {name: round(hit_ratio(s[0], s[1]), 4) for name, s in caches.items()},
+            "search_queue": {
+                "depth": search_queue.depth,
+                "workers": workers,
+                "busy": search_queue.running,
+                "utilisation": round(search_queue.running / workers, 4) if workers else 0.0
+            },
+            "browsers_active": int(browsers_active.total()),
+            "scrape_admission": {
+                "slots": scrape_admission.max_concurrent,
+                "in_use": scrape_admission.active,
+                "waiting": {p: scrape_admission.waiting(p) for p in PRIORITIES},
+                "rejected": {f"{p}/{reason}": int(n) for (p, reason), n in admission_rejections.values().items()}
+            },
             "features": [
                 "Real-time LinkedIn job search",
                 "Working application links",
@@ -242,30 +709,49 @@ async def get_stats():
         }
 
 @app.get("/api/search")
+@conditional_json("total_results")
 async def search_jobs(
     query: str = Query(..., description="Job search keywords"),
     location: str = Query("India", description="Job location"),
-    max_results: int = Query(50, description="Maximum results")
+    max_results: int = Query(50, description="Maximum results"),
+    limit: int = Query(50, ge=1, le=200, description="Jobs per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous response")
 ):
     """
     General job search endpoint
     Returns comprehensive LinkedIn job data
     """
+    offset = 0
+    if cursor:
+        results, offset, error = await results_for_cursor(cursor, "search")
+        if error:
+            return error
+    
     try:
-        logger.info(f"Job search: '{query}' in '{location}'")
-        
-        jobs = await job_scraper.get_all_jobs(query, location, max_results)
+        if not cursor:
+            query_key = ("search", query, location, max_results)
+            results = await cached_results(query_key)
+            if results is None:
+                logger.info(f"Job search: '{query}' in '{location}'")
+                
+                jobs = await fetch_jobs(query, location, max_results)
+                results = RankedResults(jobs, meta={"endpoint": "search"})
+                if jobs:
+                    await remember_results(query_key, results)
         
         return {
             "status": "success",
             "query": query,
             "location": location,
-            "total_results": len(jobs),
-            "jobs": jobs,
-            "message": f"Found {len(jobs)} LinkedIn job openings",
+            "total_results": len(results),
+            "jobs": results.page(offset, limit),
+            "next_cursor": results.next_cursor(offset, limit),
+            "message": f"Found {len(results)} LinkedIn job openings",
             "source": "LinkedIn"
         }
         
+    except Rejected as e:
+        return overloaded(e)
     except Exception as e:
         logger.error(f"Error searching jobs: {str(e)}")
         return {
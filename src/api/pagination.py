@@ -0,0 +1,93 @@
+"""
+Ranked result sets with stable cursor pagination
+A result set is ranked once; every page is served from it
+"""
+
+import base64
+import json
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.matcher.ranking import top_k_indices
+from src.scraper.job_record import JobRecord, job_to_dict
+
+
+class RankedResults:
+    """Jobs for one query, ordered by score (or kept in scrape order without scores)
+
+    The order is selected lazily with partial top-k selection, growing as
+    deeper pages are requested; ties keep scrape order so pages are stable.
+    """
+
+    def __init__(self, jobs: List[Dict], scores: Optional[Sequence] = None,
+                 score_field: str = "match_percentage", meta: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex[:16]
+        self.jobs = jobs
+        self.scores = list(scores) if scores is not None else None
+        self.score_field = score_field
+        self.meta = meta or {}
+        self._order = []
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def to_dict(self) -> Dict:
+        """JSON-ready state for shared caches; the rank order is recomputed after loading"""
+        return {
+            "id": self.id,
+            "jobs": [job_to_dict(job) for job in self.jobs],
+            # NumPy scalars to plain numbers
+            "scores": None if self.scores is None else [
+                score.item() if hasattr(score, "item") else score for score in self.scores
+            ],
+            "score_field": self.score_field,
+            "meta": self.meta,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RankedResults":
+        results = cls([JobRecord.from_dict(job) for job in state["jobs"]], state["scores"],
+                      state["score_field"], state["meta"])
+        results.id = state["id"]
+        return results
+
+    def _ranked_prefix(self, end: int):
+        if len(self._order) < end:
+            # Grow geometrically so paging through n jobs costs O(n log n) overall
+            self._order = top_k_indices(self.scores, max(end, 2 * len(self._order))).tolist()
+        return self._order[:end]
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """Jobs at [offset, offset + limit) in rank order as new dicts, with their score if scored"""
+        end = min(offset + limit, len(self.jobs))
+        if offset >= end:
+            return []
+        if self.scores is None:
+            return [job_to_dict(job) for job in self.jobs[offset:end]]
+        page = []
+        for i in self._ranked_prefix(end)[offset:end]:
+            job = job_to_dict(self.jobs[i])
+            job[self.score_field] = self.scores[i]
+            page.append(job)
+        return page
+
+    def next_cursor(self, offset: int, limit: int) -> Optional[str]:
+        end = offset + limit
+        return encode_cursor(self.id, end) if end < len(self.jobs) else None
+
+
+def encode_cursor(result_id: str, offset: int) -> str:
+    raw = json.dumps([result_id, offset], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a cursor into (result id, offset); raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        result_id, offset = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(result_id, str) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return result_id, offset
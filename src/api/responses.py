@@ -0,0 +1,121 @@
+"""
+Response encoding for the JSON endpoints
+orjson when it is installed, negotiated gzip/brotli compression and
+projection of job lists down to the requested fields
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this gain less from compression than it costs
+COMPRESS_MIN_BYTES = 1024
+
+# Payload keys holding job lists
+JOB_LISTS = ("matched_jobs", "recommended_jobs", "jobs")
+
+# Shorthand field names accepted by fields=
+FIELD_ALIASES = {"link": ("apply_link",), "score": ("match_percentage",)}
+
+# Named projections; the list view is what a results list renders
+FIELD_SETS = {"list": ("title", "company", "location", "link", "score")}
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def encode_json(payload: Any) -> bytes:
+        """Compact UTF-8 JSON, the same bytes as Starlette's JSONResponse for API payloads"""
+        return orjson.dumps(payload, option=_ORJSON_OPTIONS)
+else:
+    def encode_json(payload: Any) -> bytes:
+        """Compact UTF-8 JSON, the same bytes as Starlette's JSONResponse for API payloads"""
+        return json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with encode_json"""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred content coding from an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # Moderate quality; bodies are compressed once and then cached
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Job keys to keep for a fields= value, or None to keep every key
+
+    Accepts comma-separated field names, the shorthands in FIELD_ALIASES
+    and the named sets in FIELD_SETS.
+    """
+    if not fields:
+        return None
+    keys: List[str] = []
+    for name in fields.split(","):
+        name = name.strip()
+        for field in FIELD_SETS.get(name, (name,)):
+            for key in FIELD_ALIASES.get(field, (field,)):
+                if key and key not in keys:
+                    keys.append(key)
+    return tuple(keys) or None
+
+
+def project_jobs(jobs: Iterable[Dict], keys: Tuple[str, ...]) -> List[Dict]:
+    return [{key: job[key] for key in keys if key in job} for job in jobs]
+
+
+def project_payload(payload: Dict, keys: Optional[Tuple[str, ...]]) -> Dict:
+    """payload with its job lists reduced to keys; other entries are kept"""
+    if keys is None:
+        return payload
+    projected = dict(payload)
+    for name in JOB_LISTS:
+        if isinstance(projected.get(name), list):
+            projected[name] = project_jobs(projected[name], keys)
+    return projected
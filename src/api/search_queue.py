@@ -0,0 +1,378 @@
+"""
+Background search tasks for the asynchronous searches API
+Searches are queued and run by a fixed number of asyncio workers, so the
+number of concurrent scrapes (browsers) stays bounded however many
+searches are accepted. Tasks can be persisted to SQLite so queued
+searches survive a restart; store writes run on a writer thread, never on
+the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED = (COMPLETED, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised by submit() when max_queued searches are already waiting"""
+
+
+class SearchTask:
+    """One search: its parameters, status, progress and result"""
+
+    __slots__ = ("id", "params", "status", "stage", "progress", "partial", "result",
+                 "error", "created_at", "updated_at")
+
+    def __init__(self, params: Dict, task_id: Optional[str] = None):
+        self.id = task_id or uuid.uuid4().hex[:16]
+        self.params = params
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.partial: Optional[Dict] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = self.updated_at = time.time()
+
+    def snapshot(self, include_result: bool = True) -> Dict:
+        """JSON-ready state; the result (or partial result) only when include_result"""
+        state = {
+            "search_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "params": self.params,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.error:
+            state["error"] = self.error
+        if include_result:
+            if self.result is not None:
+                state["result"] = self.result
+            elif self.partial is not None:
+                state["partial"] = self.partial
+        return state
+
+
+class SqliteTaskStore:
+    """Search tasks persisted in a local SQLite file
+
+    Args:
+        path: Database file; created if missing
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.open()
+
+    def open(self) -> None:
+        """Connect, creating the table if needed; does nothing while open"""
+        with self._lock:
+            if self._conn is not None:
+                return
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS searches ("
+                    "id TEXT PRIMARY KEY, state TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS searches_status ON searches (status, created_at)")
+
+    @staticmethod
+    def row(task: SearchTask) -> Tuple:
+        """The task's row as of now, for write()"""
+        state = json.dumps({**task.snapshot(), "partial": task.partial}, default=str)
+        return task.id, state, task.status, task.created_at
+
+    def write(self, row: Tuple) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (id, state, status, created_at) VALUES (?, ?, ?, ?)", row
+            )
+
+    def save(self, task: SearchTask) -> None:
+        self.write(self.row(task))
+
+    def prune(self, keep: int) -> int:
+        """Delete all but the keep newest finished tasks; returns the number deleted"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM searches WHERE status IN (?, ?) AND id NOT IN ("
+                "SELECT id FROM searches WHERE status IN (?, ?) ORDER BY created_at DESC LIMIT ?)",
+                (*FINISHED, *FINISHED, keep)
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _task(state: str) -> SearchTask:
+        state = json.loads(state)
+        task = SearchTask(state["params"], state["search_id"])
+        task.status = state["status"]
+        task.stage = state["stage"]
+        task.progress = state["progress"]
+        task.partial = state.get("partial")
+        task.result = state.get("result")
+        task.error = state.get("error")
+        task.created_at = state["created_at"]
+        task.updated_at = state["updated_at"]
+        return task
+
+    def load(self, task_id: str) -> Optional[SearchTask]:
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM searches WHERE id = ?", (task_id,)).fetchone()
+        return self._task(row[0]) if row else None
+
+    def unfinished(self) -> List[SearchTask]:
+        """Queued and interrupted tasks, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state FROM searches WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._task(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """Disconnect; open() connects again"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SearchQueue:
+    """Bounded pool of asyncio workers running queued search tasks
+
+    run(task, report) performs one search and returns its result;
+    report(stage, progress, partial=None) updates the task and notifies
+    progress subscribers. Finished tasks stay readable until max_finished
+    newer ones have completed (and in the store, when there is one, which
+    is pruned to max_finished finished tasks every prune_every completions).
+
+    Args:
+        run: Coroutine function running one task
+        workers: Searches run at the same time
+        max_queued: Waiting searches beyond which submit() raises QueueFull
+        max_finished: Finished tasks kept in memory
+        store: Optional SqliteTaskStore making the queue persistent
+        prune_every: Completed tasks between prunes of the store
+    """
+
+    def __init__(self, run: Callable[[SearchTask, Callable], Awaitable[Dict]], workers: int = 2,
+                 max_queued: int = 1000, max_finished: int = 10000,
+                 store: Optional[SqliteTaskStore] = None, prune_every: int = 100):
+        self.run = run
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.store = store
+        self.prune_every = prune_every
+        # One thread applies store writes in the order they were made
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._until_prune = 0
+        self.tasks: Dict[str, SearchTask] = {}
+        self._finished = OrderedDict()
+        self._pending: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.running = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        """Searches waiting for a worker"""
+        return self._pending.qsize() if self._pending is not None else 0
+
+    async def start(self) -> None:
+        """Start the workers and requeue tasks a previous process (or run) left unfinished
+
+        A stopped queue can be started again, e.g. by the next lifespan of
+        the same app; the store is reopened.
+        """
+        if self.started:
+            return
+        self._pending = asyncio.Queue()
+        if self.store is None:
+            # Left queued in memory by an earlier stop()
+            for task in self.tasks.values():
+                if task.status == QUEUED:
+                    self._pending.put_nowait(task)
+        else:
+            await asyncio.to_thread(self.store.open)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-store")
+            self._prune()
+            recovered = await asyncio.to_thread(self.store.unfinished)
+            for task in recovered:
+                task.status = task.stage = QUEUED
+                self.tasks[task.id] = task
+                self._pending.put_nowait(task)
+            if recovered:
+                logger.info(f"Requeued {len(recovered)} unfinished searches")
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and close the store; interrupted searches stay queued"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._writer is not None:
+            # Let the interrupted searches' writes land before closing the store
+            await asyncio.to_thread(self._writer.shutdown)
+            self._writer = None
+        if self.store is not None:
+            self.store.close()
+
+    async def submit(self, params: Dict) -> SearchTask:
+        if not self.started:
+            await self.start()
+        if self.depth >= self.max_queued:
+            raise QueueFull(f"{self.depth} searches are already queued")
+        task = SearchTask(params)
+        self.tasks[task.id] = task
+        self._save(task)
+        self._pending.put_nowait(task)
+        return task
+
+    async def get(self, task_id: str) -> Optional[SearchTask]:
+        """The task, from memory or else the store (e.g. one run by another process)"""
+        task = self.tasks.get(task_id)
+        if task is None and self.store is not None:
+            task = await asyncio.to_thread(self.store.load, task_id)
+        return task
+
+    async def watch(self, task: SearchTask, poll: float = 1.0) -> AsyncIterator[Dict]:
+        """The task's state without results, now and on every update until it finishes
+
+        Tasks this queue doesn't hold were loaded from the store, so nothing
+        here will report their updates; their status is polled from the
+        store every poll seconds instead.
+        """
+        if task.id in self.tasks:
+            # Subscribe before the first snapshot so no update is missed
+            events = self.subscribe(task.id)
+            try:
+                state = task.snapshot(include_result=False)
+                yield state
+                while state["status"] not in FINISHED:
+                    state = await events.get()
+                    yield state
+            finally:
+                self.unsubscribe(task.id, events)
+            return
+
+        state = task.snapshot(include_result=False)
+        yield state
+        while state["status"] not in FINISHED:
+            await asyncio.sleep(poll)
+            task = await self.get(task.id)
+            if task is None:
+                # Pruned
+                return
+            current = task.snapshot(include_result=False)
+            if current != state:
+                state = current
+                yield state
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """Queue receiving the task's state (without results) on every update"""
+        events = asyncio.Queue()
+        self._subscribers.setdefault(task_id, []).append(events)
+        return events
+
+    def unsubscribe(self, task_id: str, events: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(task_id, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            self._subscribers.pop(task_id, None)
+
+    def update(self, task: SearchTask, **changes: Any) -> None:
+        for name, value in changes.items():
+            setattr(task, name, value)
+        task.updated_at = time.time()
+        # Progress-only updates aren't worth a write
+        if "status" in changes:
+            self._save(task)
+        event = task.snapshot(include_result=False)
+        for events in self._subscribers.get(task.id, []):
+            events.put_nowait(event)
+
+    def _save(self, task: SearchTask) -> None:
+        if self._writer is not None:
+            # Serialised now, while the task is consistent; written on the writer thread
+            self._writer.submit(self._write, self.store.row(task))
+
+    def _write(self, row: Tuple) -> None:
+        try:
+            self.store.write(row)
+        except sqlite3.Error as e:
+            logger.error(f"Error saving search {row[0]}: {str(e)}")
+
+    def _prune(self) -> None:
+        self._until_prune = self.prune_every
+        self._writer.submit(self._prune_store)
+
+    def _prune_store(self) -> None:
+        try:
+            pruned = self.store.prune(self.max_finished)
+            if pruned:
+                logger.info(f"Pruned {pruned} finished searches from the store")
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning searches: {str(e)}")
+
+    async def _work(self) -> None:
+        while True:
+            task = await self._pending.get()
+            self.running += 1
+            try:
+                self.update(task, status=RUNNING, stage=RUNNING)
+
+                def report(stage: str, progress: float, partial: Optional[Dict] = None, task=task):
+                    changes = {"stage": stage, "progress": progress}
+                    if partial is not None:
+                        changes["partial"] = partial
+                    self.update(task, **changes)
+
+                result = await self.run(task, report)
+                self.update(task, status=COMPLETED, stage=COMPLETED, progress=1.0, result=result, partial=None)
+            except asyncio.CancelledError:
+                # Shutting down; a persistent queue picks the search up on the next start
+                task.status = task.stage = QUEUED
+                self._save(task)
+                raise
+            except Exception as e:
+                logger.error(f"Error running search {task.id}: {str(e)}")
+                self.update(task, status=FAILED, stage=FAILED, error=str(e))
+            finally:
+                self.running -= 1
+            self._retire(task)
+
+    def _retire(self, task: SearchTask) -> None:
+        self._finished[task.id] = task
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            self.tasks.pop(old_id, None)
+        if self._writer is not None:
+            self._until_prune -= 1
+            if self._until_prune <= 0:
+                self._prune()
@@ -0,0 +1,573 @@
+"""
+Cache backends shared by several worker processes or containers
+SqliteCache keeps entries in a database file for the workers on one host;
+RedisCache keeps them in Redis (or any server speaking its protocol) for
+every host. Both have the TTLCache interface and its TTL + LRU semantics,
+plus leases so that only one worker computes a missing entry. Their calls
+block on disk or network I/O, so the event loop uses the *_async methods,
+which run them in a thread. make_cache() picks the backend from CACHE_URL.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+from urllib.parse import unquote, urlparse, urlsplit
+
+from src.api.cache import CacheLock, TTLCache
+from src.api.responses import encode_json
+
+logger = logging.getLogger(__name__)
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes], Any]
+
+
+def encode_key(key: Hashable) -> str:
+    """Stable text for a cache key made of tuples, strings and numbers"""
+    return json.dumps(key, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class SharedCache:
+    """Base for caches kept outside the process
+
+    Keys are encoded as text and values with dumps/loads (JSON by default).
+    When the backend fails, lookups count as misses, writes are dropped
+    and leases are granted, so the API keeps working on its own. hits and
+    misses count this process's lookups.
+
+    Args:
+        namespace: Name separating this cache's entries from other caches'
+        max_entries: Entries kept before the least recently used are evicted
+        ttl: Default seconds an entry lives
+        dumps: Value to bytes
+        loads: Bytes to value
+    """
+
+    errors: tuple = ()
+
+    def __init__(self, namespace: str, max_entries: int = 256, ttl: float = 600.0,
+                 dumps: Optional[Dumps] = None, loads: Optional[Loads] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dumps = dumps or encode_json
+        self.loads = loads or json.loads
+        self.hits = 0
+        self.misses = 0
+
+    def _failed(self, action: str, error: Exception) -> None:
+        logger.error(f"Error {action} {self.namespace} cache: {str(error)}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            data = self._get(encode_key(key), time.time())
+        except self.errors as e:
+            self._failed("reading", e)
+            data = None
+        if data is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self.loads(data)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            self._set(encode_key(key), self.dumps(value), self.ttl if ttl is None else ttl, time.time())
+        except self.errors as e:
+            self._failed("writing", e)
+
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def set_async(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self._delete(encode_key(key))
+        except self.errors as e:
+            self._failed("deleting from", e)
+
+    def clear(self) -> None:
+        try:
+            self._clear()
+        except self.errors as e:
+            self._failed("clearing", e)
+
+    def values(self) -> list:
+        """Values of the entries that haven't expired"""
+        try:
+            return [self.loads(data) for data in self._values(time.time())]
+        except self.errors as e:
+            self._failed("reading", e)
+            return []
+
+    def lock(self, name: Hashable, lease: float = 120.0) -> CacheLock:
+        """Lease on name among every worker using this cache"""
+        return _SharedLock(self, name, lease)
+
+    def __len__(self):
+        try:
+            return self._len(time.time())
+        except self.errors as e:
+            self._failed("counting", e)
+            return 0
+
+    # Backend operations; keys are encoded, times are wall-clock seconds
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set(self, key: str, data: bytes, ttl: float, now: float) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def _values(self, now: float) -> List[bytes]:
+        raise NotImplementedError
+
+    def _len(self, now: float) -> int:
+        raise NotImplementedError
+
+    def _try_lock(self, name: str, token: str, lease: float) -> bool:
+        raise NotImplementedError
+
+    def _renew_lock(self, name: str, token: str, lease: float) -> bool:
+        raise NotImplementedError
+
+    def _unlock(self, name: str, token: str) -> None:
+        raise NotImplementedError
+
+
+class _SharedLock(CacheLock):
+    def __init__(self, cache: SharedCache, name: Hashable, lease: float):
+        super().__init__(name, lease)
+        self._cache = cache
+        self._key = encode_key(name)
+
+    def try_acquire(self) -> bool:
+        try:
+            return self._cache._try_lock(self._key, self.token, self.lease)
+        except self._cache.errors as e:
+            # Without the backend, duplicate work beats waiting forever
+            self._cache._failed("locking", e)
+            return True
+
+    def renew(self) -> bool:
+        try:
+            return self._cache._renew_lock(self._key, self.token, self.lease)
+        except self._cache.errors as e:
+            # As in try_acquire(): without the backend the lease counts as held
+            self._cache._failed("renewing", e)
+            return True
+
+    def release(self) -> None:
+        try:
+            self._cache._unlock(self._key, self.token)
+        except self._cache.errors as e:
+            self._cache._failed("unlocking", e)
+
+    async def try_acquire_async(self) -> bool:
+        attempt = asyncio.ensure_future(asyncio.to_thread(self.try_acquire))
+        try:
+            return await asyncio.shield(attempt)
+        except asyncio.CancelledError:
+            # The thread may still take the lease; give it back rather than leave it to expire
+            attempt.add_done_callback(self._release_if_acquired)
+            raise
+
+    async def renew_async(self) -> bool:
+        return await asyncio.to_thread(self.renew)
+
+    def _release_if_acquired(self, attempt: asyncio.Future) -> None:
+        if not attempt.cancelled() and attempt.exception() is None and attempt.result():
+            asyncio.ensure_future(self.release_async())
+
+    async def release_async(self) -> None:
+        await asyncio.to_thread(self.release)
+
+
+class SqliteCache(SharedCache):
+    """Cache in a SQLite file shared by the worker processes on one host
+
+    Each cache is a namespace in the file, so several caches can share it.
+
+    Args:
+        path: Database file; created if missing
+        namespace, max_entries, ttl, dumps, loads: As for SharedCache
+    """
+
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 256, ttl: float = 600.0,
+                 dumps: Optional[Dumps] = None, loads: Optional[Loads] = None):
+        super().__init__(namespace, max_entries, ttl, dumps, loads)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_locks ("
+                "namespace TEXT NOT NULL, name TEXT NOT NULL, token TEXT NOT NULL, expires REAL NOT NULL, "
+                "PRIMARY KEY (namespace, name))"
+            )
+
+    def _get(self, key, now):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+            return row[0]
+
+    def _set(self, key, data, ttl, now):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, data, now + ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires < ?", (self.namespace, now)
+            )
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN (SELECT rowid FROM cache_entries "
+                    "WHERE namespace = ? ORDER BY accessed LIMIT ?)",
+                    (self.namespace, count - self.max_entries)
+                )
+
+    def _delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+
+    def _clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def _values(self, now):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND expires >= ?", (self.namespace, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _len(self, now):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires >= ?", (self.namespace, now)
+            ).fetchone()[0]
+
+    def _try_lock(self, name, token, lease):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache_locks WHERE namespace = ? AND name = ? AND expires < ?",
+                (self.namespace, name, now)
+            )
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO cache_locks (namespace, name, token, expires) VALUES (?, ?, ?, ?)",
+                (self.namespace, name, token, now + lease)
+            ).rowcount
+        return inserted == 1
+
+    def _renew_lock(self, name, token, lease):
+        now = time.time()
+        with self._lock, self._conn:
+            renewed = self._conn.execute(
+                "UPDATE cache_locks SET expires = ? WHERE namespace = ? AND name = ? AND token = ? AND expires >= ?",
+                (now + lease, self.namespace, name, token, now)
+            ).rowcount
+        return renewed == 1
+
+    def _unlock(self, name, token):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM cache_locks WHERE namespace = ? AND name = ? AND token = ?",
+                (self.namespace, name, token)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RespClient:
+    """Minimal blocking client for the Redis serialisation protocol (RESP2)
+
+    Enough for the caches: single commands and pipelines over one
+    connection, reconnecting once after a connection failure. Thread safe.
+    Calls block, which is fine for a server on the same network.
+
+    Args:
+        host: Server host
+        port: Server port
+        db: Database number selected on connect
+        password: Sent with AUTH on connect
+        username: ACL user for AUTH, if any
+        timeout: Seconds for connecting and for each reply
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, username: Optional[str] = None, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespClient":
+        """Client for redis://[[username]:password@]host[:port][/db]"""
+        parsed = urlparse(url)
+        return cls(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None
+        )
+
+    @staticmethod
+    def _encode(args: Sequence) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, float):
+                data = repr(arg).encode()
+            else:
+                data = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            return RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply {line[:32]!r}")
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            self._sock.sendall(b"".join(self._encode(command) for command in setup))
+            for reply in [self._read() for _ in setup]:
+                if isinstance(reply, RespError):
+                    raise reply
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def pipeline(self, commands: Sequence[Sequence]) -> List:
+        """Send the commands in one write and return their replies; error replies are RespError instances"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(b"".join(self._encode(command) for command in commands))
+                    return [self._read() for _ in commands]
+                except (OSError, RespError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def execute(self, *args):
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+
+_UNLOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+_RENEW_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end return 0"
+)
+
+
+class RedisCache(SharedCache):
+    """Cache in Redis shared by every worker on every host
+
+    Entries are plain keys expiring on their own; two sorted sets per
+    namespace track last access (for LRU eviction) and expiry.
+
+    Args:
+        client: RespClient for the server
+        namespace, max_entries, ttl, dumps, loads: As for SharedCache
+        prefix: Prefix of every key this cache writes
+    """
+
+    errors = (OSError, RespError)
+
+    def __init__(self, client: RespClient, namespace: str, max_entries: int = 256, ttl: float = 600.0,
+                 dumps: Optional[Dumps] = None, loads: Optional[Loads] = None, prefix: str = "risegen"):
+        super().__init__(namespace, max_entries, ttl, dumps, loads)
+        self.client = client
+        self._prefix = f"{prefix}:{namespace}:"
+        self._lru = self._prefix + "@lru"
+        self._expiry = self._prefix + "@expires"
+
+    def _pipeline(self, *commands) -> List:
+        replies = self.client.pipeline(commands)
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def _forget(self, keys: List) -> None:
+        if keys:
+            self._pipeline(("DEL", *keys), ("ZREM", self._lru, *keys), ("ZREM", self._expiry, *keys))
+
+    def _get(self, key, now):
+        key = self._prefix + key
+        data, _ = self._pipeline(("GET", key), ("ZADD", self._lru, "XX", now, key))
+        return data
+
+    def _set(self, key, data, ttl, now):
+        key = self._prefix + key
+        _, _, _, expired, count = self._pipeline(
+            ("SET", key, data, "PX", max(1, int(ttl * 1000))),
+            ("ZADD", self._lru, now, key),
+            ("ZADD", self._expiry, now + ttl, key),
+            ("ZRANGEBYSCORE", self._expiry, "-inf", f"({now}"),
+            ("ZCARD", self._lru)
+        )
+        self._forget(expired)
+        excess = count - len(expired) - self.max_entries
+        if excess > 0:
+            self._forget(self.client.execute("ZRANGE", self._lru, 0, excess - 1))
+
+    def _delete(self, key):
+        self._forget([self._prefix + key])
+
+    def _clear(self):
+        self._forget(self.client.execute("ZRANGE", self._lru, 0, -1))
+        self._pipeline(("DEL", self._lru, self._expiry))
+
+    def _values(self, now):
+        keys = self.client.execute("ZRANGEBYSCORE", self._expiry, now, "+inf")
+        if not keys:
+            return []
+        return [data for data in self.client.execute("MGET", *keys) if data is not None]
+
+    def _len(self, now):
+        return self.client.execute("ZCOUNT", self._expiry, now, "+inf")
+
+    def _try_lock(self, name, token, lease):
+        key = self._prefix + "@lock:" + name
+        return self.client.execute("SET", key, token, "NX", "PX", max(1, int(lease * 1000))) == b"OK"
+
+    def _renew_lock(self, name, token, lease):
+        key = self._prefix + "@lock:" + name
+        return self.client.execute("EVAL", _RENEW_SCRIPT, 1, key, token, max(1, int(lease * 1000))) == 1
+
+    def _unlock(self, name, token):
+        self.client.execute("EVAL", _UNLOCK_SCRIPT, 1, self._prefix + "@lock:" + name, token)
+
+
+# One connection per Redis URL, shared by the caches using it
+_clients: Dict[str, RespClient] = {}
+
+
+def make_cache(namespace: str, max_entries: int = 256, ttl: float = 600.0,
+               dumps: Optional[Dumps] = None, loads: Optional[Loads] = None, url: Optional[str] = None):
+    """The cache backend named by url (CACHE_URL by default)
+
+    memory:// or nothing keeps entries in the process (TTLCache, which
+    stores values as they are); sqlite:///path/cache.db, with an absolute
+    path, shares them between the workers on one host;
+    redis://[:password@]host[:port][/db] between every host.
+
+    Raises:
+        ValueError: The URL scheme isn't one of these, or a sqlite URL has no absolute path
+    """
+    url = os.environ.get("CACHE_URL", "") if url is None else url
+    parsed = urlsplit(url)
+    scheme = parsed.scheme
+    if scheme in ("", "memory"):
+        return TTLCache(max_entries=max_entries, ttl=ttl)
+    if scheme == "sqlite":
+        # sqlite://cache.db would otherwise be a path relative to wherever the worker started
+        if parsed.netloc or not parsed.path.startswith("/"):
+            raise ValueError(f"Invalid sqlite CACHE_URL '{url}'; use sqlite:///absolute/path/cache.db")
+        return SqliteCache(unquote(parsed.path), namespace, max_entries, ttl, dumps, loads)
+    if scheme == "redis":
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = RespClient.from_url(url)
+        return RedisCache(client, namespace, max_entries, ttl, dumps, loads)
+    raise ValueError(f"Unsupported CACHE_URL scheme '{scheme}'; use memory://, sqlite:// or redis://")
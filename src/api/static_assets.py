@@ -0,0 +1,127 @@
+"""
+In-memory web UI assets with precompressed variants and fingerprinted URLs
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from src.api.http_cache import etag_matches
+from src.api.responses import brotli, negotiate_encoding
+
+# Fingerprinted URLs never change content, so clients may keep them for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Pages and unversioned URLs are revalidated against their ETag
+REVALIDATE = "no-cache"
+
+# Only these files are served; the rest of web/ (serve.py) stays private
+ASSET_EXTENSIONS = {".html", ".js", ".css", ".svg", ".png", ".ico", ".json", ".txt", ".webmanifest"}
+COMPRESSIBLE = {".html", ".js", ".css", ".svg", ".json", ".txt", ".webmanifest"}
+
+_REFERENCE = re.compile(r'(?P<attr>\b(?:src|href)=")(?P<name>[^"/?#:]+)(?:\?[^"]*)?"')
+
+
+class Asset:
+    """One file held in memory with its ETag and compressed variants"""
+
+    __slots__ = ("body", "media_type", "etag", "fingerprint", "variants")
+
+    def __init__(self, name: str, body: bytes):
+        self.body = body
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        digest = hashlib.sha256(body).hexdigest()
+        self.fingerprint = digest[:12]
+        self.etag = '"' + digest[:24] + '"'
+        self.variants: Dict[str, bytes] = {}
+        if os.path.splitext(name)[1] in COMPRESSIBLE and len(body) >= 256:
+            # Compressed once at startup, so use the strongest settings
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+    def fingerprinted_name(self, name: str) -> str:
+        stem, extension = os.path.splitext(name)
+        return f"{stem}.{self.fingerprint}{extension}"
+
+
+class StaticAssets:
+    """The web UI's files keyed by exact URL path
+
+    Files are read once. Each asset is reachable at its plain name and at
+    a content-fingerprinted name (app.<hash>.js); index.html is rewritten
+    to reference the fingerprinted names, so those can be cached as
+    immutable while the page itself is revalidated.
+
+    Args:
+        directory: Directory holding index.html and its assets
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.routes: Dict[str, tuple] = {}
+        self.load()
+
+    def load(self) -> None:
+        assets = {}
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and os.path.splitext(name)[1] in ASSET_EXTENSIONS:
+                with open(path, "rb") as f:
+                    assets[name] = Asset(name, f.read())
+
+        # Pages reference the fingerprinted names of the other assets
+        urls = {name: asset.fingerprinted_name(name) for name, asset in assets.items()
+                if not name.endswith(".html")}
+        for name in [name for name in assets if name.endswith(".html")]:
+            html = assets[name].body.decode("utf-8")
+            html = _REFERENCE.sub(
+                lambda m: f'{m["attr"]}{urls[m["name"]]}"' if m["name"] in urls else m[0], html
+            )
+            assets[name] = Asset(name, html.encode("utf-8"))
+
+        routes = {}
+        for name, asset in assets.items():
+            routes[f"/{name}"] = (asset, REVALIDATE)
+            routes[f"/static/{name}"] = (asset, REVALIDATE)
+            if name in urls:
+                routes[f"/{urls[name]}"] = (asset, IMMUTABLE)
+                routes[f"/static/{urls[name]}"] = (asset, IMMUTABLE)
+        if "index.html" in assets:
+            routes["/"] = (assets["index.html"], REVALIDATE)
+        self.routes = routes
+
+    def url_for(self, name: str) -> Optional[str]:
+        """Fingerprinted URL of an asset"""
+        entry = self.routes.get(f"/{name}")
+        return f"/{entry[0].fingerprinted_name(name)}" if entry else None
+
+    def response(self, path: str, request: Request) -> Response:
+        asset, cache_control = self.routes[path]
+        body, etag = asset.body, asset.etag
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding in asset.variants:
+            body, etag = asset.variants[encoding], etag[:-1] + "-" + encoding + '"'
+
+        headers = {"Cache-Control": cache_control, "ETag": etag, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if body is not asset.body:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    def mount(self, app: FastAPI) -> None:
+        """Add one exact GET route per asset URL"""
+        for path in self.routes:
+            app.add_api_route(path, self._endpoint(path), methods=["GET"], include_in_schema=False)
+
+    def _endpoint(self, path: str):
+        async def serve_asset(request: Request) -> Response:
+            return self.response(path, request)
+
+        return serve_asset
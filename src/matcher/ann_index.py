@@ -0,0 +1,174 @@
+"""
+Approximate nearest-neighbour index for matching against large job corpora
+Inverted-file (IVF) index over randomly projected TF-IDF vectors
+"""
+
+import numpy as np
+
+
+class IVFIndex:
+    """IVF index with exact re-ranking of the best candidates
+
+    Vectors are projected to a small dense space with a Gaussian random
+    projection and assigned to the nearest of n_lists spherical k-means
+    centroids. A query scans only the nprobe closest lists; the best
+    candidates by projected similarity are then re-ranked exactly against
+    the original sparse vectors. nprobe and candidates are the
+    recall/latency knobs.
+    """
+
+    def __init__(self, dim=64, n_lists=None, nprobe=8, candidates=200, n_iter=10, seed=42):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.candidates = candidates
+        self.n_iter = n_iter
+        self.seed = seed
+        self.projection = None
+        self.centroids = None
+        # Per list: chunks of ids and reduced vectors, concatenated lazily
+        self._list_ids = []
+        self._list_vectors = []
+        self._dirty = set()
+        self._deleted = set()
+        self.size = 0
+
+    @staticmethod
+    def _normalise(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reduce(self, vectors):
+        return self._normalise(np.asarray(vectors @ self.projection, dtype=np.float32))
+
+    def build(self, vectors, ids=None):
+        """Train the projection and coarse centroids, then index all vectors
+
+        Args:
+            vectors: Sparse or dense matrix of L2-normalised rows
+            ids: Id of each row; row numbers when None
+        """
+        n_rows, n_features = vectors.shape
+        ids = np.arange(n_rows) if ids is None else np.asarray(ids)
+        rng = np.random.default_rng(self.seed)
+
+        self.projection = rng.standard_normal((n_features, self.dim)).astype(np.float32)
+        reduced = self._reduce(vectors)
+
+        n_lists = self.n_lists or int(np.clip(np.sqrt(n_rows), 1, 4096))
+        n_lists = max(1, min(n_lists, n_rows))
+        sample = reduced[rng.choice(n_rows, size=min(n_rows, 50 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        # Spherical k-means on the sample
+        for _ in range(self.n_iter):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = self._normalise(sums)
+        self.centroids = centroids
+
+        self._list_ids = [[] for _ in range(n_lists)]
+        self._list_vectors = [[] for _ in range(n_lists)]
+        self._dirty = set()
+        self._deleted = set()
+        self.size = 0
+        self._insert(reduced, ids)
+        return self
+
+    def add(self, vectors, ids):
+        """Insert vectors into their nearest lists without retraining"""
+        if self.centroids is None:
+            return self.build(vectors, ids)
+        ids = np.asarray(ids)
+        self._deleted.difference_update(ids.tolist())
+        self._insert(self._reduce(vectors), ids)
+        return self
+
+    def _insert(self, reduced, ids):
+        assignment = (reduced @ self.centroids.T).argmax(axis=1)
+        for list_id in np.unique(assignment):
+            members = assignment == list_id
+            self._list_ids[list_id].append(ids[members])
+            self._list_vectors[list_id].append(reduced[members])
+            self._dirty.add(list_id)
+        self.size += len(ids)
+
+    def remove(self, ids):
+        """Delete ids; they are filtered at query time and dropped on compaction"""
+        ids = set(np.asarray(ids).tolist())
+        self.size -= len(ids - self._deleted)
+        self._deleted.update(ids)
+        if len(self._deleted) > self.size // 4:
+            self.compact()
+
+    def compact(self):
+        """Physically drop deleted ids from all lists"""
+        deleted = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+        for list_id in range(len(self._list_ids)):
+            self._consolidate(list_id)
+            if not self._list_ids[list_id]:
+                continue
+            keep = ~np.isin(self._list_ids[list_id][0], deleted)
+            self._list_ids[list_id] = [self._list_ids[list_id][0][keep]]
+            self._list_vectors[list_id] = [self._list_vectors[list_id][0][keep]]
+        self._deleted = set()
+
+    def _consolidate(self, list_id):
+        if list_id in self._dirty:
+            if len(self._list_ids[list_id]) > 1:
+                self._list_ids[list_id] = [np.concatenate(self._list_ids[list_id])]
+                self._list_vectors[list_id] = [np.concatenate(self._list_vectors[list_id])]
+            self._dirty.discard(list_id)
+
+    def search(self, query, k=10, nprobe=None, candidates=None, exact_vectors=None):
+        """Find the approximate top-k ids for a query vector
+
+        Args:
+            query: Dense query vector in the original feature space
+            k: Number of results
+            nprobe: Number of lists to scan
+            candidates: Number of candidates kept for exact re-ranking
+            exact_vectors: Original row matrix indexed by id; skips re-ranking when None
+
+        Returns:
+            Tuple of (ids, scores) sorted by descending score
+        """
+        if self.centroids is None or self.size <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        candidates = max(candidates or self.candidates, k)
+
+        query = np.asarray(query, dtype=np.float32).ravel()
+        reduced = self._normalise(query @ self.projection)
+        probe = np.argpartition(-(self.centroids @ reduced), nprobe - 1)[:nprobe]
+
+        ids = []
+        scores = []
+        for list_id in probe:
+            self._consolidate(list_id)
+            if self._list_ids[list_id]:
+                ids.append(self._list_ids[list_id][0])
+                scores.append(self._list_vectors[list_id][0] @ reduced)
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids = np.concatenate(ids)
+        scores = np.concatenate(scores)
+
+        if self._deleted:
+            deleted = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+            live = ~np.isin(ids, deleted)
+            ids, scores = ids[live], scores[live]
+
+        if len(ids) > candidates:
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            ids, scores = ids[top], scores[top]
+
+        if exact_vectors is not None and len(ids):
+            scores = np.asarray(exact_vectors[ids] @ query).ravel()
+
+        order = np.argsort(-scores, kind='stable')[:k]
+        return ids[order], scores[order]
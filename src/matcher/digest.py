@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Bulk job digest generation
+Scores many users' skill profiles against the job corpus in chunks
+
+Usage:
+    python -m src.matcher.digest --model models/ --users users.jsonl --out digest.jsonl
+    python -m src.matcher.digest --jobs response.json --users users.jsonl --workers 8
+
+Each line of the users file is {"user_id": ..., "skills": "python, django"}
+(skills may also be a list). Each output line is {"user_id": ..., "jobs": [...]}.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from src.matcher.ml_job_matcher import MLJobMatcher
+from src.matcher.model_store import load_model, save_model
+
+logger = logging.getLogger(__name__)
+
+DIGEST_FIELDS = ('job_id', 'title', 'company', 'location', 'apply_link')
+
+# Per-process matcher, loaded once by the pool initializer
+_worker_matcher = None
+
+
+def _digest_entries(matcher: MLJobMatcher, users: List[Dict], top_k: int, chunk_size: Optional[int]) -> List[Dict]:
+    ranked = matcher.rank_users([user.get('skills', '') for user in users], top_k=top_k, chunk_size=chunk_size)
+    entries = []
+    for user, (rows, scores) in zip(users, ranked):
+        jobs = []
+        for row, score in zip(rows, scores):
+            if score <= 0:
+                # Nothing in common with the user; rows come best first
+                break
+            job = matcher.jobs_data[row]
+            summary = {field: job.get(field) for field in DIGEST_FIELDS}
+            summary['apply_link'] = summary['apply_link'] or job.get('url')
+            summary['match_percentage'] = int(score * 100)
+            jobs.append(summary)
+        entries.append({'user_id': user.get('user_id'), 'jobs': jobs})
+    return entries
+
+
+def _init_worker(model_root: str):
+    global _worker_matcher
+    # Arrays are memory-mapped, so workers share the model pages
+    _worker_matcher = load_model(model_root)
+
+
+def _worker_digest(users: List[Dict], top_k: int, chunk_size: Optional[int]) -> List[Dict]:
+    return _digest_entries(_worker_matcher, users, top_k, chunk_size)
+
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate_digest(
+    users: List[Dict],
+    matcher: Optional[MLJobMatcher] = None,
+    model_root: Optional[str] = None,
+    top_k: int = 10,
+    chunk_size: Optional[int] = None,
+    workers: int = 1,
+    batch_size: int = 5000,
+) -> Iterable[Dict]:
+    """
+    Yield one digest entry per user, in input order
+
+    Args:
+        users: Dicts with user_id and skills
+        matcher: Fitted matcher used in-process
+        model_root: Saved model directory; required for workers > 1
+        top_k: Jobs per user
+        chunk_size: Users per matrix product; derived from corpus size when None
+        workers: Number of processes
+        batch_size: Users handed to a worker at a time
+    """
+    if workers > 1:
+        if not model_root:
+            raise ValueError("A saved model directory is required for workers > 1")
+        # Enough batches to keep every worker busy
+        batch_size = max(1, min(batch_size, -(-len(users) // (workers * 4))))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_root,)) as pool:
+            futures = [
+                pool.submit(_worker_digest, batch, top_k, chunk_size)
+                for batch in _batches(users, batch_size)
+            ]
+            for future in futures:
+                yield from future.result()
+        return
+
+    matcher = matcher or load_model(model_root)
+    for batch in _batches(users, batch_size):
+        yield from _digest_entries(matcher, batch, top_k, chunk_size)
+
+
+def _read_users(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _read_jobs(path: str) -> List[Dict]:
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        # An /api/match or /api/jobs response
+        return data.get('jobs') or data.get('matched_jobs', []) + data.get('recommended_jobs', [])
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate job digests for many users")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--model", help="Saved matcher model directory")
+    source.add_argument("--jobs", help="JSON file of jobs to fit a matcher on")
+    parser.add_argument("--users", required=True, help="JSON-lines file of users")
+    parser.add_argument("--out", help="Output JSON-lines file (stdout when omitted)")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, help="Users per matrix product")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    users = _read_users(args.users)
+
+    matcher = None
+    model_root = args.model
+    temp_dir = None
+    if args.jobs:
+        matcher = MLJobMatcher()
+        matcher.train_model(_read_jobs(args.jobs))
+        if args.workers > 1:
+            temp_dir = tempfile.TemporaryDirectory()
+            model_root = temp_dir.name
+            save_model(matcher, model_root)
+
+    out = open(args.out, "w") if args.out else None
+    try:
+        count = 0
+        for entry in generate_digest(
+            users, matcher=matcher, model_root=model_root, top_k=args.top_k,
+            chunk_size=args.chunk_size, workers=args.workers
+        ):
+            line = json.dumps(entry)
+            if out:
+                out.write(line + "\n")
+            else:
+                print(line)
+            count += 1
+    finally:
+        if out:
+            out.close()
+        if temp_dir:
+            temp_dir.cleanup()
+
+    logger.info(f"Generated {count} digests in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
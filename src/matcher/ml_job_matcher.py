@@ -1,183 +1,832 @@
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.cluster import KMeans
-import re
+from sklearn.cluster import KMeans, MiniBatchKMeans
+import logging
+import threading
+
+from src.matcher.ann_index import IVFIndex
+from src.matcher.preprocessing import ProfileCache, analyze, preprocess_text
+from src.matcher.ranking import top_k_indices
+from src.matcher.sharded_scoring import ShardedScorer
+from src.matcher.skill_extractor import extract_skills, normalise_skill
+from src.matcher.skill_index import SkillBitmapIndex
+from src.scraper.job_record import job_key
+
+logger = logging.getLogger(__name__)
+
 
 class MLJobMatcher:
-    def __init__(self):
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2),
-            lowercase=True
-        )
+    def __init__(self, refit_threshold=0.3, use_ann=False, ann_nprobe=8, ann_candidates=200,
+                 preprocess_workers=1, cluster_mode='auto', max_clusters=256,
+                 minibatch_threshold=20000, recluster_threshold=0.1,
+                 scoring_workers=0, shard_threshold=50000, skill_preselect=False):
+        self.tfidf_vectorizer = self._new_vectorizer()
         self.skill_clusters = None
+        # Cluster state computed at fit time: label per row, each row's cosine
+        # to its centroid, and label -> member rows ordered most central first
+        self.cluster_centers = None
+        self.cluster_labels = np.zeros(0, dtype=np.int32)
+        self.centroid_similarity = np.zeros(0, dtype=np.float32)
+        self.cluster_members = {}
+        # 'batch' (KMeans), 'minibatch' (MiniBatchKMeans, updated as jobs
+        # arrive) or 'auto' (mini-batch from minibatch_threshold jobs)
+        self.cluster_mode = cluster_mode
+        self.max_clusters = max_clusters
+        self.minibatch_threshold = minibatch_threshold
+        # Fraction of rows added since the last clustering before a background re-cluster
+        self.recluster_threshold = recluster_threshold
+        self._clustered_rows = 0
         self.job_vectors = None
+        # Sparse job x skill incidence used for the exact-match boost
+        self.skill_vocab = {}
+        self.skill_matrix = None
+        # Skill column -> bitmap of rows, plus per-row skill bitsets
+        self.skill_index = SkillBitmapIndex()
+        # Only score jobs sharing a skill with the user in whole-corpus queries
+        self.skill_preselect = skill_preselect
         self.jobs_data = []
-        
+        # Cleaned profile text and tokens per job, computed once at ingest
+        self.profiles = ProfileCache(self.job_key, workers=preprocess_workers)
+        # job key -> row in job_vectors / jobs_data, built lazily for loaded models
+        self._job_index = {}
+        self._job_index_loader = None
+        # False for rows whose job has been expired since the last fit
+        self.active = np.zeros(0, dtype=bool)
+        # Fraction of the corpus that may change before a background refit
+        self.refit_threshold = refit_threshold
+        self._changes_since_fit = 0
+        # Terms of jobs added since the last fit that the fitted vocabulary lacks
+        self._unseen_terms = set()
+        # Serialises the synchronous refits that bring such terms into the vocabulary
+        self._vocabulary_lock = threading.Lock()
+        # Optional IVF index used instead of a full scan when ranking the whole corpus
+        self.use_ann = use_ann
+        self.ann_nprobe = ann_nprobe
+        self.ann_candidates = ann_candidates
+        self.ann_index = None
+        # Worker processes scoring whole-corpus queries over shared memory,
+        # used from shard_threshold jobs when scoring_workers > 0
+        self.scoring_workers = scoring_workers
+        self.shard_threshold = shard_threshold
+        self.sharded_scorer = None
+        # Version of the on-disk model this matcher was loaded from, if any
+        self.model_version = None
+        self._lock = threading.RLock()
+        self._refit_thread = None
+        # Set by close(); no background refits start after it
+        self._closed = False
+        # Bumped by every full fit and re-cluster, so a re-cluster of an older
+        # model is discarded and sharded workers know to remap
+        self._model_generation = 0
+
+    @staticmethod
+    def _new_vectorizer():
+        # Jobs are passed as cached token tuples; the analyzer tokenises raw text
+        # (user queries) the same way, with English stop words and bigrams
+        return TfidfVectorizer(
+            max_features=1000,
+            analyzer=analyze
+        )
+
+    @staticmethod
+    def job_key(job):
+        """Stable identity of a job across scrapes"""
+        return job_key(job)
+
+    @property
+    def job_index(self):
+        if self._job_index_loader is not None:
+            with self._lock:
+                if self._job_index_loader is not None:
+                    self._job_index = self._job_index_loader()
+                    self._job_index_loader = None
+        return self._job_index
+
+    @job_index.setter
+    def job_index(self, value):
+        self._job_index = value
+        self._job_index_loader = None
+
+    def set_job_index_loader(self, loader):
+        """Defer building the job key index until it is first needed"""
+        self._job_index_loader = loader
+
+    @property
+    def is_fitted(self):
+        return self.job_vectors is not None
+
+    @staticmethod
+    def _normalise_skill(skill):
+        return normalise_skill(skill)
+
     def preprocess_text(self, text):
         """Clean and preprocess text data"""
-        if not text:
-            return ""
-        
-        text = re.sub(r'[^\w\s]', ' ', str(text))
-        text = re.sub(r'\s+', ' ', text)
-        return text.lower().strip()
-    
+        return preprocess_text(text)
+
     def extract_skills_from_text(self, text):
-        """Extract technical skills using pattern matching"""
-        skill_patterns = {
-            'programming': [
-                'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 
-                'ruby', 'go', 'rust', 'scala', 'kotlin', 'swift', 'dart'
-            ],
-            'web_frontend': [
-                'react', 'angular', 'vue', 'html', 'css', 'sass', 'less',
-                'bootstrap', 'tailwind', 'jquery', 'webpack', 'babel'
-            ],
-            'web_backend': [
-                'node.js', 'express', 'django', 'flask', 'spring', 'laravel',
-                'rails', 'asp.net', 'fastapi', 'nestjs'
-            ],
-            'databases': [
-                'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
-                'cassandra', 'dynamodb', 'sqlite', 'oracle', 'sql server'
-            ],
-            'cloud_devops': [
-                'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins',
-                'terraform', 'ansible', 'chef', 'puppet', 'gitlab ci', 'github actions'
-            ],
-            'data_science': [
-                'machine learning', 'deep learning', 'tensorflow', 'pytorch',
-                'pandas', 'numpy', 'scikit-learn', 'keras', 'opencv', 'nltk'
-            ],
-            'mobile': [
-                'react native', 'flutter', 'ios', 'android', 'xamarin',
-                'ionic', 'cordova', 'swift', 'objective-c'
-            ]
-        }
-        
-        text_lower = text.lower()
-        extracted_skills = []
-        
-        for category, skills in skill_patterns.items():
-            for skill in skills:
-                if skill in text_lower and skill not in extracted_skills:
-                    extracted_skills.append(skill)
-        
-        return extracted_skills
-    
+        """Extract technical skills using the shared skill extractor"""
+        return extract_skills(text)
+
     def create_job_profile(self, job):
         """Create a comprehensive job profile for ML processing"""
-        title = self.preprocess_text(job.get('title', ''))
-        company = self.preprocess_text(job.get('company', ''))
-        location = self.preprocess_text(job.get('location', ''))
-        skills = ' '.join(job.get('skills', []))
-        description = self.preprocess_text(job.get('description', ''))
-        
-        job_text = f"{title} {company} {skills} {description}"
-        return job_text
-    
+        return self.profiles.get(job).text
+
+    def _job_tokens(self, jobs):
+        return [profile.tokens for profile in self.profiles.profiles(jobs)]
+
     def train_model(self, jobs):
-        """Train TF-IDF model on job data"""
-        self.jobs_data = jobs
-        
-        job_profiles = [self.create_job_profile(job) for job in jobs]
-        
-        self.job_vectors = self.tfidf_vectorizer.fit_transform(job_profiles)
-        
-        if len(jobs) > 10:
-            n_clusters = min(8, len(jobs) // 5)
-            self.skill_clusters = KMeans(n_clusters=n_clusters, random_state=42)
-            self.skill_clusters.fit(self.job_vectors)
-        
+        """Fit TF-IDF and clusters on the full job corpus"""
+        unique_jobs = {}
+        for job in jobs:
+            unique_jobs[self.job_key(job)] = job
+        jobs = list(unique_jobs.values())
+
+        vectorizer = self._new_vectorizer()
+        job_vectors = vectorizer.fit_transform(self._job_tokens(jobs))
+        skill_vocab = {}
+        skill_matrix = self._skill_incidence(jobs, skill_vocab)
+
+        clusters = self._fit_clusters(job_vectors)
+
+        self._swap_model(
+            jobs,
+            tfidf_vectorizer=vectorizer,
+            job_vectors=job_vectors,
+            skill_vocab=skill_vocab,
+            skill_matrix=skill_matrix,
+            skill_index=SkillBitmapIndex.from_csr(skill_matrix),
+            **clusters,
+            ann_index=self._build_ann_index(job_vectors),
+        )
+        return True
+
+    def cluster_count(self, n_jobs):
+        """Clusters for a corpus: min(8, n // 5) for small corpora, growing with sqrt(n)"""
+        if n_jobs <= 10:
+            return 0
+        return int(min(self.max_clusters, max(min(8, n_jobs // 5), np.sqrt(n_jobs / 2))))
+
+    def _new_cluster_model(self, n_jobs, n_clusters):
+        minibatch = self.cluster_mode == 'minibatch' or (
+            self.cluster_mode == 'auto' and n_jobs >= self.minibatch_threshold
+        )
+        if minibatch:
+            return MiniBatchKMeans(n_clusters=n_clusters, batch_size=2048, n_init=1, random_state=42)
+        return KMeans(n_clusters=n_clusters, random_state=42)
+
+    def _fit_clusters(self, job_vectors, active=None):
+        """Cluster the active rows of job_vectors; inactive rows are labelled -1
+
+        Returns:
+            Dict of cluster attributes, ready to be installed on the matcher
+        """
+        n_rows = job_vectors.shape[0]
+        rows = np.arange(n_rows) if active is None else np.flatnonzero(active)
+        cluster_labels = np.full(n_rows, -1, dtype=np.int32)
+        centroid_similarity = np.zeros(n_rows, dtype=np.float32)
+        skill_clusters = None
+        cluster_centers = None
+
+        n_clusters = self.cluster_count(len(rows))
+        if n_clusters:
+            vectors = job_vectors if active is None else job_vectors[rows]
+            skill_clusters = self._new_cluster_model(len(rows), n_clusters)
+            skill_clusters.fit(vectors)
+            cluster_centers = skill_clusters.cluster_centers_
+            labels = skill_clusters.labels_.astype(np.int32)
+            cluster_labels[rows] = labels
+            centroid_similarity[rows] = self._centroid_similarity(vectors, labels, cluster_centers)
+
+        return {
+            'skill_clusters': skill_clusters,
+            'cluster_centers': cluster_centers,
+            'cluster_labels': cluster_labels,
+            'centroid_similarity': centroid_similarity,
+            'cluster_members': self._cluster_inverted_lists(cluster_labels, centroid_similarity),
+            '_clustered_rows': len(rows),
+        }
+
+    def _build_ann_index(self, job_vectors):
+        if not self.use_ann:
+            return None
+        index = IVFIndex(nprobe=self.ann_nprobe, candidates=self.ann_candidates)
+        return index.build(job_vectors)
+
+    @staticmethod
+    def _predict_clusters(vectors, centers):
+        """Nearest centroid for each row, as KMeans.predict assigns it"""
+        # argmin ||x - c||^2 == argmax 2 x.c - ||c||^2
+        scores = np.asarray(vectors @ centers.T) * 2 - (centers ** 2).sum(axis=1)
+        return scores.argmax(axis=1).astype(np.int32)
+
+    @staticmethod
+    def _centroid_similarity(vectors, labels, centers):
+        """Cosine similarity of each row to its own centroid"""
+        norms = np.linalg.norm(centers, axis=1)
+        norms[norms == 0] = 1.0
+        similarity = np.zeros(vectors.shape[0], dtype=np.float32)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        for rows in np.split(order, bounds):
+            if len(rows):
+                label = labels[rows[0]]
+                similarity[rows] = vectors[rows] @ centers[label] / norms[label]
+        return similarity
+
+    @staticmethod
+    def _cluster_inverted_lists(labels, centroid_similarity):
+        """cluster label -> member rows, most central first"""
+        order = np.lexsort((-centroid_similarity, labels))
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        return {
+            int(labels[rows[0]]): rows
+            for rows in np.split(order, bounds)
+            if len(rows) and labels[rows[0]] >= 0
+        }
+
+    def _skill_incidence(self, jobs, skill_vocab):
+        """Binary job x skill matrix; skills not yet in skill_vocab are added to it"""
+        indptr = [0]
+        indices = []
+        for job in jobs:
+            columns = {
+                skill_vocab.setdefault(self._normalise_skill(skill), len(skill_vocab))
+                for skill in job.get('skills', [])
+            }
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(jobs), len(skill_vocab)))
+
+    def _swap_model(self, jobs, **model):
+        """Install a freshly fitted model, carrying over changes made while it was fitting"""
+        with self._lock:
+            fitted_keys = {self.job_key(job) for job in jobs}
+            added = []
+            expired = set()
+            for key, row in self.job_index.items():
+                if not self.active[row]:
+                    expired.add(key)
+                elif key not in fitted_keys:
+                    added.append(self.jobs_data[row])
+
+            for name, value in model.items():
+                setattr(self, name, value)
+            self.jobs_data = list(jobs)
+            self.job_index = {self.job_key(job): i for i, job in enumerate(jobs)}
+            self.active = np.ones(len(jobs), dtype=bool)
+            self._changes_since_fit = 0
+            self._unseen_terms = set()
+            self._model_generation += 1
+
+            if expired:
+                self.remove_jobs(expired)
+            if added:
+                self.add_jobs(added)
+
+    def add_jobs(self, jobs):
+        """Vectorise new jobs with the fitted vocabulary and append them to the corpus"""
+        if not self.is_fitted:
+            return self.train_model(jobs)
+
+        with self._lock:
+            new_jobs = []
+            seen = set()
+            for job in jobs:
+                key = self.job_key(job)
+                row = self.job_index.get(key)
+                if key in seen or (row is not None and self.active[row]):
+                    continue
+                seen.add(key)
+                new_jobs.append(job)
+
+            if not new_jobs:
+                return False
+
+            tokens = self._job_tokens(new_jobs)
+            vectors = self.tfidf_vectorizer.transform(tokens)
+            vocabulary = self.tfidf_vectorizer.vocabulary_
+            self._unseen_terms.update(
+                term for job_tokens in tokens for term in job_tokens if term not in vocabulary
+            )
+            skills = self._skill_incidence(new_jobs, self.skill_vocab)
+            # Widen the existing incidence matrix to cover newly seen skills
+            existing = sp.csr_matrix(
+                (self.skill_matrix.data, self.skill_matrix.indices, self.skill_matrix.indptr),
+                shape=(self.skill_matrix.shape[0], len(self.skill_vocab))
+            )
+            start = len(self.jobs_data)
+            self.job_vectors = sp.vstack([self.job_vectors, vectors], format='csr')
+            self.skill_matrix = sp.vstack([existing, skills], format='csr')
+            self.skill_index.add_csr(skills)
+            self.jobs_data.extend(new_jobs)
+            # Re-added jobs get a fresh row; the stale one stays inactive
+            for offset, job in enumerate(new_jobs):
+                self.job_index[self.job_key(job)] = start + offset
+            self.active = np.concatenate([self.active, np.ones(len(new_jobs), dtype=bool)])
+            self._assign_clusters(vectors, start)
+            if self.ann_index is not None:
+                self.ann_index.add(vectors, np.arange(start, start + len(new_jobs)))
+            self._changes_since_fit += len(new_jobs)
+
+        self._maybe_refit()
         return True
-    
+
+    def _assign_clusters(self, vectors, start):
+        """Place rows appended at start into the existing clusters without refitting"""
+        if self.cluster_centers is None:
+            labels = np.full(vectors.shape[0], -1, dtype=np.int32)
+            self.cluster_labels = np.concatenate([self.cluster_labels, labels])
+            self.centroid_similarity = np.concatenate(
+                [self.centroid_similarity, np.zeros(vectors.shape[0], dtype=np.float32)]
+            )
+            return
+
+        if isinstance(self.skill_clusters, MiniBatchKMeans):
+            # Move the centroids towards the new jobs; existing rows keep their
+            # labels until the next re-cluster
+            self.skill_clusters.partial_fit(vectors)
+            self.cluster_centers = self.skill_clusters.cluster_centers_
+
+        labels = self._predict_clusters(vectors, self.cluster_centers)
+        similarity = self._centroid_similarity(vectors, labels, self.cluster_centers)
+        self.cluster_labels = np.concatenate([self.cluster_labels, labels])
+        self.centroid_similarity = np.concatenate([self.centroid_similarity, similarity])
+        self._add_cluster_members(labels, start)
+
+    def _add_cluster_members(self, labels, start):
+        cluster_members = dict(self.cluster_members)
+        new_rows = np.arange(start, start + len(labels))
+        for label in np.unique(labels):
+            if label < 0:
+                continue
+            members = np.concatenate([
+                cluster_members.get(int(label), np.zeros(0, dtype=np.intp)),
+                new_rows[labels == label]
+            ])
+            order = np.argsort(-self.centroid_similarity[members], kind='stable')
+            cluster_members[int(label)] = members[order]
+        self.cluster_members = cluster_members
+
+    def remove_jobs(self, job_keys):
+        """Expire jobs from the corpus without refitting"""
+        with self._lock:
+            removed = []
+            removed_keys = []
+            for key in job_keys:
+                row = self.job_index.get(key)
+                if row is not None and self.active[row]:
+                    self.active[row] = False
+                    removed.append(row)
+                    removed_keys.append(key)
+            if removed and self.ann_index is not None:
+                self.ann_index.remove(removed)
+            self.profiles.discard(removed_keys)
+            self._changes_since_fit += len(removed)
+
+        if removed:
+            self._maybe_refit()
+        return len(removed)
+
+    def active_jobs(self):
+        """Jobs currently in the corpus"""
+        with self._lock:
+            return [job for job, alive in zip(self.jobs_data, self.active) if alive]
+
+    def _maybe_refit(self):
+        """Refit in the background once enough of the corpus has churned, or
+        re-cluster once enough jobs have been added since the last clustering"""
+        corpus_size = max(len(self.jobs_data), 1)
+        if self._changes_since_fit / corpus_size > self.refit_threshold:
+            self.refit_in_background()
+        elif self._needs_recluster():
+            self.recluster_in_background()
+
+    def _needs_recluster(self):
+        n_active = int(self.active.sum())
+        if self.cluster_centers is None:
+            return self.cluster_count(n_active) > 0
+        grown = (len(self.jobs_data) - self._clustered_rows) / max(len(self.jobs_data), 1)
+        return grown > self.recluster_threshold or self.cluster_count(n_active) > 1.5 * len(self.cluster_centers)
+
+    def _query_terms(self, user_skills):
+        return analyze(self.preprocess_text(' '.join(user_skills)))
+
+    def unseen_query_terms(self, user_skills):
+        """Query terms found in jobs added since the last fit but missing from its vocabulary
+
+        Such terms get no weight in the user's TF-IDF vector, so every job would
+        score zero text similarity for them until the next fit.
+        """
+        with self._lock:
+            return {term for term in self._query_terms(user_skills) if term in self._unseen_terms}
+
+    def ensure_vocabulary(self, user_skills):
+        """Refit synchronously when the query uses terms the fitted vocabulary lacks
+
+        Returns:
+            True when the model now covers the query's terms
+        """
+        if not self.unseen_query_terms(user_skills):
+            return True
+        with self._vocabulary_lock:
+            # Another query may have refitted while this one waited
+            if self.unseen_query_terms(user_skills):
+                jobs = self.active_jobs()
+                self.train_model(jobs)
+                logger.info(f"Matcher refitted on {len(jobs)} jobs for new query terms")
+        return not self.unseen_query_terms(user_skills)
+
+    def refit_in_background(self):
+        """Refit on the active corpus in a daemon thread; queries keep using the current model"""
+        with self._lock:
+            if self._closed:
+                return None
+            if self._refit_thread and self._refit_thread.is_alive():
+                return self._refit_thread
+            jobs = self.active_jobs()
+            self._refit_thread = threading.Thread(
+                target=self._background_refit, args=(jobs,), daemon=True
+            )
+            self._refit_thread.start()
+            return self._refit_thread
+
+    def _background_refit(self, jobs):
+        try:
+            self.train_model(jobs)
+            logger.info(f"Matcher refitted on {len(jobs)} jobs")
+        except Exception as e:
+            logger.error(f"Background refit failed: {str(e)}")
+
+    def recluster_in_background(self):
+        """Re-cluster the current job vectors in a daemon thread
+
+        Recommendations keep using the current clusters until the new ones
+        are swapped in; TF-IDF is not refitted.
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            if self._refit_thread and self._refit_thread.is_alive():
+                return self._refit_thread
+            self._refit_thread = threading.Thread(
+                target=self._background_recluster,
+                args=(self.job_vectors, self.active.copy(), self._model_generation),
+                daemon=True
+            )
+            self._refit_thread.start()
+            return self._refit_thread
+
+    def _background_recluster(self, job_vectors, active, generation):
+        try:
+            clusters = self._fit_clusters(job_vectors, active)
+            if self._swap_clusters(clusters, job_vectors.shape[0], generation):
+                logger.info(f"Matcher re-clustered {int(active.sum())} jobs into {len(clusters['cluster_members'])} clusters")
+        except Exception as e:
+            logger.error(f"Background re-cluster failed: {str(e)}")
+
+    def _swap_clusters(self, clusters, n_rows, generation):
+        """Install clusters fitted on the first n_rows rows, assigning rows added since"""
+        with self._lock:
+            if generation != self._model_generation:
+                # A full refit replaced the vectors these clusters were fitted on
+                return False
+            for name, value in clusters.items():
+                setattr(self, name, value)
+            self._model_generation += 1
+            if self.job_vectors.shape[0] > n_rows and self.cluster_centers is not None:
+                vectors = self.job_vectors[n_rows:]
+                labels = self._predict_clusters(vectors, self.cluster_centers)
+                similarity = self._centroid_similarity(vectors, labels, self.cluster_centers)
+                self.cluster_labels = np.concatenate([self.cluster_labels, labels])
+                self.centroid_similarity = np.concatenate([self.centroid_similarity, similarity])
+                self._add_cluster_members(labels, n_rows)
+            elif self.job_vectors.shape[0] > n_rows:
+                padding = self.job_vectors.shape[0] - n_rows
+                self.cluster_labels = np.concatenate([self.cluster_labels, np.full(padding, -1, dtype=np.int32)])
+                self.centroid_similarity = np.concatenate([self.centroid_similarity, np.zeros(padding, dtype=np.float32)])
+            return True
+
+    def _job_row(self, job):
+        row = self.job_index.get(self.job_key(job))
+        if row is None or not self.active[row]:
+            return None
+        return row
+
+    def _user_vector(self, user_skills):
+        user_profile = self.preprocess_text(' '.join(user_skills))
+        return self.tfidf_vectorizer.transform([user_profile]).toarray().ravel()
+
+    def _user_skill_vector(self, user_skills):
+        vector = np.zeros(len(self.skill_vocab), dtype=np.float32)
+        for skill in user_skills:
+            column = self.skill_vocab.get(self._normalise_skill(skill))
+            if column is not None:
+                vector[column] = 1.0
+        return vector
+
+    def _skill_columns(self, skills):
+        """skill_vocab columns of the known skills"""
+        columns = (self.skill_vocab.get(self._normalise_skill(skill)) for skill in skills)
+        return [column for column in columns if column is not None]
+
+    def rows_with_skills(self, skills):
+        """Rows of jobs having every one of the skills, expired jobs included"""
+        skills = [skill for skill in skills if str(skill).strip()]
+        columns = self._skill_columns(skills)
+        if len(columns) < len(skills):
+            # Nobody in the corpus has an unknown skill
+            return np.zeros(0, dtype=np.intp)
+        return self.skill_index.rows_with_all(columns)
+
+    @staticmethod
+    def _rows_dot(matrix, rows, vector):
+        """matrix[rows] @ vector without slicing the matrix when most rows are wanted"""
+        if len(rows) * 4 >= matrix.shape[0]:
+            return (matrix @ vector)[rows]
+        return matrix[rows] @ vector
+
+    def score_jobs(self, user_skills, rows=None):
+        """Score the user against many jobs in one pass
+
+        TF-IDF rows are L2-normalised, so cosine similarity is a single sparse
+        matrix-vector product; the exact-skill boost counts shared skills with
+        bitwise operations on the skill bitmap index.
+
+        Args:
+            user_skills: List of user skills
+            rows: Corpus rows to score; every active job when None
+
+        Returns:
+            Tuple of (rows, scores) as NumPy arrays
+        """
+        with self._lock:
+            if rows is None:
+                rows = np.flatnonzero(self.active)
+            rows = np.asarray(rows, dtype=np.intp)
+
+            similarity = self._rows_dot(self.job_vectors, rows, self._user_vector(user_skills))
+            # float32 like the skill incidence product used by rank_users and the scoring workers
+            exact_matches = self.skill_index.overlap_counts(self._skill_columns(user_skills), rows).astype(np.float32)
+
+        return rows, np.minimum(similarity + exact_matches * 0.2, 1.0)
+
+    @staticmethod
+    def parse_user_skills(user_skills):
+        """Skill list from a comma-separated string or an existing list"""
+        if isinstance(user_skills, str):
+            user_skills = user_skills.split(',')
+        return [s.strip() for s in user_skills if s and s.strip()]
+
+    def rank_users(self, profiles, top_k=10, chunk_size=None, max_chunk_bytes=256 * 2 ** 20):
+        """Top-k jobs for many users, scoring a chunk of users per sparse matrix product
+
+        Args:
+            profiles: One skill list or comma-separated skill string per user
+            top_k: Jobs kept per user
+            chunk_size: Users scored together; derived from max_chunk_bytes when None
+            max_chunk_bytes: Bound on the dense jobs x users score block of a chunk
+
+        Returns:
+            One (rows, scores) pair per user, best first
+        """
+        profiles = [self.parse_user_skills(profile) for profile in profiles]
+        results = []
+
+        with self._lock:
+            n_jobs = self.job_vectors.shape[0]
+            if chunk_size is None:
+                chunk_size = max(1, max_chunk_bytes // (8 * max(n_jobs, 1)))
+            inactive = ~self.active
+            k = min(top_k, int(self.active.sum()))
+
+            for start in range(0, len(profiles), chunk_size):
+                chunk = profiles[start:start + chunk_size]
+                if k == 0:
+                    results.extend((np.zeros(0, dtype=np.intp), np.zeros(0)) for _ in chunk)
+                    continue
+
+                user_vectors = self.tfidf_vectorizer.transform(
+                    [self.preprocess_text(' '.join(skills)) for skills in chunk]
+                ).toarray()
+                user_skills = np.stack([self._user_skill_vector(skills) for skills in chunk])
+
+                # jobs x users
+                scores = np.asarray(self.job_vectors @ user_vectors.T)
+                scores += (self.skill_matrix @ user_skills.T) * 0.2
+                np.minimum(scores, 1.0, out=scores)
+                scores[inactive] = -np.inf
+
+                top = np.argpartition(-scores, k - 1, axis=0)[:k]
+                top_scores = np.take_along_axis(scores, top, axis=0)
+                order = np.argsort(-top_scores, axis=0, kind='stable')
+                top = np.take_along_axis(top, order, axis=0)
+                top_scores = np.take_along_axis(top_scores, order, axis=0)
+                results.extend((top[:, user], top_scores[:, user]) for user in range(len(chunk)))
+
+        return results
+
     def calculate_similarity_score(self, user_skills, job):
         """Calculate similarity using TF-IDF and cosine similarity"""
-        user_profile = self.preprocess_text(' '.join(user_skills))
-        
         try:
+            row = self._job_row(job)
+            if row is not None:
+                return float(self.score_jobs(user_skills, [row])[1][0])
+
+            user_profile = self.preprocess_text(' '.join(user_skills))
             user_vector = self.tfidf_vectorizer.transform([user_profile])
-            job_profile = self.create_job_profile(job)
-            job_vector = self.tfidf_vectorizer.transform([job_profile])
-            
+            job_vector = self.tfidf_vectorizer.transform(self._job_tokens([job]))
+
             similarity = cosine_similarity(user_vector, job_vector)[0][0]
-            
+
             job_skills_lower = [s.lower() for s in job.get('skills', [])]
             user_skills_lower = [s.lower().strip() for s in user_skills]
-            
+
             exact_matches = len(set(user_skills_lower) & set(job_skills_lower))
             skill_boost = exact_matches * 0.2
-            
+
             final_score = min(similarity + skill_boost, 1.0)
             return final_score
-            
-        except Exception as e:
+
+        except Exception:
             return self.simple_skill_match(user_skills, job)
-    
+
     def simple_skill_match(self, user_skills, job):
         """Fallback simple skill matching"""
         user_skills_lower = [s.lower().strip() for s in user_skills]
         job_text = f"{job.get('title', '')} {' '.join(job.get('skills', []))}".lower()
-        
+
         matches = sum(1 for skill in user_skills_lower if skill in job_text)
         return matches / len(user_skills_lower) if user_skills_lower else 0
-    
-    def get_cluster_recommendations(self, user_skills, jobs, top_k=10):
-        """Get recommendations using clustering"""
-        if not self.skill_clusters or not jobs:
-            return []
-        
+
+    def _user_cluster(self, user_skills):
         user_profile = self.preprocess_text(' '.join(user_skills))
         user_vector = self.tfidf_vectorizer.transform([user_profile])
-        
-        user_cluster = self.skill_clusters.predict(user_vector)[0]
-        
-        cluster_jobs = []
-        for i, job in enumerate(jobs):
-            if i < len(self.job_vectors.toarray()):
-                job_cluster = self.skill_clusters.predict([self.job_vectors[i]])[0]
-                if job_cluster == user_cluster:
-                    similarity = self.calculate_similarity_score(user_skills, job)
-                    cluster_jobs.append((job, similarity))
-        
-        cluster_jobs.sort(key=lambda x: x[1], reverse=True)
-        return [job for job, _ in cluster_jobs[:top_k]]
-    
-    def rank_jobs(self, user_skills_text, jobs):
-        """Main function to rank jobs using ML algorithms"""
-        if not jobs:
+        return int(self._predict_clusters(user_vector, self.cluster_centers)[0])
+
+    def _recommend_positions(self, user_skills, rows, scores, top_k):
+        """Positions into rows of the best-scoring jobs in the user's cluster"""
+        user_cluster = self._user_cluster(user_skills)
+        positions = np.flatnonzero(self.cluster_labels[rows] == user_cluster)
+        return positions[top_k_indices(scores[positions], top_k)]
+
+    def get_cluster_recommendations(self, user_skills, jobs=None, top_k=10, max_candidates=None):
+        """Get recommendations using clustering
+
+        Args:
+            user_skills: List of user skills
+            jobs: Restrict recommendations to these jobs; whole corpus when None
+            top_k: Number of recommendations
+            max_candidates: Only score this many of the cluster's most central members
+
+        Returns:
+            List of recommended jobs
+        """
+        if self.cluster_centers is None or jobs == []:
+            return []
+
+        with self._lock:
+            user_cluster = self._user_cluster(user_skills)
+            members = self.cluster_members.get(user_cluster, np.zeros(0, dtype=np.intp))
+            members = members[self.active[members]]
+            if jobs is not None:
+                wanted = [row for row in (self._job_row(job) for job in jobs) if row is not None]
+                members = members[np.isin(members, wanted)]
+            if max_candidates:
+                members = members[:max_candidates]
+            if not len(members):
+                return []
+
+            rows, scores = self.score_jobs(user_skills, members)
+            order = top_k_indices(scores, top_k)
+            return [self.jobs_data[rows[i]] for i in order]
+
+    def _use_sharded_scoring(self):
+        if self.scoring_workers <= 0 or self.ann_index is not None:
+            return False
+        if self.job_vectors.shape[0] < self.shard_threshold:
+            return False
+        if self.sharded_scorer is None:
+            self.sharded_scorer = ShardedScorer(self.scoring_workers)
+        return True
+
+    def _sharded_top_k(self, user_skills):
+        """Top 15 overall and top 10 in the user's cluster from the scoring workers
+
+        Returns:
+            Tuple of (rows, scores, positions of the top 15, positions of the
+            cluster top 10), in the form rank_jobs uses for a full scan, or
+            None when a worker died and the query must be scored in process
+        """
+        cluster = self._user_cluster(user_skills) if self.cluster_centers is not None else None
+        try:
+            (top_rows, top_scores), in_cluster = self.sharded_scorer.top_k(self, user_skills, 15, cluster)
+        except (EOFError, OSError) as e:
+            # A dead worker closes its pipe; the pool is restarted on the next query
+            logger.error(f"Scoring workers failed, scoring in process: {str(e)}")
+            self.sharded_scorer.reset()
+            return None
+        if in_cluster is None:
+            in_cluster = (np.zeros(0, dtype=np.intp), np.zeros(0))
+        cluster_rows, cluster_scores = in_cluster[0][:10], in_cluster[1][:10]
+        rows = np.concatenate([top_rows, cluster_rows])
+        scores = np.concatenate([top_scores, cluster_scores])
+        order = np.arange(len(top_rows))
+        return rows, scores, order, len(top_rows) + np.arange(len(cluster_rows))
+
+    def close(self, timeout=None):
+        """Wait for a running background refit or re-cluster, then stop the scoring workers
+
+        Refits are not started once the matcher is closed.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._refit_thread
+        if thread is not None:
+            thread.join(timeout)
+        if self.sharded_scorer is not None:
+            self.sharded_scorer.close()
+            self.sharded_scorer = None
+
+    def _candidate_rows(self, user_skills):
+        """Rows worth scoring for a whole-corpus query"""
+        if self.ann_index is None:
+            rows = np.flatnonzero(self.active)
+            columns = self._skill_columns(user_skills) if self.skill_preselect else []
+            if columns:
+                # Skips jobs that only match the user on text, in exchange for scoring far fewer rows
+                rows = np.intersect1d(rows, self.skill_index.rows_with_any(columns), assume_unique=True)
+            return rows
+        rows, _ = self.ann_index.search(
+            self._user_vector(user_skills), k=self.ann_candidates, exact_vectors=self.job_vectors
+        )
+        return rows
+
+    @staticmethod
+    def _scored_copy(job, score):
+        job_copy = job.copy()
+        job_copy['match_score'] = float(score)
+        job_copy['match_percentage'] = int(score * 100)
+        return job_copy
+
+    def rank_jobs(self, user_skills_text, jobs=None, must_have=None):
+        """Rank jobs against the fitted corpus; jobs not yet seen are added incrementally
+
+        must_have (a skill list or comma-separated string) keeps only jobs
+        having every one of those skills.
+        """
+        if jobs is not None:
+            if not jobs:
+                return [], []
+            if not self.is_fitted:
+                self.train_model(jobs)
+            else:
+                self.add_jobs(jobs)
+        elif not self.is_fitted:
             return [], []
-        
+
         user_skills = [s.strip() for s in user_skills_text.split(',') if s.strip()]
-        
-        self.train_model(jobs)
-        
-        scored_jobs = []
-        for job in jobs:
-            similarity = self.calculate_similarity_score(user_skills, job)
-            job_copy = job.copy()
-            job_copy['match_score'] = similarity
-            job_copy['match_percentage'] = int(similarity * 100)
-            scored_jobs.append(job_copy)
-        
-        scored_jobs.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        direct_matches = [job for job in scored_jobs if job['match_score'] > 0.3][:15]
-        
-        cluster_recommendations = self.get_cluster_recommendations(user_skills, jobs, top_k=10)
-        
-        direct_match_ids = {job.get('id', f"{job['title']}_{job['company']}") for job in direct_matches}
-        recommendations = []
-        
-        for job in cluster_recommendations:
-            job_id = job.get('id', f"{job['title']}_{job['company']}")
-            if job_id not in direct_match_ids:
-                job_copy = job.copy()
-                job_copy['match_score'] = self.calculate_similarity_score(user_skills, job)
-                job_copy['match_percentage'] = int(job_copy['match_score'] * 100)
-                recommendations.append(job_copy)
-        
-        return direct_matches, recommendations[:10]
\ No newline at end of file
+        self.ensure_vocabulary(user_skills)
+
+        with self._lock:
+            allowed = self.rows_with_skills(self.parse_user_skills(must_have)) if must_have else None
+            if jobs is not None and allowed is not None:
+                keep = np.isin([self._job_row(job) for job in jobs], allowed)
+                jobs = [job for job, kept in zip(jobs, keep) if kept]
+
+            recommend_positions = None
+            sharded = None
+            if jobs is None and allowed is None and self._use_sharded_scoring():
+                sharded = self._sharded_top_k(user_skills)
+            if sharded is not None:
+                rows, scores, order, recommend_positions = sharded
+            else:
+                if jobs is None:
+                    rows = self._candidate_rows(user_skills)
+                    if allowed is not None:
+                        rows = rows[np.isin(rows, allowed)]
+                else:
+                    rows = [self._job_row(job) for job in jobs]
+                rows, scores = self.score_jobs(user_skills, rows)
+                order = top_k_indices(scores, 15)
+
+            def job_at(position):
+                # Only the returned jobs are materialised
+                return jobs[position] if jobs is not None else self.jobs_data[rows[position]]
+
+            direct_matches = [self._scored_copy(job_at(p), scores[p]) for p in order if scores[p] > 0.3]
+
+            recommendations = []
+            if self.cluster_centers is not None:
+                direct_match_ids = {self.job_key(job) for job in direct_matches}
+                if recommend_positions is None:
+                    # Reuse the scores computed above instead of scoring cluster members again
+                    recommend_positions = self._recommend_positions(user_skills, rows, scores, top_k=10)
+                for p in recommend_positions:
+                    job = job_at(p)
+                    if self.job_key(job) not in direct_match_ids:
+                        recommendations.append(self._scored_copy(job, scores[p]))
+
+        return direct_matches, recommendations[:10]
@@ -0,0 +1,282 @@
+"""
+On-disk model artifacts for MLJobMatcher
+Array parts are plain .npy files that workers memory-map read-only, so several
+processes share one copy of the model through the page cache
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+
+from src.matcher.ml_job_matcher import MLJobMatcher
+from src.matcher.skill_index import SkillBitmapIndex
+from src.scraper.job_record import job_to_dict
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+
+_CSR_PARTS = ("data", "indices", "indptr")
+_SKILL_INDEX_PARTS = ("sparse_columns", "sparse_offsets", "sparse_rows", "dense_columns", "dense_counts", "dense_words")
+
+
+class MappedJobs:
+    """Read-only sequence of job dicts backed by a memory-mapped JSON-lines file
+
+    Jobs are decoded on access, so a worker only pays for the jobs it
+    returns. Jobs added after loading are kept in memory.
+    """
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self._offsets = offsets
+        self._data = np.memmap(path, dtype=np.uint8, mode='r') if offsets[-1] > 0 else None
+        self._extra = []
+
+    def __len__(self):
+        return len(self._offsets) - 1 + len(self._extra)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        stored = len(self._offsets) - 1
+        if index >= stored:
+            return self._extra[index - stored]
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return json.loads(self._data[start:end].tobytes())
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, job):
+        self._extra.append(job)
+
+    def extend(self, jobs):
+        self._extra.extend(jobs)
+
+
+def _save_csr(directory, name, matrix):
+    matrix = sp.csr_matrix(matrix)
+    for part in _CSR_PARTS:
+        np.save(os.path.join(directory, f"{name}.{part}.npy"), getattr(matrix, part))
+    return list(matrix.shape)
+
+
+def _load_csr(directory, name, shape, mmap_mode):
+    parts = [np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode=mmap_mode) for part in _CSR_PARTS]
+    return sp.csr_matrix(tuple(parts), shape=tuple(shape), copy=False)
+
+
+def _load_skill_index(directory, skill_matrix, mmap_mode):
+    """Skill bitmaps saved with the model, per-job skills from the incidence matrix"""
+    paths = {name: os.path.join(directory, f"skill_index.{name}.npy") for name in _SKILL_INDEX_PARTS}
+    if not all(os.path.exists(path) for path in paths.values()):
+        # Saved before the bitmaps were stored
+        return SkillBitmapIndex.from_csr(skill_matrix)
+    arrays = {name: np.load(path, mmap_mode=mmap_mode) for name, path in paths.items()}
+    return SkillBitmapIndex.from_arrays(arrays, skill_matrix)
+
+
+def _write_json(path, value):
+    with open(path, "w") as f:
+        json.dump(value, f)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def current_version(root: str) -> Optional[str]:
+    """Name of the version CURRENT points at, or None if nothing has been saved"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_model(matcher: MLJobMatcher, root: str, keep: int = 3) -> str:
+    """Write the fitted matcher as a new version and atomically point CURRENT at it
+
+    Args:
+        matcher: A fitted MLJobMatcher
+        root: Model directory shared by all workers
+        keep: Number of versions to keep on disk
+
+    Returns:
+        Name of the new version
+    """
+    if not matcher.is_fitted:
+        raise ValueError("Cannot save an unfitted matcher")
+
+    os.makedirs(root, exist_ok=True)
+    version = time.strftime("v%Y%m%d%H%M%S") + f"{int(time.time() * 1000) % 1000:03d}-{os.getpid()}"
+    staging = os.path.join(root, f".{version}.tmp")
+    os.makedirs(staging)
+
+    with matcher._lock:
+        vectorizer = matcher.tfidf_vectorizer
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "sklearn_version": sklearn.__version__,
+            "created_at": time.time(),
+            "n_jobs": len(matcher.jobs_data),
+            "job_vectors_shape": _save_csr(staging, "job_vectors", matcher.job_vectors),
+            "skill_matrix_shape": _save_csr(staging, "skill_matrix", matcher.skill_matrix),
+            "has_clusters": matcher.cluster_centers is not None,
+            # Churn since the fit and rows clustered, so refits and re-clusters
+            # resume on schedule after a load
+            "changes_since_fit": int(matcher._changes_since_fit),
+            "clustered_rows": int(matcher._clustered_rows),
+        }
+        _write_json(os.path.join(staging, "vocabulary.json"), {k: int(v) for k, v in vectorizer.vocabulary_.items()})
+        _write_json(os.path.join(staging, "skill_vocab.json"), matcher.skill_vocab)
+        np.save(os.path.join(staging, "idf.npy"), vectorizer.idf_)
+        np.save(os.path.join(staging, "active.npy"), matcher.active)
+        for name, array in matcher.skill_index.arrays().items():
+            np.save(os.path.join(staging, f"skill_index.{name}.npy"), array)
+
+        keys = [None] * len(matcher.jobs_data)
+        for key, row in matcher.job_index.items():
+            keys[row] = key
+        _write_json(os.path.join(staging, "job_ids.json"), keys)
+
+        offsets = [0]
+        with open(os.path.join(staging, "jobs.jsonl"), "wb") as f:
+            for job in matcher.jobs_data:
+                line = json.dumps(job_to_dict(job), default=str).encode() + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(os.path.join(staging, "job_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+        if manifest["has_clusters"]:
+            np.save(os.path.join(staging, "cluster_centers.npy"), matcher.cluster_centers)
+            np.save(os.path.join(staging, "cluster_labels.npy"), matcher.cluster_labels)
+            np.save(os.path.join(staging, "centroid_similarity.npy"), matcher.centroid_similarity)
+            labels = sorted(matcher.cluster_members)
+            members = [matcher.cluster_members[label] for label in labels]
+            np.save(os.path.join(staging, "cluster_member_labels.npy"), np.asarray(labels, dtype=np.int32))
+            np.save(
+                os.path.join(staging, "cluster_member_rows.npy"),
+                np.concatenate(members) if members else np.zeros(0, dtype=np.intp)
+            )
+            np.save(
+                os.path.join(staging, "cluster_member_offsets.npy"),
+                np.cumsum([0] + [len(m) for m in members]).astype(np.int64)
+            )
+
+    # The manifest goes last: a version without one is incomplete
+    _write_json(os.path.join(staging, "manifest.json"), manifest)
+    os.rename(staging, os.path.join(root, version))
+
+    pointer = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+    logger.info(f"Saved matcher model {version} ({manifest['n_jobs']} jobs)")
+
+    _prune_versions(root, keep)
+    return version
+
+
+def _prune_versions(root, keep):
+    versions = sorted(name for name in os.listdir(root) if name.startswith("v"))
+    current = current_version(root)
+    for name in versions[:-keep] if keep else []:
+        if name != current:
+            # Workers still mapping an old version keep their open file handles
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_model(root: str, version: Optional[str] = None, mmap: bool = True, **matcher_kwargs) -> MLJobMatcher:
+    """Load a saved matcher, memory-mapping its arrays read-only
+
+    Args:
+        root: Model directory
+        version: Version to load; the one CURRENT points at when None
+        mmap: Map arrays instead of reading them into memory
+        matcher_kwargs: Passed to MLJobMatcher
+
+    Returns:
+        A fitted MLJobMatcher
+    """
+    version = version or current_version(root)
+    if not version:
+        raise FileNotFoundError(f"No saved matcher model in {root}")
+    directory = os.path.join(root, version)
+    mmap_mode = 'r' if mmap else None
+
+    manifest = _read_json(os.path.join(directory, "manifest.json"))
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format {manifest.get('format_version')} in {directory}")
+    if manifest.get("sklearn_version") != sklearn.__version__:
+        logger.warning(f"Model {version} was saved with scikit-learn {manifest.get('sklearn_version')}")
+
+    matcher = MLJobMatcher(**matcher_kwargs)
+    vectorizer = matcher.tfidf_vectorizer
+    vectorizer.vocabulary_ = _read_json(os.path.join(directory, "vocabulary.json"))
+    vectorizer.idf_ = np.load(os.path.join(directory, "idf.npy"))
+
+    job_vectors = _load_csr(directory, "job_vectors", manifest["job_vectors_shape"], mmap_mode)
+    skill_matrix = _load_csr(directory, "skill_matrix", manifest["skill_matrix_shape"], mmap_mode)
+    offsets = np.load(os.path.join(directory, "job_offsets.npy"), mmap_mode=mmap_mode)
+    jobs = MappedJobs(os.path.join(directory, "jobs.jsonl"), offsets)
+    n_jobs = manifest["n_jobs"]
+
+    model = {
+        "tfidf_vectorizer": vectorizer,
+        "job_vectors": job_vectors,
+        "skill_vocab": _read_json(os.path.join(directory, "skill_vocab.json")),
+        "skill_matrix": skill_matrix,
+        "skill_index": _load_skill_index(directory, skill_matrix, mmap_mode),
+        "skill_clusters": None,
+        "cluster_centers": None,
+        "cluster_labels": np.full(n_jobs, -1, dtype=np.int32),
+        "centroid_similarity": np.zeros(n_jobs, dtype=np.float32),
+        "cluster_members": {},
+    }
+    if manifest["has_clusters"]:
+        member_rows = np.load(os.path.join(directory, "cluster_member_rows.npy"), mmap_mode=mmap_mode)
+        member_offsets = np.load(os.path.join(directory, "cluster_member_offsets.npy"))
+        member_labels = np.load(os.path.join(directory, "cluster_member_labels.npy"))
+        model.update({
+            "cluster_centers": np.load(os.path.join(directory, "cluster_centers.npy")),
+            "cluster_labels": np.load(os.path.join(directory, "cluster_labels.npy"), mmap_mode=mmap_mode),
+            "centroid_similarity": np.load(os.path.join(directory, "centroid_similarity.npy"), mmap_mode=mmap_mode),
+            "cluster_members": {
+                int(label): member_rows[member_offsets[i]:member_offsets[i + 1]]
+                for i, label in enumerate(member_labels)
+            },
+        })
+
+    with matcher._lock:
+        for name, value in model.items():
+            setattr(matcher, name, value)
+        matcher.jobs_data = jobs
+        # Building the key -> row dict is deferred until something looks a job up
+        matcher.set_job_index_loader(lambda: {
+            key: row for row, key in enumerate(_read_json(os.path.join(directory, "job_ids.json")))
+            if key is not None
+        })
+        matcher.active = np.array(np.load(os.path.join(directory, "active.npy")))
+        matcher._changes_since_fit = manifest.get("changes_since_fit", 0)
+        # Older models didn't record it; treat every saved row as clustered
+        matcher._clustered_rows = manifest.get("clustered_rows", n_jobs if manifest["has_clusters"] else 0)
+        if matcher.use_ann:
+            matcher.ann_index = matcher._build_ann_index(job_vectors)
+    matcher.model_version = version
+    logger.info(f"Loaded matcher model {version} ({n_jobs} jobs)")
+    return matcher
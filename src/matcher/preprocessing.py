@@ -0,0 +1,140 @@
+"""
+Per-job text preprocessing shared by every matcher path
+Profiles are cleaned and tokenised once per job version and cached
+"""
+
+import hashlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+# Unigrams and bigrams without English stop words, as the matcher's TF-IDF was configured
+_analyze = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), lowercase=True).build_analyzer()
+
+
+class JobProfile(NamedTuple):
+    digest: bytes
+    text: str
+    tokens: Tuple[str, ...]
+
+
+def preprocess_text(text) -> str:
+    """Replace punctuation with spaces, collapse whitespace and lowercase"""
+    if not text:
+        return ""
+
+    text = _NON_WORD.sub(' ', str(text))
+    text = _WHITESPACE.sub(' ', text)
+    return text.lower().strip()
+
+
+def analyze(document) -> List[str]:
+    """TF-IDF analyzer; token sequences from the profile cache are used as they are"""
+    if isinstance(document, (tuple, list)):
+        return document
+    return _analyze(document)
+
+
+def profile_digest(job: Dict) -> bytes:
+    """Hash of the job fields that make up its profile"""
+    content = '\0'.join([
+        str(job.get('title', '')),
+        str(job.get('company', '')),
+        '\x1f'.join(job.get('skills', [])),
+        str(job.get('description', '')),
+    ])
+    return hashlib.blake2b(content.encode(), digest_size=8).digest()
+
+
+def build_profile(job: Dict, digest: Optional[bytes] = None) -> JobProfile:
+    title = preprocess_text(job.get('title', ''))
+    company = preprocess_text(job.get('company', ''))
+    skills = ' '.join(job.get('skills', []))
+    description = preprocess_text(job.get('description', ''))
+
+    text = f"{title} {company} {skills} {description}"
+    tokens = tuple(sys.intern(token) for token in _analyze(text))
+    return JobProfile(digest or profile_digest(job), text, tokens)
+
+
+class ProfileCache:
+    """job key -> JobProfile, recomputed only when the job's content changes
+
+    Args:
+        key: Function giving a job's identity
+        max_entries: Least recently used profiles beyond this are dropped
+        workers: Processes used for batches of at least pool_threshold uncached jobs
+        pool_threshold: Smallest batch worth sending to a process pool
+    """
+
+    def __init__(self, key: Callable[[Dict], str], max_entries: int = 1000000,
+                 workers: int = 1, pool_threshold: int = 20000):
+        self.key = key
+        self.max_entries = max_entries
+        self.workers = workers
+        self.pool_threshold = pool_threshold
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def get(self, job: Dict) -> JobProfile:
+        return self.profiles([job])[0]
+
+    def profiles(self, jobs: Sequence[Dict]) -> List[JobProfile]:
+        """Profiles for jobs in order, building the missing or stale ones"""
+        results = [None] * len(jobs)
+        missing = []
+        with self._lock:
+            for i, job in enumerate(jobs):
+                key = self.key(job)
+                digest = profile_digest(job)
+                cached = self._profiles.get(key)
+                if cached is not None and cached.digest == digest:
+                    self._profiles.move_to_end(key)
+                    results[i] = cached
+                else:
+                    missing.append((i, key, digest))
+            self.hits += len(jobs) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # Built outside the lock so a long batch doesn't block lookups
+            built = self._build([jobs[i] for i, _, _ in missing], [digest for _, _, digest in missing])
+            with self._lock:
+                for (i, key, _), profile in zip(missing, built):
+                    self._profiles[key] = profile
+                    self._profiles.move_to_end(key)
+                    results[i] = profile
+                while len(self._profiles) > self.max_entries:
+                    self._profiles.popitem(last=False)
+        return results
+
+    def _build(self, jobs, digests):
+        if self.workers > 1 and len(jobs) >= self.pool_threshold:
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                built = list(pool.map(build_profile, jobs, digests, chunksize=chunksize))
+            # Tokens come back as fresh strings from each worker
+            return [profile._replace(tokens=tuple(sys.intern(t) for t in profile.tokens)) for profile in built]
+        return [build_profile(job, digest) for job, digest in zip(jobs, digests)]
+
+    def discard(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._profiles.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
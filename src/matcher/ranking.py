@@ -0,0 +1,26 @@
+"""
+Partial top-k selection over score arrays
+"""
+
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, best first
+
+    Uses a linear-time partition instead of a full sort. Ties are broken by
+    position, so the result is exactly the first k of a stable descending
+    sort and top_k_indices(scores, k) is a prefix of top_k_indices(scores, k + n).
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.lexsort((selected, -scores[selected]))]
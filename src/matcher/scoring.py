@@ -0,0 +1,200 @@
+"""
+Pluggable job scoring engines for the API
+Job-side features are prepared once per job; scoring only does query work
+The TF-IDF engine's scikit-learn dependencies are imported when it is created
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+from src.matcher.skill_extractor import canonical_skill, normalise_skill
+from src.scraper.job_record import job_key
+
+if TYPE_CHECKING:
+    from src.matcher.ml_job_matcher import MLJobMatcher
+
+
+class JobScorer:
+    """Base class for scoring engines
+
+    prepare() is called when jobs are ingested or cached and must be cheap
+    to call again for jobs it has already seen. score() returns a 0-100
+    match percentage per job.
+    """
+
+    name = ""
+
+    def prepare(self, jobs: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def score(self, user_skills: str, jobs: List[Dict]) -> List[int]:
+        raise NotImplementedError
+
+    def covers(self, user_skills: str) -> bool:
+        """False when scores for user_skills would change once the engine caught up
+        with the jobs it was given, so they shouldn't be cached"""
+        return True
+
+    def require(self, skills: List[str], jobs: List[Dict]) -> List[Dict]:
+        """Jobs listing every one of skills, compared as canonical skill ids"""
+        required = {normalise_skill(skill) for skill in skills}
+        return [
+            job for job in jobs
+            if required <= {canonical_skill(skill) or skill.lower().strip() for skill in job.get('skills', [])}
+        ]
+
+
+class KeywordScorer(JobScorer):
+    """Skill keyword overlap with the job title (weight 2) and skills (weight 1)"""
+
+    name = "keyword"
+
+    def __init__(self, max_jobs: int = 200000):
+        # job key -> (content digest, lowercased title, lowercased skills joined by NUL)
+        self._features = OrderedDict()
+        self.max_jobs = max_jobs
+
+    @staticmethod
+    def _content_digest(job: Dict) -> bytes:
+        """Hash of the fields the features are made from"""
+        content = str(job.get('title', '')) + '\0' + '\x1f'.join(job.get('skills', []))
+        return hashlib.blake2b(content.encode(), digest_size=8).digest()
+
+    @staticmethod
+    def _job_features(job: Dict):
+        title = job.get('title', '').lower()
+        # NUL never occurs in a skill, so a substring test can't span two skills
+        skills = '\0'.join(s.lower() for s in job.get('skills', []))
+        return title, skills
+
+    def prepare(self, jobs: List[Dict]) -> None:
+        for job in jobs:
+            key = job_key(job)
+            digest = self._content_digest(job)
+            cached = self._features.get(key)
+            if cached is not None and cached[0] == digest:
+                self._features.move_to_end(key)
+            else:
+                # New, or re-scraped with a different title or skills
+                self._features[key] = (digest, *self._job_features(job))
+                self._features.move_to_end(key)
+        while len(self._features) > self.max_jobs:
+            self._features.popitem(last=False)
+
+    def features(self, job: Dict):
+        cached = self._features.get(job_key(job))
+        if cached is not None and cached[0] == self._content_digest(job):
+            return cached[1:]
+        return self._job_features(job)
+
+    def score(self, user_skills: str, jobs: List[Dict]) -> List[int]:
+        skills = [s.strip().lower() for s in user_skills.split(',')]
+        skills = [s for s in skills if s]
+        if not skills:
+            return [0] * len(jobs)
+        total_weight = 2 * len(skills)
+
+        scores = []
+        for job in jobs:
+            title, job_skills = self.features(job)
+            score = 0
+            for skill in skills:
+                if skill in title:
+                    score += 2
+                elif skill in job_skills:
+                    score += 1
+            final_score = int((score / total_weight) * 100)
+            # Ensure a minimum score for relevance if it appeared in search results
+            scores.append(max(final_score, 60) if final_score > 0 else 40)
+        return scores
+
+
+class TfidfScorer(JobScorer):
+    """TF-IDF cosine similarity plus exact skill matches from MLJobMatcher
+
+    The matcher's corpus keeps the max_jobs most recently prepared jobs;
+    older ones are expired and dropped at its next refit.
+    """
+
+    name = "tfidf"
+
+    def __init__(self, matcher: "MLJobMatcher" = None, max_jobs: int = 100000):
+        if matcher is None:
+            from src.matcher.ml_job_matcher import MLJobMatcher
+            matcher = MLJobMatcher()
+        self.matcher = matcher
+        self.max_jobs = max_jobs
+        # job key -> None, least recently prepared first
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
+        if matcher.is_fitted:
+            rows = sorted((row, key) for key, row in matcher.job_index.items() if matcher.active[row])
+            self._recent.update((key, None) for _, key in rows)
+
+    def prepare(self, jobs: List[Dict]) -> None:
+        if not jobs:
+            return
+        self.matcher.add_jobs(jobs)
+        with self._recent_lock:
+            batch = set()
+            for job in jobs:
+                key = job_key(job)
+                batch.add(key)
+                self._recent[key] = None
+                self._recent.move_to_end(key)
+            # The batch is newest, so a batch larger than max_jobs stays whole until the next one
+            excess = len(self._recent) - max(self.max_jobs, len(batch))
+            expired = [self._recent.popitem(last=False)[0] for _ in range(excess)]
+        if expired:
+            self.matcher.remove_jobs(expired)
+
+    def require(self, skills: List[str], jobs: List[Dict]) -> List[Dict]:
+        """Filter with one bitmap intersection over the matcher's skill index"""
+        if not jobs:
+            return []
+        self.prepare(jobs)
+        with self.matcher._lock:
+            allowed = self.matcher.rows_with_skills(skills)
+            rows = self._rows(jobs)
+            keep = np.isin([-1 if row is None else row for row in rows], allowed)
+        return [job for job, kept in zip(jobs, keep) if kept]
+
+    def score(self, user_skills: str, jobs: List[Dict]) -> List[int]:
+        if not jobs:
+            return []
+        self.prepare(jobs)
+        skills = self.matcher.parse_user_skills(user_skills)
+        # Jobs from a new domain bring terms the fitted vocabulary lacks; without
+        # a refit the query would get no text similarity with any of them
+        self.matcher.ensure_vocabulary(skills)
+        missing = [job for job, row in zip(jobs, self._rows(jobs)) if row is None]
+        if missing:
+            # Expired by a concurrent prepare() since ours; add them back
+            self.prepare(missing)
+        with self.matcher._lock:
+            rows = self._rows(jobs)
+            found = [i for i, row in enumerate(rows) if row is not None]
+            _, found_scores = self.matcher.score_jobs(skills, [rows[i] for i in found])
+        # Jobs expired yet again score 0, as require() leaves them out
+        scores = [0] * len(jobs)
+        for i, score in zip(found, found_scores):
+            scores[i] = int(score * 100)
+        return scores
+
+    def _rows(self, jobs: List[Dict]) -> List:
+        """Matcher rows of the jobs; None for jobs not in the corpus"""
+        with self.matcher._lock:
+            return [self.matcher._job_row(job) for job in jobs]
+
+    def covers(self, user_skills: str) -> bool:
+        return not self.matcher.unseen_query_terms(self.matcher.parse_user_skills(user_skills))
+
+
+SCORERS = {
+    KeywordScorer.name: KeywordScorer,
+    TfidfScorer.name: TfidfScorer,
+}
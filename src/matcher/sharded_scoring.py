@@ -0,0 +1,249 @@
+"""
+Process-parallel scoring over shared-memory job matrices
+The CSR arrays are copied once into shared memory; each worker process maps
+them, scores its own contiguous block of rows and returns a local top-k
+"""
+
+import logging
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.matcher.ranking import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+def _share(array, blocks):
+    """Copy array into a new shared memory block; returns its (name, shape, dtype) spec"""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    blocks.append(block)
+    return block.name, array.shape, array.dtype.str
+
+
+def _attach(spec, blocks):
+    name, shape, dtype = spec
+    # Spawned workers share the parent's resource tracker, so attaching
+    # doesn't take ownership; the parent unlinks the block
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _csr_rows(parts, n_cols, start, end, blocks):
+    """CSR view of rows [start, end) of a shared matrix; only indptr is copied"""
+    data, indices, indptr = (_attach(spec, blocks) for spec in parts)
+    lo, hi = indptr[start], indptr[end]
+    local_indptr = indptr[start:end + 1] - lo
+    return sp.csr_matrix((data[lo:hi], indices[lo:hi], local_indptr), shape=(end - start, n_cols), copy=False)
+
+
+class _Shard:
+    def __init__(self, layout, start, end):
+        self.blocks = []
+        self.start = start
+        self.job_vectors = _csr_rows(layout['job_vectors'], layout['n_features'], start, end, self.blocks)
+        self.skill_matrix = _csr_rows(layout['skill_matrix'], layout['n_skills'], start, end, self.blocks)
+        self.active = _attach(layout['active'], self.blocks)[start:end]
+        self.cluster_labels = _attach(layout['cluster_labels'], self.blocks)[start:end]
+
+    def top_k(self, user_vector, skill_vector, k, cluster):
+        live = np.flatnonzero(self.active)
+        similarity = (self.job_vectors @ user_vector)[live]
+        exact_matches = (self.skill_matrix @ skill_vector)[live]
+        scores = np.minimum(similarity + exact_matches * 0.2, 1.0)
+
+        top = top_k_indices(scores, k)
+        result = (live[top] + self.start, scores[top])
+        if cluster is None:
+            return result, None
+        in_cluster = np.flatnonzero(self.cluster_labels[live] == cluster)
+        top = in_cluster[top_k_indices(scores[in_cluster], k)]
+        return result, (live[top] + self.start, scores[top])
+
+    def close(self):
+        self.job_vectors = self.skill_matrix = self.active = self.cluster_labels = None
+        for block in self.blocks:
+            block.close()
+
+
+def _worker(conn):
+    shard = None
+    while True:
+        message = conn.recv()
+        op = message[0]
+        if op == 'attach':
+            if shard is not None:
+                shard.close()
+            _, layout, start, end = message
+            shard = _Shard(layout, start, end)
+            conn.send(True)
+        elif op == 'score':
+            _, user_vector, skill_vector, k, cluster = message
+            conn.send(shard.top_k(user_vector, skill_vector, k, cluster))
+        else:
+            break
+    if shard is not None:
+        shard.close()
+
+
+class ShardedScorer:
+    """Top-k scoring of a matcher's corpus split across worker processes
+
+    publish() copies the job vectors, skill incidence, active mask and
+    cluster labels into shared memory once; queries then only send the
+    user's vectors to the workers. Rows appended to the matcher after the
+    last publish are scored in the calling process, so adding a few jobs
+    doesn't force a republish. Workers are started with the spawn method,
+    which is safe from threaded servers.
+
+    Args:
+        workers: Number of worker processes (one shard each)
+        republish_fraction: Republish once this fraction of rows is unpublished
+    """
+
+    def __init__(self, workers=None, republish_fraction=0.1):
+        self.workers = workers or os.cpu_count() or 1
+        self.republish_fraction = republish_fraction
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._connections = []
+        self._blocks = []
+        self._active = None
+        # Matcher generation and size of the published matrices
+        self._published = None
+        self.skill_width = 0
+        self.n_rows = 0
+
+    def _start(self):
+        for _ in range(self.workers):
+            parent, child = self._context.Pipe()
+            process = self._context.Process(target=_worker, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._processes.append(process)
+            self._connections.append(parent)
+
+    def publish(self, matcher):
+        """Copy the matcher's current matrices into shared memory and remap the workers"""
+        if not self._processes:
+            self._start()
+
+        blocks = []
+        layout = {
+            'n_features': matcher.job_vectors.shape[1],
+            'n_skills': matcher.skill_matrix.shape[1],
+            'job_vectors': [_share(getattr(matcher.job_vectors, part), blocks) for part in ('data', 'indices', 'indptr')],
+            'skill_matrix': [_share(getattr(matcher.skill_matrix, part), blocks) for part in ('data', 'indices', 'indptr')],
+            'active': _share(matcher.active, blocks),
+            'cluster_labels': _share(matcher.cluster_labels, blocks),
+        }
+        n_rows = matcher.job_vectors.shape[0]
+        bounds = np.linspace(0, n_rows, self.workers + 1).astype(int)
+        for conn, start, end in zip(self._connections, bounds[:-1], bounds[1:]):
+            conn.send(('attach', layout, int(start), int(end)))
+        for conn in self._connections:
+            conn.recv()
+
+        self._active = None
+        self._release(self._blocks)
+        self._blocks = blocks
+        active_block = next(block for block in blocks if block.name == layout['active'][0])
+        self._active = np.ndarray(matcher.active.shape, dtype=bool, buffer=active_block.buf)
+        self._published = matcher._model_generation
+        self.skill_width = layout['n_skills']
+        self.n_rows = n_rows
+        logger.info(f"Published {n_rows} job rows to {self.workers} scoring workers")
+
+    def _stale(self, matcher):
+        # Refits and re-clusters bump the generation; add_jobs only appends rows
+        if self._published is None or self._published != matcher._model_generation:
+            return True
+        unpublished = matcher.job_vectors.shape[0] - self.n_rows
+        return unpublished > self.republish_fraction * max(self.n_rows, 1)
+
+    def top_k(self, matcher, user_skills, k, cluster=None):
+        """Best k (rows, scores) over the active corpus, and within cluster if given
+
+        Must be called with the matcher's lock held. Results match
+        score_jobs followed by top_k_indices, ties included.
+        """
+        if self._stale(matcher):
+            self.publish(matcher)
+        # Jobs can be expired in place at any time
+        self._active[...] = matcher.active[:self.n_rows]
+
+        user_vector = matcher._user_vector(user_skills)
+        skill_vector = matcher._user_skill_vector(user_skills)[:self.skill_width]
+        for conn in self._connections:
+            conn.send(('score', user_vector, skill_vector, k, cluster))
+        parts = [conn.recv() for conn in self._connections]
+
+        overall = [part[0] for part in parts]
+        in_cluster = [part[1] for part in parts] if cluster is not None else []
+
+        n_rows = matcher.job_vectors.shape[0]
+        if n_rows > self.n_rows:
+            tail = self.n_rows + np.flatnonzero(matcher.active[self.n_rows:])
+            rows, scores = matcher.score_jobs(user_skills, tail)
+            top = top_k_indices(scores, k)
+            overall.append((rows[top], scores[top]))
+            if cluster is not None:
+                members = np.flatnonzero(matcher.cluster_labels[rows] == cluster)
+                top = members[top_k_indices(scores[members], k)]
+                in_cluster.append((rows[top], scores[top]))
+
+        return self._merge(overall, k), self._merge(in_cluster, k) if cluster is not None else None
+
+    @staticmethod
+    def _merge(parts, k):
+        # Parts are in row order, so a stable selection keeps ties in row order
+        if not parts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        rows = np.concatenate([part[0] for part in parts])
+        scores = np.concatenate([part[1] for part in parts])
+        top = top_k_indices(scores, k)
+        return rows[top], scores[top]
+
+    @staticmethod
+    def _release(blocks):
+        for block in blocks:
+            try:
+                block.close()
+                block.unlink()
+            except Exception:
+                pass
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        for conn in self._connections:
+            try:
+                conn.send(('close',))
+            except Exception:
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._discard()
+
+    def reset(self):
+        """Kill the workers after one has died; the next query starts a fresh pool and republishes"""
+        for process in self._processes:
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=5)
+        self._discard()
+
+    def _discard(self):
+        for conn in self._connections:
+            conn.close()
+        self._processes = []
+        self._connections = []
+        self._active = None
+        self._release(self._blocks)
+        self._blocks = []
+        self._published = None
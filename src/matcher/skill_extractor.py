@@ -0,0 +1,206 @@
+"""
+Shared skill dictionary and extractor
+One compiled pattern used by every scraper and the matcher
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# canonical skill id -> (display name, aliases)
+SKILLS = {
+    # Programming languages
+    'python': ('Python', []),
+    'java': ('Java', []),
+    'javascript': ('JavaScript', ['js']),
+    'typescript': ('TypeScript', []),
+    'c++': ('C++', ['cpp']),
+    'c#': ('C#', ['csharp']),
+    'php': ('PHP', []),
+    'ruby': ('Ruby', []),
+    'go': ('Go', ['golang']),
+    'rust': ('Rust', []),
+    'scala': ('Scala', []),
+    'kotlin': ('Kotlin', []),
+    'swift': ('Swift', []),
+    'dart': ('Dart', []),
+    'objective-c': ('Objective-C', []),
+    'sql': ('SQL', []),
+    # Web frontend
+    'react': ('React', ['react.js', 'reactjs']),
+    'angular': ('Angular', ['angularjs', 'angular.js']),
+    'vue': ('Vue', ['vue.js', 'vuejs']),
+    'html': ('HTML', ['html5']),
+    'css': ('CSS', ['css3']),
+    'sass': ('Sass', ['scss']),
+    'less': ('Less', []),
+    'bootstrap': ('Bootstrap', []),
+    'tailwind': ('Tailwind', ['tailwind css', 'tailwindcss']),
+    'jquery': ('jQuery', []),
+    'webpack': ('Webpack', []),
+    'babel': ('Babel', []),
+    # Web backend
+    'node.js': ('Node.js', ['nodejs', 'node']),
+    'express': ('Express', ['express.js', 'expressjs']),
+    'django': ('Django', []),
+    'flask': ('Flask', []),
+    'spring': ('Spring', []),
+    'spring boot': ('Spring Boot', ['springboot']),
+    'laravel': ('Laravel', []),
+    'rails': ('Rails', ['ruby on rails']),
+    'asp.net': ('ASP.NET', []),
+    '.net': ('.NET', ['dotnet']),
+    'fastapi': ('FastAPI', []),
+    'nestjs': ('NestJS', []),
+    'rest api': ('REST API', ['rest apis', 'restful api', 'restful apis']),
+    'graphql': ('GraphQL', []),
+    'microservices': ('Microservices', ['microservice']),
+    # Databases
+    'mysql': ('MySQL', []),
+    'postgresql': ('PostgreSQL', ['postgres']),
+    'mongodb': ('MongoDB', ['mongo']),
+    'redis': ('Redis', []),
+    'elasticsearch': ('Elasticsearch', ['elastic search']),
+    'cassandra': ('Cassandra', []),
+    'dynamodb': ('DynamoDB', []),
+    'sqlite': ('SQLite', []),
+    'oracle': ('Oracle', []),
+    'sql server': ('SQL Server', ['mssql']),
+    # Cloud and DevOps
+    'aws': ('AWS', ['amazon web services']),
+    'azure': ('Azure', []),
+    'gcp': ('GCP', ['google cloud', 'google cloud platform']),
+    'docker': ('Docker', []),
+    'kubernetes': ('Kubernetes', ['k8s']),
+    'jenkins': ('Jenkins', []),
+    'terraform': ('Terraform', []),
+    'ansible': ('Ansible', []),
+    'chef': ('Chef', []),
+    'puppet': ('Puppet', []),
+    'gitlab ci': ('GitLab CI', []),
+    'github actions': ('GitHub Actions', []),
+    'git': ('Git', []),
+    'linux': ('Linux', []),
+    'devops': ('DevOps', []),
+    'ci/cd': ('CI/CD', ['ci cd', 'cicd']),
+    # Data
+    'machine learning': ('Machine Learning', ['ml']),
+    'deep learning': ('Deep Learning', []),
+    'data science': ('Data Science', []),
+    'ai': ('AI', ['artificial intelligence']),
+    'tensorflow': ('TensorFlow', []),
+    'pytorch': ('PyTorch', []),
+    'pandas': ('Pandas', []),
+    'numpy': ('NumPy', []),
+    'scikit-learn': ('Scikit-Learn', ['sklearn', 'scikit learn']),
+    'keras': ('Keras', []),
+    'opencv': ('OpenCV', []),
+    'nltk': ('NLTK', []),
+    'kafka': ('Kafka', []),
+    'spark': ('Spark', ['apache spark', 'pyspark']),
+    'hadoop': ('Hadoop', []),
+    # Mobile
+    'react native': ('React Native', []),
+    'flutter': ('Flutter', []),
+    'ios': ('iOS', []),
+    'android': ('Android', []),
+    'xamarin': ('Xamarin', []),
+    'ionic': ('Ionic', []),
+    'cordova': ('Cordova', []),
+}
+
+# Characters that may be part of a skill name, so they cannot border a match
+_BEFORE = r'(?<![\w.+#])'
+_AFTER = r'(?![\w+#]|\.\w)'
+
+
+def _trie_pattern(node):
+    """Regex for a character trie; shared prefixes are matched once"""
+    alternatives = []
+    for char in sorted(key for key in node if key):
+        # Multi-word skills also match across extra whitespace or hyphens
+        escaped = r'[\s\-]+' if char == ' ' else re.escape(char)
+        alternatives.append(escaped + _trie_pattern(node[char]))
+
+    if not alternatives:
+        return ''
+    optional = '' in node
+    if len(alternatives) == 1 and not optional:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')' + ('?' if optional else '')
+
+
+class SkillExtractor:
+    """Extract canonical skill ids from free text in a single pass
+
+    All names and aliases are compiled into one word-bounded regex shaped
+    like a trie, so each text position is tested against at most one branch
+    per character. "go" no longer matches "google" and "ai" no longer
+    matches "maintain".
+    """
+
+    def __init__(self, skills: Dict[str, tuple] = SKILLS):
+        self.display_names = {skill_id: display for skill_id, (display, _) in skills.items()}
+        self.aliases = {}
+        for skill_id, (display, aliases) in skills.items():
+            for name in [skill_id, display, *aliases]:
+                self.aliases[self._normalise(name)] = skill_id
+
+        trie = {}
+        for name in self.aliases:
+            node = trie
+            for char in name:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.pattern = re.compile(_BEFORE + '(' + _trie_pattern(trie) + ')' + _AFTER)
+
+    @staticmethod
+    def _normalise(name: str) -> str:
+        return re.sub(r'[\s\-]+', ' ', str(name).lower().strip())
+
+    def extract(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Canonical skill ids in order of first appearance"""
+        if not text:
+            return []
+
+        found = []
+        seen = set()
+        for match in self.pattern.finditer(str(text).lower()):
+            skill_id = self.aliases.get(self._normalise(match.group(1)))
+            if skill_id and skill_id not in seen:
+                seen.add(skill_id)
+                found.append(skill_id)
+                if limit and len(found) >= limit:
+                    break
+        return found
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical id for a single skill name, or None if it is not in the dictionary"""
+        return self.aliases.get(self._normalise(name))
+
+    def display_name(self, skill_id: str) -> str:
+        return self.display_names.get(skill_id, skill_id)
+
+    def extract_display(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Display names of the skills found in text"""
+        return [self.display_name(skill_id) for skill_id in self.extract(text, limit)]
+
+
+skill_extractor = SkillExtractor()
+
+
+def extract_skills(text: str, limit: Optional[int] = None) -> List[str]:
+    """Canonical skill ids found in text using the shared extractor"""
+    return skill_extractor.extract(text, limit)
+
+
+def canonical_skill(name: str) -> Optional[str]:
+    return skill_extractor.canonical(name)
+
+
+def normalise_skill(skill) -> str:
+    """Canonical id of a known skill, otherwise the lowercased name"""
+    return canonical_skill(skill) or str(skill).lower().strip()
+
+
+def skill_display_name(skill_id: str) -> str:
+    return skill_extractor.display_name(skill_id)
@@ -0,0 +1,229 @@
+"""
+Skill bitmap index over matcher rows
+Canonical skill column -> bitmap of job rows, plus each job's skill columns
+in CSR form, so skill filters are bitwise operations over the corpus and
+overlap counts for a few rows only touch those rows' skills
+"""
+
+import numpy as np
+
+_WORD_BITS = 64
+
+
+def _n_words(n_bits):
+    return (n_bits + _WORD_BITS - 1) // _WORD_BITS
+
+
+def rows_to_words(rows, n_rows):
+    """Packed little-endian bitmap of a row array"""
+    mask = np.zeros(_n_words(n_rows) * _WORD_BITS, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask, bitorder='little').view(np.uint64)
+
+
+def words_to_rows(words, n_rows):
+    """Sorted row array of a packed bitmap"""
+    bits = np.unpackbits(words.view(np.uint8), bitorder='little', count=n_rows)
+    return np.flatnonzero(bits)
+
+
+class SkillBitmap:
+    """Row set stored as a sorted int32 array while sparse, packed words once dense
+
+    The dense form costs n_rows / 8 bytes whatever the count, the sparse
+    form 4 bytes per row, so a skill switches to words once it covers more
+    than 1 in 32 rows. Rows are appended in increasing order.
+    """
+
+    __slots__ = ('_chunks', 'rows', 'words', 'count')
+
+    def __init__(self):
+        self._chunks = []
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.words = None
+        self.count = 0
+
+    def append(self, rows):
+        self._chunks.append(np.asarray(rows, dtype=np.int32))
+        self.count += len(rows)
+
+    def _consolidate(self, n_rows):
+        if self._chunks:
+            new_rows = np.concatenate(self._chunks)
+            self._chunks = []
+            if self.words is not None:
+                words = rows_to_words(new_rows, n_rows)
+                self.words = np.concatenate([self.words, np.zeros(len(words) - len(self.words), dtype=np.uint64)])
+                self.words |= words
+            else:
+                self.rows = np.concatenate([self.rows, new_rows])
+        if self.words is None and self.count * 32 > n_rows:
+            self.words = rows_to_words(self.rows, n_rows)
+            self.rows = None
+
+    def to_words(self, n_rows):
+        self._consolidate(n_rows)
+        if self.words is not None:
+            words = self.words
+            if len(words) < _n_words(n_rows):
+                words = np.concatenate([words, np.zeros(_n_words(n_rows) - len(words), dtype=np.uint64)])
+            return words
+        return rows_to_words(self.rows, n_rows)
+
+    def to_rows(self, n_rows):
+        self._consolidate(n_rows)
+        if self.words is not None:
+            return words_to_rows(self.words, n_rows)
+        return self.rows
+
+    def nbytes(self):
+        return self.words.nbytes if self.words is not None else self.rows.nbytes
+
+
+class SkillBitmapIndex:
+    """Inverted skill bitmaps and per-job skill sets for matcher rows
+
+    Skills are the matcher's skill_vocab columns. Rows are only ever
+    appended; expired jobs are excluded by the caller's active mask. Each
+    job's skills are kept as CSR indptr/indices arrays, the same arrays as
+    the skill incidence matrix when the index is built from one.
+    """
+
+    def __init__(self):
+        self.bitmaps = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.n_rows = 0
+        self.n_skills = 0
+
+    @classmethod
+    def from_csr(cls, skill_matrix):
+        """Index built from a binary job x skill CSR matrix, sharing its arrays"""
+        index = cls()
+        index._add_bitmaps(np.asarray(skill_matrix.indptr), np.asarray(skill_matrix.indices), 0)
+        index.indptr = np.asarray(skill_matrix.indptr)
+        index.indices = np.asarray(skill_matrix.indices)
+        index.n_rows, index.n_skills = skill_matrix.shape
+        return index
+
+    def add_csr(self, skill_matrix):
+        """Append the rows of a binary job x skill CSR matrix"""
+        indptr = np.asarray(skill_matrix.indptr)
+        columns = np.asarray(skill_matrix.indices)
+        self._add_bitmaps(indptr, columns, self.n_rows)
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + indptr[1:].astype(np.int64)])
+        self.indices = np.concatenate([self.indices, columns])
+        self.n_rows += len(indptr) - 1
+        self.n_skills = max(self.n_skills, skill_matrix.shape[1])
+
+    def _add_bitmaps(self, indptr, columns, start):
+        if not len(columns):
+            return
+        rows = start + np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+        order = np.argsort(columns, kind='stable')
+        sorted_columns = columns[order]
+        bounds = np.flatnonzero(np.diff(sorted_columns)) + 1
+        for group in np.split(order, bounds):
+            column = int(columns[group[0]])
+            self.bitmaps.setdefault(column, SkillBitmap()).append(rows[group])
+
+    def arrays(self):
+        """The bitmaps as flat arrays, for saving next to the skill incidence matrix
+
+        Sparse bitmaps are concatenated row arrays with offsets; dense ones
+        are rows of a 2-D word array.
+        """
+        sparse, dense = [], []
+        for column in sorted(self.bitmaps):
+            bitmap = self.bitmaps[column]
+            bitmap._consolidate(self.n_rows)
+            if bitmap.words is None:
+                sparse.append((column, bitmap.rows))
+            else:
+                dense.append((column, bitmap.to_words(self.n_rows)))
+        n_words = _n_words(self.n_rows)
+        return {
+            'sparse_columns': np.asarray([column for column, _ in sparse], dtype=np.int64),
+            'sparse_offsets': np.cumsum([0] + [len(rows) for _, rows in sparse]).astype(np.int64),
+            'sparse_rows': np.concatenate([rows for _, rows in sparse]) if sparse else np.zeros(0, dtype=np.int32),
+            'dense_columns': np.asarray([column for column, _ in dense], dtype=np.int64),
+            'dense_counts': np.asarray([self.bitmaps[column].count for column, _ in dense], dtype=np.int64),
+            'dense_words': np.stack([words for _, words in dense]) if dense else np.zeros((0, n_words), dtype=np.uint64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, skill_matrix):
+        """Index over skill_matrix from arrays(); the arrays may be memory-mapped read-only"""
+        index = cls()
+        index.indptr = np.asarray(skill_matrix.indptr)
+        index.indices = np.asarray(skill_matrix.indices)
+        index.n_rows, index.n_skills = skill_matrix.shape
+        offsets = arrays['sparse_offsets']
+        for i, column in enumerate(arrays['sparse_columns']):
+            bitmap = SkillBitmap()
+            bitmap.rows = arrays['sparse_rows'][offsets[i]:offsets[i + 1]]
+            bitmap.count = len(bitmap.rows)
+            index.bitmaps[int(column)] = bitmap
+        for column, count, words in zip(arrays['dense_columns'], arrays['dense_counts'], arrays['dense_words']):
+            bitmap = SkillBitmap()
+            bitmap.rows = None
+            bitmap.words = words
+            bitmap.count = int(count)
+            index.bitmaps[int(column)] = bitmap
+        return index
+
+    def skill_words(self, column):
+        bitmap = self.bitmaps.get(column)
+        if bitmap is None:
+            return np.zeros(_n_words(self.n_rows), dtype=np.uint64)
+        return bitmap.to_words(self.n_rows)
+
+    def rows_with_any(self, columns):
+        """Rows having at least one of the skill columns"""
+        words = np.zeros(_n_words(self.n_rows), dtype=np.uint64)
+        for column in set(columns):
+            words |= self.skill_words(column)
+        return words_to_rows(words, self.n_rows)
+
+    def rows_with_all(self, columns):
+        """Rows having every one of the skill columns"""
+        columns = set(columns)
+        if not columns:
+            return np.arange(self.n_rows)
+        words = None
+        for column in columns:
+            bitmap_words = self.skill_words(column)
+            words = bitmap_words.copy() if words is None else words & bitmap_words
+        return words_to_rows(words, self.n_rows)
+
+    def overlap_counts(self, columns, rows=None):
+        """Number of the skill columns each row has
+
+        Whole-corpus queries add up the skills' bitmaps; small row subsets
+        look the user's skills up in just those rows' skill lists.
+        """
+        columns = {column for column in columns if column < self.n_skills}
+        if rows is None:
+            rows = np.arange(self.n_rows)
+        rows = np.asarray(rows, dtype=np.intp)
+        if not columns or not len(rows):
+            return np.zeros(len(rows), dtype=np.int32)
+
+        if len(rows) * 4 >= self.n_rows:
+            counts = np.zeros(self.n_rows, dtype=np.int32)
+            for column in columns:
+                bitmap = self.bitmaps.get(column)
+                if bitmap is not None:
+                    counts[bitmap.to_rows(self.n_rows)] += 1
+            return counts[rows]
+
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        # Position of every skill of the wanted rows in indices
+        positions = np.arange(len(owners)) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        shared = np.isin(self.indices[positions], np.fromiter(columns, dtype=np.int64))
+        return np.bincount(owners[shared], minlength=len(rows)).astype(np.int32)
+
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + sum(bitmap.nbytes() for bitmap in self.bitmaps.values())
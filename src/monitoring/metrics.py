@@ -0,0 +1,316 @@
+"""
+Process-local metrics registry rendered in the Prometheus text format
+Counters, gauges and histograms with labels, plus collectors whose values
+are read from existing objects (caches, queues) when metrics are scraped
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers cached API hits (ms) up to full browser scrapes (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float, Sequence[str]]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, values, value, labelnames in self.samples():
+            lines.append(f"{name}{_label_text(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def total(self) -> float:
+        return sum(self.values().values())
+
+    def samples(self):
+        for key, value in sorted(self.values().items()):
+            yield self.name, key, value, self.labelnames
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str):
+        """Count the block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def series(self) -> Dict[LabelValues, Tuple[List[int], float, int]]:
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+
+    def summary(self, key: Optional[LabelValues] = None) -> Dict[str, float]:
+        """count, mean and estimated p50/p95/p99 for one label set, or all of them merged"""
+        selected = self.series()
+        if key is not None:
+            selected = {key: selected[key]} if key in selected else {}
+        counts = [0] * len(self.buckets)
+        total, count = 0.0, 0
+        for series_counts, series_total, series_count in selected.values():
+            counts = [a + b for a, b in zip(counts, series_counts)]
+            total += series_total
+            count += series_count
+        return {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": self._quantile(counts, count, 0.5),
+            "p95": self._quantile(counts, count, 0.95),
+            "p99": self._quantile(counts, count, 0.99),
+        }
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        # Linear interpolation inside the bucket, as Prometheus' histogram_quantile does
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i]
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-2]
+
+    def samples(self):
+        labelnames = self.labelnames + ("le",)
+        for key, (counts, total, count) in sorted(self.series().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", key + (_format_value(bound),), cumulative, labelnames
+            yield f"{self.name}_sum", key, total, self.labelnames
+            yield f"{self.name}_count", key, count, self.labelnames
+
+
+class Collector(_Metric):
+    """Metric whose values are read by a function when metrics are collected
+
+    collect() returns {label values tuple: value}; for unlabelled metrics
+    a single number is accepted.
+    """
+
+    def __init__(self, name: str, documentation: str, collect: Callable, labelnames: Sequence[str] = (),
+                 type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.type = type
+
+    def values(self) -> Dict[LabelValues, float]:
+        values = self.collect()
+        if not isinstance(values, dict):
+            return {(): values}
+        return {tuple(str(v) for v in key): value for key, value in values.items()}
+
+    def samples(self):
+        for key, value in sorted(self.values().items()):
+            yield self.name, key, value, self.labelnames
+
+
+class Registry:
+    """Named metrics, rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules may be reloaded; keep the recorded values
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                if isinstance(metric, Collector):
+                    existing.collect = metric.collect
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, name: str, documentation: str, collect: Callable,
+                  labelnames: Sequence[str] = (), type: str = "gauge") -> Collector:
+        return self.register(Collector(name, documentation, collect, labelnames, type))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Starlette appends the charset to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Metrics recorded by the scrapers, the matcher and the API
+
+jobs_scraped_per_source = REGISTRY.counter(
+    "jobs_scraped_per_source", "Jobs returned by scrapes, by job source", ("source",)
+)
+scrapes = REGISTRY.counter(
+    "scrapes_total", "Scrape runs by source and outcome (ok, empty, error)", ("source", "outcome")
+)
+scrape_seconds = REGISTRY.histogram(
+    "scrape_duration_seconds", "Time for one scrape run", ("source",)
+)
+page_fetch_seconds = REGISTRY.histogram(
+    "scraper_page_fetch_seconds", "Time to load one result page, by HTTP status", ("source", "status")
+)
+page_parse_seconds = REGISTRY.histogram(
+    "scraper_page_parse_seconds", "Time to extract the job cards of one result page", ("source",)
+)
+browsers_active = REGISTRY.gauge(
+    "scraper_browsers_active", "Browsers currently open", ("source",)
+)
+scoring_seconds = REGISTRY.histogram(
+    "scoring_duration_seconds", "Time per scoring step for one query", ("engine", "step")
+)
+api_requests = REGISTRY.counter(
+    "api_requests_total", "HTTP requests by route, method and status code", ("route", "method", "status")
+)
+api_latency = REGISTRY.histogram(
+    "api_latency_seconds", "HTTP request latency by route and method", ("route", "method")
+)
+api_in_flight = REGISTRY.gauge(
+    "api_requests_in_flight", "HTTP requests being served"
+)
+
+
+def _scraper_error_rate():
+    totals, errors = {}, {}
+    for (source, outcome), value in scrapes.values().items():
+        totals[source] = totals.get(source, 0) + value
+        if outcome == "error":
+            errors[source] = errors.get(source, 0) + value
+    return {(source,): errors.get(source, 0) / total for source, total in totals.items() if total}
+
+
+scraper_error_rate = REGISTRY.collector(
+    "scraper_error_rate", "Fraction of scrape runs that failed, by source", _scraper_error_rate, ("source",)
+)
@@ -0,0 +1,109 @@
+"""
+Lightweight request tracing
+A trace is a tree of timed spans kept in a context variable, so spans
+opened anywhere under a request (scraper, scoring) attach to it. Outside
+a trace span() does nothing.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[Optional["Span"]] = ContextVar("current_trace", default=None)
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+
+class Span:
+    """One timed step, with attributes and the steps it contains"""
+
+    __slots__ = ("name", "attributes", "children", "start", "end")
+
+    def __init__(self, name: str, attributes: Optional[Dict] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds; spans still open report the time so far"""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict:
+        """The span tree with times in milliseconds from the root's start"""
+        origin = self.start if origin is None else origin
+        tree = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attributes:
+            tree["attributes"] = self.attributes
+        if self.children:
+            tree["children"] = [child.to_dict(origin) for child in self.children]
+        return tree
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """Start a new trace whose root span covers the block"""
+    root = Span(name, attributes)
+    trace_token = _current_trace.set(root)
+    span_token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span, if a trace is active"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def current_trace() -> Optional[Span]:
+    return _current_trace.get()
+
+
+def server_timing(root: Span) -> str:
+    """Server-Timing header value: total time per span name, with call counts above one"""
+    totals: Dict[str, List[float]] = {}
+    for item in root.walk():
+        if item is root:
+            continue
+        entry = totals.setdefault(_TOKEN_UNSAFE.sub("_", item.name), [0.0, 0])
+        entry[0] += item.duration
+        entry[1] += 1
+
+    metrics = []
+    for name, (seconds, calls) in totals.items():
+        metric = f"{name};dur={seconds * 1000:.1f}"
+        if calls > 1:
+            metric += f';desc="{calls} calls"'
+        metrics.append(metric)
+    metrics.append(f"total;dur={root.duration * 1000:.1f}")
+    return ", ".join(metrics)
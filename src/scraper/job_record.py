@@ -0,0 +1,201 @@
+"""
+Compact in-memory job posting
+Scraped jobs are kept as slotted records and only turned back into the
+JSON dict shape when a response is built
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Dict, Optional, Tuple
+
+# Keys of a scraped job, in the order they are serialised
+FIELDS = (
+    'job_id', 'title', 'company', 'location', 'apply_link', 'url', 'apply_source', 'source',
+    'posted_date', 'thumbnail', 'company_logo', 'description', 'salary', 'schedule_type',
+    'is_remote', 'experience_level', 'applicants', 'skills', 'qualifications', 'requirements',
+    'experience', 'benefits', 'responsibilities', 'scraped_at',
+)
+
+# Duplicated keys; they are stored once unless the scraper gave them different values
+ALIASES = {'url': 'apply_link', 'apply_source': 'source', 'company_logo': 'thumbnail'}
+
+# Low-cardinality strings shared by many postings
+INTERNED = frozenset({
+    'company', 'location', 'source', 'apply_source', 'posted_date', 'salary',
+    'schedule_type', 'experience_level', 'applicants', 'experience',
+})
+
+SEQUENCES = frozenset({'skills', 'qualifications', 'requirements', 'benefits', 'responsibilities'})
+
+EMPTY: Tuple = ()
+
+# Marks an aliased key whose value is the same as its partner's
+_SAME = object()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _sequence(value):
+    if not value:
+        return EMPTY
+    if isinstance(value, str):
+        return (_intern(value),)
+    return tuple(_intern(item) for item in value)
+
+
+def _alias(name):
+    partner = ALIASES[name]
+    slot = '_' + name
+
+    def get(self):
+        value = getattr(self, slot)
+        return getattr(self, partner) if value is _SAME else value
+
+    return property(get)
+
+
+class JobRecord(Mapping):
+    """Slotted job posting that reads like the scraper's job dict
+
+    Supports job['title'], job.get('skills', []), 'url' in job and
+    iteration over keys, so matcher and API code can take records or dicts.
+    Sequences are stored as tuples (one shared empty tuple), repeated
+    strings are interned and aliased keys such as url/apply_link share a
+    slot. Keys absent from the source dict stay absent (their slot is
+    unset). Records are read-only; copy() and to_dict() return a plain
+    dict in the original JSON shape.
+    """
+
+    __slots__ = tuple(name for name in FIELDS if name not in ALIASES) + tuple(
+        '_' + name for name in ALIASES
+    ) + ('extra',)
+
+    job_id: str
+    title: str
+    company: str
+    location: str
+    apply_link: str
+    source: str
+    posted_date: str
+    thumbnail: Optional[str]
+    description: str
+    salary: str
+    schedule_type: str
+    is_remote: bool
+    experience_level: str
+    applicants: str
+    skills: Tuple[str, ...]
+    qualifications: Tuple[str, ...]
+    requirements: Tuple[str, ...]
+    experience: str
+    benefits: Tuple[str, ...]
+    responsibilities: Tuple[str, ...]
+    scraped_at: str
+    extra: Optional[Dict]
+
+    url = _alias('url')
+    apply_source = _alias('apply_source')
+    company_logo = _alias('company_logo')
+
+    def __init__(self, **fields):
+        set_slot = object.__setattr__
+        for name in FIELDS:
+            if name not in fields:
+                continue
+            value = fields.pop(name)
+            if name in SEQUENCES:
+                value = _sequence(value)
+            elif name in INTERNED:
+                value = _intern(value)
+            set_slot(self, name if name not in ALIASES else '_' + name, value)
+        for alias, partner in ALIASES.items():
+            value = getattr(self, '_' + alias, _SAME)
+            if value is not _SAME and value == getattr(self, partner, _SAME):
+                set_slot(self, '_' + alias, _SAME)
+        # Keys the scrapers don't normally produce are kept as they are
+        set_slot(self, 'extra', fields or None)
+
+    @classmethod
+    def from_dict(cls, job: Dict) -> 'JobRecord':
+        if isinstance(job, cls):
+            return job
+        return cls(**job)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("JobRecord is read-only; use to_dict() for a mutable copy")
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self):
+        for name in FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == job_to_dict(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (_from_dict, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"JobRecord(job_id={self.get('job_id')!r}, title={self.get('title')!r})"
+
+    def to_dict(self) -> Dict:
+        """The job in the scraper's JSON dict shape"""
+        job = {}
+        for name in FIELDS:
+            value = getattr(self, name, _SAME)
+            if value is _SAME:
+                continue
+            job[name] = list(value) if name in SEQUENCES else value
+        if self.extra:
+            job.update(self.extra)
+        return job
+
+    copy = to_dict
+
+
+_FIELD_SET = frozenset(FIELDS)
+
+
+def _from_dict(job):
+    return JobRecord(**job)
+
+
+def job_key(job) -> str:
+    """Stable identity of a job across scrapes"""
+    return str(job.get('id') or job.get('job_id') or f"{job.get('title', '')}_{job.get('company', '')}")
+
+
+def job_to_dict(job) -> Dict:
+    """A new plain dict for a JobRecord or job dict, safe to modify and serialise"""
+    return job.to_dict() if isinstance(job, JobRecord) else dict(job)
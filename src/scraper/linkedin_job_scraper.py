@@ -8,6 +8,8 @@ import logging
 import time
 from typing import List, Dict, Optional
 
+from src.matcher.skill_extractor import skill_extractor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -264,7 +266,14 @@ class LinkedInJobScraper:
         elif isinstance(skills_data, list):
             skills = [str(s).strip() for s in skills_data if s]
         
-        return skills[:10]  # Limit to 10 skills
+        # Canonicalise known skills; keep entries the dictionary doesn't know
+        canonical = []
+        for skill in skills:
+            for name in skill_extractor.extract_display(skill) or [skill]:
+                if name not in canonical:
+                    canonical.append(name)
+        
+        return canonical[:10]  # Limit to 10 skills
 
 
 class RealJobScraper:
@@ -7,10 +7,17 @@ import asyncio
 import logging
 import re
 import random
+import time
 from typing import List, Dict, Optional
 from datetime import datetime
 from urllib.parse import quote_plus
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+from src.matcher.skill_extractor import skill_extractor
+from src.scraper.job_record import JobRecord
+from src.monitoring.metrics import (
+    browsers_active, jobs_scraped_per_source, page_fetch_seconds, page_parse_seconds, scrape_seconds, scrapes
+)
+from src.monitoring.tracing import span
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,12 +51,17 @@ class LinkedInJobScraper:
             self.logger.info(f"🔍 Scraping LinkedIn for: '{keywords}' in '{location}'")
             
             # Use LinkedIn's guest API for better reliability
-            jobs = await self._scrape_with_guest_api(keywords, location, max_results)
+            with scrape_seconds.time(source="LinkedIn"):
+                jobs = await self._scrape_with_guest_api(keywords, location, max_results)
             
+            jobs = jobs[:max_results]
+            for job in jobs:
+                jobs_scraped_per_source.inc(source=job.get('source') or "LinkedIn")
             self.logger.info(f"✅ Successfully scraped {len(jobs)} jobs from LinkedIn")
-            return jobs[:max_results]
+            return jobs
             
         except Exception as e:
+            scrapes.inc(source="LinkedIn", outcome="error")
             self.logger.error(f"❌ Error scraping LinkedIn: {str(e)}")
             # Return fallback jobs
             # Return empty list if scraping fails
@@ -59,6 +71,9 @@ class LinkedInJobScraper:
         """
         Scrape using LinkedIn guest API (more reliable)
         """
+        # Imported here so importing the scraper doesn't load Playwright
+        from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+        
         jobs = []
         
         async with async_playwright() as p:
@@ -66,15 +81,17 @@ class LinkedInJobScraper:
                 self.logger.info("🌐 Launching browser with stealth mode...")
                 
                 # Launch with extra stealth options
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox'
-                    ]
-                )
+                with span("browser_launch"):
+                    browser = await p.chromium.launch(
+                        headless=True,
+                        args=[
+                            '--disable-blink-features=AutomationControlled',
+                            '--disable-dev-shm-usage',
+                            '--no-sandbox',
+                            '--disable-setuid-sandbox'
+                        ]
+                    )
+                browsers_active.inc(source="LinkedIn")
                 
                 user_agents = [
                     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -120,17 +137,24 @@ class LinkedInJobScraper:
                     self.logger.info(f"📄 Loading jobs from: {url}")
                     
                     # Navigate with longer timeout
-                    response = await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+                    fetch_started = time.perf_counter()
+                    with span("page_goto", start=start):
+                        response = await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+                    page_fetch_seconds.observe(
+                        time.perf_counter() - fetch_started, source="LinkedIn", status=str(response.status)
+                    )
                     
                     if response.status != 200:
                         self.logger.warning(f"⚠️  Got status {response.status} from LinkedIn")
                         break
                     
                     # Wait a bit for content to load
-                    await asyncio.sleep(random.uniform(2, 4))
+                    with span("sleep"):
+                        await asyncio.sleep(random.uniform(2, 4))
                     
                     # Parse job cards from the HTML
-                    new_jobs = await self._parse_jobs_from_html(page, keywords)
+                    with span("parse"), page_parse_seconds.time(source="LinkedIn"):
+                        new_jobs = await self._parse_jobs_from_html(page, keywords)
                     
                     if not new_jobs:
                         self.logger.info("No more jobs found.")
@@ -149,19 +173,23 @@ class LinkedInJobScraper:
                     start += 25
                     
                     # Random delay between pages
-                    await asyncio.sleep(random.uniform(1, 3))
+                    with span("sleep"):
+                        await asyncio.sleep(random.uniform(1, 3))
                 
                 await browser.close()
                 
                 if not jobs:
+                    scrapes.inc(source="LinkedIn", outcome="empty")
                     self.logger.warning("⚠️  No jobs found, returning fallback data")
                     self.logger.warning("⚠️  No jobs found, returning empty list")
                     return []
                 
+                scrapes.inc(source="LinkedIn", outcome="ok")
                 self.logger.info(f"✓ Successfully parsed {len(jobs)} jobs")
                 return jobs[:max_results]
                 
             except PlaywrightTimeout:
+                scrapes.inc(source="LinkedIn", outcome="error")
                 self.logger.error("⏱️  Timeout while loading LinkedIn")
                 if 'browser' in locals():
                     await browser.close()
@@ -169,12 +197,16 @@ class LinkedInJobScraper:
                     await browser.close()
                 return []
             except Exception as e:
+                scrapes.inc(source="LinkedIn", outcome="error")
                 self.logger.error(f"Browser error: {str(e)}")
                 if 'browser' in locals():
                     await browser.close()
                 if 'browser' in locals():
                     await browser.close()
                 return []
+            finally:
+                if 'browser' in locals():
+                    browsers_active.dec(source="LinkedIn")
     
     async def _parse_jobs_from_html(self, page, keywords: str) -> List[Dict]:
         """Parse jobs from LinkedIn HTML"""
@@ -182,31 +214,33 @@ class LinkedInJobScraper:
         
         try:
             # Wait for job cards
-            await page.wait_for_selector('li', timeout=10000)
-            
-            # Find all job list items
-            job_cards = await page.query_selector_all('li')
+            with span("wait_for_cards"):
+                await page.wait_for_selector('li', timeout=10000)
+                
+                # Find all job list items
+                job_cards = await page.query_selector_all('li')
             
             self.logger.info(f"Found {len(job_cards)} list items")
             
-            for idx, card in enumerate(job_cards[:50]):  # Limit to first 50
-                try:
-                    # Extract job data
-                    job = await self._extract_job_from_card(card, page)
-                    if job and job.get('title') and job.get('apply_link'):
-                        jobs.append(job)
-                        if len(jobs) >= 30:  # Stop after 30 valid jobs
-                            break
-                except Exception as e:
-                    self.logger.debug(f"Error parsing job {idx}: {str(e)}")
-                    continue
+            with span("extract_cards", cards=len(job_cards)):
+                for idx, card in enumerate(job_cards[:50]):  # Limit to first 50
+                    try:
+                        # Extract job data
+                        job = await self._extract_job_from_card(card, page)
+                        if job and job.get('title') and job.get('apply_link'):
+                            jobs.append(job)
+                            if len(jobs) >= 30:  # Stop after 30 valid jobs
+                                break
+                    except Exception as e:
+                        self.logger.debug(f"Error parsing job {idx}: {str(e)}")
+                        continue
             
         except Exception as e:
             self.logger.error(f"Error parsing HTML: {str(e)}")
         
         return jobs
     
-    async def _extract_job_from_card(self, card, page) -> Optional[Dict]:
+    async def _extract_job_from_card(self, card, page) -> Optional[JobRecord]:
         """Extract job details from a job card element"""
         try:
             # Extract title
@@ -280,7 +314,8 @@ class LinkedInJobScraper:
                 "scraped_at": datetime.now().isoformat()
             }
             
-            return job
+            # Stored compactly; serialised back to this shape in API responses
+            return JobRecord.from_dict(job)
             
         except Exception as e:
             return None
@@ -344,7 +379,7 @@ class LinkedInJobScraper:
                 "responsibilities": [],
                 "scraped_at": datetime.now().isoformat()
             }
-            jobs.append(job)
+            jobs.append(JobRecord.from_dict(job))
         
         return jobs
     
@@ -365,23 +400,9 @@ class LinkedInJobScraper:
     
     def _extract_skills_from_title(self, title: str) -> List[str]:
         """Extract potential skills from job title"""
-        skills = []
-        title_lower = title.lower()
-        
-        skill_keywords = [
-            'python', 'java', 'javascript', 'react', 'angular', 'vue', 'node', 'nodejs',
-            'django', 'flask', 'spring', 'sql', 'mongodb', 'postgresql', 'mysql',
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'devops', 'ci/cd',
-            'machine learning', 'data science', 'ai', 'ml', 'deep learning',
-            'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit-learn',
-            'html', 'css', 'typescript', 'git', 'rest api', 'graphql'
-        ]
-        
-        for skill in skill_keywords:
-            if skill in title_lower:
-                skills.append(skill.title())
+        skills = skill_extractor.extract_display(title, limit=5)
         
-        return skills[:5] if skills else ['Software Development']
+        return skills if skills else ['Software Development']
 
 
 class RealJobScraper:
@@ -412,7 +433,8 @@ class RealJobScraper:
             self.logger.info(f"Fetching LinkedIn jobs for: {skills}")
             
             # Run async scraper directly
-            jobs = await self.linkedin_scraper.scrape_jobs(skills, location, max_results)
+            with span("scrape", source="LinkedIn"):
+                jobs = await self.linkedin_scraper.scrape_jobs(skills, location, max_results)
             
             self.logger.info(f"Found {len(jobs)} total jobs from LinkedIn")
             return jobs
@@ -5,6 +5,8 @@ import random
 from urllib.parse import quote
 import re
 
+from src.matcher.skill_extractor import skill_extractor
+
 class NaukriScraper:
     def __init__(self):
         self.session = requests.Session()
@@ -247,25 +249,9 @@ class NaukriScraper:
     
     def extract_skills_from_text(self, text):
         """Extract technical skills from text"""
-        skills_list = [
-            'python', 'java', 'javascript', 'react', 'angular', 'vue', 'node.js',
-            'django', 'flask', 'spring boot', 'html', 'css', 'typescript', 'sql',
-            'mysql', 'postgresql', 'mongodb', 'aws', 'azure', 'docker', 'kubernetes',
-            'git', 'linux', 'machine learning', 'data science', 'tensorflow',
-            'pytorch', 'pandas', 'numpy', 'rest api', 'graphql', 'microservices',
-            'devops', 'jenkins', 'terraform', 'redis', 'elasticsearch', 'kafka',
-            'spark', 'hadoop', 'c++', 'c#', '.net', 'php', 'ruby', 'go', 'rust',
-            'scala', 'swift', 'kotlin', 'flutter', 'react native', 'ios', 'android'
-        ]
-        
-        text_lower = text.lower()
-        found_skills = []
-        
-        for skill in skills_list:
-            if skill in text_lower and skill.title() not in found_skills:
-                found_skills.append(skill.title())
+        found_skills = skill_extractor.extract_display(text, limit=10)
         
-        return found_skills[:10] if found_skills else ['General IT']
+        return found_skills if found_skills else ['General IT']
     
     def scrape_maximum_jobs(self, query, max_pages=10, max_jobs=500):
         """Scrape maximum jobs for a query"""
@@ -0,0 +1,67 @@
+"""
+Tests for the API's job scoring engines
+
+Usage:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import unittest
+
+from src.matcher.scoring import KeywordScorer, TfidfScorer
+
+
+def make_jobs(n, start=0):
+    return [
+        {
+            'job_id': f'job-{i}',
+            'title': ['Python Developer', 'Data Engineer', 'Frontend Engineer'][i % 3],
+            'company': f'Company {i}',
+            'skills': [['python', 'django'], ['sql', 'spark'], ['javascript', 'react']][i % 3],
+            'description': f'Posting {i} for a team building data products',
+        }
+        for i in range(start, start + n)
+    ]
+
+
+class TfidfScorerTest(unittest.TestCase):
+    def test_batch_larger_than_max_jobs(self):
+        scorer = TfidfScorer(max_jobs=3)
+        jobs = make_jobs(6)
+        scores = scorer.score("python, sql", jobs)
+        self.assertEqual(len(scores), 6)
+        self.assertTrue(all(score > 0 for score in scores[:2]))
+        self.assertEqual(len(scorer.require(["python"], jobs)), 2)
+
+    def test_later_batches_expire_older_jobs(self):
+        scorer = TfidfScorer(max_jobs=3)
+        scorer.score("python", make_jobs(3))
+        scores = scorer.score("python", make_jobs(3, start=3))
+        self.assertGreater(scores[0], 0)
+        self.assertEqual(int(scorer.matcher.active.sum()), 3)
+        self.assertIsNone(scorer.matcher._job_row(make_jobs(1)[0]))
+
+    def test_jobs_expired_since_prepare_are_added_back(self):
+        scorer = TfidfScorer(max_jobs=3)
+        jobs = make_jobs(3)
+        scorer.prepare(jobs)
+        # As a concurrent request's prepare() would
+        scorer.prepare(make_jobs(3, start=3))
+        scores = scorer.score("python", jobs)
+        self.assertGreater(scores[0], 0)
+
+
+class KeywordScorerTest(unittest.TestCase):
+    def test_edited_job_is_rescored(self):
+        scorer = KeywordScorer()
+        job = make_jobs(1)[0]
+        scorer.prepare([job])
+        self.assertEqual(scorer.score("django", [job]), [60])
+        edited = {**job, 'title': 'Go Developer', 'skills': ['go']}
+        self.assertEqual(scorer.score("django", [edited]), [40])
+        scorer.prepare([edited])
+        self.assertEqual(scorer.score("go", [edited]), [100])
+
+
+if __name__ == "__main__":
+    unittest.main()
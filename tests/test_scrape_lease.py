@@ -0,0 +1,65 @@
+"""
+Tests for the scrape lease: renewal on the in-process and SQLite backends,
+and fetch_jobs() backing off with Rejected instead of waiting out a lease
+
+Usage:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from src.api.cache import TTLCache
+from src.api.shared_cache import SqliteCache
+
+
+class RenewTest(unittest.TestCase):
+    def check_renew(self, cache):
+        lock = cache.lock("search", lease=0.15)
+        self.assertTrue(lock.try_acquire())
+        time.sleep(0.1)
+        self.assertTrue(lock.renew())
+        time.sleep(0.1)
+        self.assertFalse(cache.lock("search", lease=5).try_acquire())
+        time.sleep(0.1)
+        self.assertFalse(lock.renew())
+        self.assertTrue(cache.lock("search", lease=5).try_acquire())
+
+    def test_memory(self):
+        self.check_renew(TTLCache())
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SqliteCache(os.path.join(directory, "cache.db"), "leases")
+            try:
+                self.check_renew(cache)
+            finally:
+                cache.close()
+
+
+class FetchJobsTest(unittest.TestCase):
+    def test_rejected_while_another_worker_scrapes(self):
+        from src.api import main
+        from src.api.admission import Rejected
+
+        holder = main.scrape_cache.lock(("python", "india", 10), lease=5)
+        self.assertTrue(holder.try_acquire())
+        timeout = main.scrape_admission.timeout
+        main.scrape_admission.timeout = 0.2
+        try:
+            started = time.monotonic()
+            with self.assertRaises(Rejected) as raised:
+                asyncio.run(main.fetch_jobs("Python", "India", 10))
+            self.assertLess(time.monotonic() - started, 2)
+            self.assertGreaterEqual(raised.exception.retry_after, 1)
+        finally:
+            main.scrape_admission.timeout = timeout
+            holder.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for the background search queue and its SQLite store
+
+Usage:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.api.search_queue import COMPLETED, QUEUED, SearchQueue, SqliteTaskStore
+
+
+async def wait_for(task, status, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while task.status != status:
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError(f"search {task.id} is {task.status}, not {status}")
+        await asyncio.sleep(0.01)
+
+
+class RestartTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "searches.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stopped_queue_starts_again_with_its_store(self):
+        release = asyncio.Event()
+
+        async def run(task, report):
+            if task.params.get("block"):
+                await release.wait()
+            return {"jobs": [task.params["skills"]]}
+
+        queue = SearchQueue(run, workers=1, store=SqliteTaskStore(self.path))
+
+        async def lifespan(params):
+            await queue.start()
+            try:
+                task = await queue.submit(params)
+                if not params.get("block"):
+                    await wait_for(task, COMPLETED)
+                return task
+            finally:
+                await queue.stop()
+
+        async def scenario():
+            # Interrupted by the first stop()
+            interrupted = await lifespan({"skills": "python", "block": True})
+            self.assertEqual(interrupted.status, QUEUED)
+            release.set()
+            finished = await lifespan({"skills": "sql"})
+            await queue.start()
+            try:
+                await wait_for(queue.tasks[interrupted.id], COMPLETED)
+            finally:
+                await queue.stop()
+            return finished.id
+
+        finished_id = asyncio.run(scenario())
+        store = SqliteTaskStore(self.path)
+        try:
+            self.assertEqual(store.unfinished(), [])
+            self.assertEqual(store.load(finished_id).result, {"jobs": ["sql"]})
+        finally:
+            store.close()
+
+    def test_memory_queue_requeues_interrupted_searches(self):
+        release = asyncio.Event()
+
+        async def run(task, report):
+            await release.wait()
+            return {}
+
+        queue = SearchQueue(run, workers=1)
+
+        async def scenario():
+            await queue.start()
+            task = await queue.submit({"skills": "python"})
+            await asyncio.sleep(0.05)
+            await queue.stop()
+            release.set()
+            await queue.start()
+            try:
+                await wait_for(task, COMPLETED)
+            finally:
+                await queue.stop()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
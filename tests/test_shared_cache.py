@@ -0,0 +1,433 @@
+"""
+Tests for the Redis-protocol client, RedisCache and its leases
+A small in-process RESP server stands in for Redis, so no server is needed.
+
+Usage:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+
+from src.api.shared_cache import RedisCache, RespClient, RespError, SqliteCache, make_cache
+
+_TOKEN_CHECK = "if redis.call('get', KEYS[1]) == ARGV[1]"
+
+
+def _score(bound: bytes):
+    """(value, exclusive) of a ZRANGEBYSCORE bound"""
+    text = bound.decode()
+    exclusive = text.startswith("(")
+    text = text.lstrip("(")
+    return float(text.replace("inf", "Infinity")), exclusive
+
+
+def _in_range(score, low, high):
+    (lo, lo_open), (hi, hi_open) = low, high
+    return (score > lo if lo_open else score >= lo) and (score < hi if hi_open else score <= hi)
+
+
+class FakeRespServer(socketserver.ThreadingTCPServer):
+    """Just enough of Redis for RedisCache: strings with PX/NX, sorted sets, MGET and the lease scripts"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.password = password
+        self.dbs = {}
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.commands = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def drop_connections(self):
+        """Close every client connection, as a restarting server would"""
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(2)
+            except OSError:
+                pass
+
+    def db(self, number):
+        return self.dbs.setdefault(number, {"strings": {}, "zsets": {}})
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections.add(self.connection)
+        self.db_number = 0
+        self.authenticated = self.server.password is None
+        try:
+            while True:
+                command = self._read_command()
+                if command is None:
+                    return
+                with self.server.lock:
+                    self.server.commands.append(command)
+                    reply = self._execute(command)
+                self.wfile.write(reply)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.server.connections.discard(self.connection)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _array(self, values):
+        return b"*%d\r\n" % len(values) + b"".join(self._bulk(value) for value in values)
+
+    def _live(self, strings, key):
+        entry = strings.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del strings[key]
+            return None
+        return entry
+
+    def _execute(self, args):
+        name = args[0].upper()
+        if name == b"AUTH":
+            self.authenticated = args[-1].decode() == self.server.password
+            return b"+OK\r\n" if self.authenticated else b"-WRONGPASS invalid password\r\n"
+        if not self.authenticated:
+            return b"-NOAUTH Authentication required.\r\n"
+        if name == b"SELECT":
+            self.db_number = int(args[1])
+            return b"+OK\r\n"
+
+        db = self.server.db(self.db_number)
+        strings, zsets = db["strings"], db["zsets"]
+        if name == b"GET":
+            entry = self._live(strings, args[1])
+            return self._bulk(entry[0] if entry else None)
+        if name == b"MGET":
+            entries = [self._live(strings, key) for key in args[1:]]
+            return self._array([entry[0] if entry else None for entry in entries])
+        if name == b"SET":
+            key, value, options = args[1], args[2], [arg.upper() for arg in args[3:]]
+            if b"NX" in options and self._live(strings, key) is not None:
+                return b"$-1\r\n"
+            expires = None
+            if b"PX" in options:
+                expires = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+            strings[key] = (value, expires)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = 0
+            for key in args[1:]:
+                removed += strings.pop(key, None) is not None
+                removed += zsets.pop(key, None) is not None
+            return b":%d\r\n" % removed
+        if name == b"ZADD":
+            zset = zsets.setdefault(args[1], {})
+            rest = args[2:]
+            only_existing = rest and rest[0].upper() == b"XX"
+            if only_existing:
+                rest = rest[1:]
+            added = 0
+            for score, member in zip(rest[::2], rest[1::2]):
+                if only_existing and member not in zset:
+                    continue
+                added += member not in zset
+                zset[member] = float(score)
+            return b":%d\r\n" % added
+        if name == b"ZREM":
+            zset = zsets.get(args[1], {})
+            return b":%d\r\n" % sum(zset.pop(member, None) is not None for member in args[2:])
+        if name == b"ZCARD":
+            return b":%d\r\n" % len(zsets.get(args[1], {}))
+        ordered = sorted(zsets.get(args[1], {}).items(), key=lambda item: (item[1], item[0])) if len(args) > 1 else []
+        if name in (b"ZRANGEBYSCORE", b"ZCOUNT"):
+            low, high = _score(args[2]), _score(args[3])
+            members = [member for member, score in ordered if _in_range(score, low, high)]
+            return self._array(members) if name == b"ZRANGEBYSCORE" else b":%d\r\n" % len(members)
+        if name == b"ZRANGE":
+            start, stop = int(args[2]), int(args[3])
+            stop = len(ordered) if stop == -1 else stop + 1
+            return self._array([member for member, _ in ordered[start:stop]])
+        if name == b"EVAL" and args[1].decode().startswith(_TOKEN_CHECK):
+            # The lease scripts: delete, or pexpire with ARGV[2], a key holding ARGV[1]
+            entry = self._live(strings, args[3])
+            if entry is None or entry[0] != args[4]:
+                return b":0\r\n"
+            if b"pexpire" in args[1]:
+                strings[args[3]] = (entry[0], time.time() + int(args[5]) / 1000)
+            else:
+                del strings[args[3]]
+            return b":1\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+class ServerTestCase(unittest.TestCase):
+    password = None
+
+    def setUp(self):
+        self.server = FakeRespServer(password=self.password)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.client = RespClient(port=self.server.port, password=self.password, timeout=2.0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.drop_connections()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RespClientTest(ServerTestCase):
+    def test_replies(self):
+        self.assertEqual(self.client.execute("SET", "k", b"v\r\nwith crlf"), b"OK")
+        self.assertEqual(self.client.execute("GET", "k"), b"v\r\nwith crlf")
+        self.assertIsNone(self.client.execute("GET", "missing"))
+        self.assertEqual(self.client.execute("ZADD", "z", 1.5, "a", 2, "b"), 2)
+        self.assertEqual(self.client.execute("ZRANGE", "z", 0, -1), [b"a", b"b"])
+        with self.assertRaises(RespError):
+            self.client.execute("NOSUCHCOMMAND")
+
+    def test_pipeline_keeps_error_replies_in_place(self):
+        replies = self.client.pipeline([("SET", "a", 1), ("NOSUCHCOMMAND",), ("GET", "a")])
+        self.assertEqual(replies[0], b"OK")
+        self.assertIsInstance(replies[1], RespError)
+        self.assertEqual(replies[2], b"1")
+
+    def test_reconnects_after_the_server_drops_the_connection(self):
+        self.client.execute("SET", "a", 1)
+        self.server.drop_connections()
+        self.assertEqual(self.client.execute("GET", "a"), b"1")
+
+    def test_select_on_connect(self):
+        client = RespClient.from_url(f"redis://127.0.0.1:{self.server.port}/3")
+        try:
+            client.execute("SET", "a", "db3")
+        finally:
+            client.close()
+        self.assertIsNone(self.client.execute("GET", "a"))
+        self.assertIn(b"a", self.server.db(3)["strings"])
+
+    def test_unreachable_server_raises_oserror(self):
+        client = RespClient(port=1, timeout=0.2)
+        with self.assertRaises(OSError):
+            client.execute("GET", "a")
+
+
+class AuthTest(ServerTestCase):
+    password = "s3cret"
+
+    def test_auth_on_connect(self):
+        self.assertEqual(self.client.execute("SET", "a", 1), b"OK")
+        client = RespClient.from_url(f"redis://:s3cret@127.0.0.1:{self.server.port}/0")
+        try:
+            self.assertEqual(client.execute("GET", "a"), b"1")
+        finally:
+            client.close()
+
+    def test_wrong_password(self):
+        client = RespClient(port=self.server.port, password="wrong")
+        with self.assertRaises(RespError):
+            client.execute("GET", "a")
+
+
+class RedisCacheTest(ServerTestCase):
+    def cache(self, namespace="t", max_entries=3, ttl=60.0):
+        return RedisCache(self.client, namespace, max_entries, ttl)
+
+    def test_round_trip_and_counters(self):
+        cache = self.cache()
+        cache.set(("search", "python", 30), {"jobs": [1, 2]})
+        self.assertEqual(cache.get(("search", "python", 30)), {"jobs": [1, 2]})
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = self.cache()
+        for key in "abc":
+            cache.set(key, key)
+        cache.get("a")
+        cache.set("d", "d")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(sorted(cache.values()), ["a", "c", "d"])
+
+    def test_ttl(self):
+        cache = self.cache()
+        cache.set("short", 1, ttl=0.05)
+        cache.set("long", 2)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.values(), [2])
+
+    def test_delete_and_clear(self):
+        cache = self.cache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 0)
+
+    def test_namespaces_are_separate(self):
+        first, second = self.cache("first"), self.cache("second")
+        first.set("a", 1)
+        self.assertIsNone(second.get("a"))
+
+    def test_async_access(self):
+        cache = self.cache()
+
+        async def run():
+            await cache.set_async("a", [1])
+            return await cache.get_async("a")
+
+        self.assertEqual(asyncio.run(run()), [1])
+
+    def test_make_cache_shares_one_client_per_url(self):
+        url = f"redis://127.0.0.1:{self.server.port}/0"
+        first = make_cache("one", url=url)
+        second = make_cache("two", url=url)
+        self.assertIsInstance(first, RedisCache)
+        self.assertIs(first.client, second.client)
+        first.client.close()
+
+
+class MakeCacheTest(unittest.TestCase):
+    def test_sqlite_url_needs_an_absolute_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = make_cache("t", url=f"sqlite://{directory}/cache.db")
+            try:
+                self.assertIsInstance(cache, SqliteCache)
+                self.assertEqual(cache.path, os.path.join(directory, "cache.db"))
+            finally:
+                cache.close()
+        for url in ("sqlite://cache.db", "sqlite:cache.db", "sqlite://host/cache.db"):
+            with self.assertRaises(ValueError):
+                make_cache("t", url=url)
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            make_cache("t", url="memcached://127.0.0.1")
+
+
+class LeaseTest(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        # Two workers, each with its own connection
+        self.other_client = RespClient(port=self.server.port)
+        self.cache = RedisCache(self.client, "leases")
+        self.other = RedisCache(self.other_client, "leases")
+
+    def tearDown(self):
+        self.other_client.close()
+        super().tearDown()
+
+    def test_one_holder_at_a_time(self):
+        lock = self.cache.lock("search", lease=5)
+        rival = self.other.lock("search", lease=5)
+        self.assertTrue(lock.try_acquire())
+        self.assertFalse(rival.try_acquire())
+        lock.release()
+        self.assertTrue(rival.try_acquire())
+
+    def test_only_the_holder_releases(self):
+        lock = self.cache.lock("search", lease=5)
+        self.assertTrue(lock.try_acquire())
+        self.other.lock("search", lease=5).release()
+        self.assertFalse(self.other.lock("search", lease=5).try_acquire())
+
+    def test_lease_expires(self):
+        self.assertTrue(self.cache.lock("search", lease=0.05).try_acquire())
+        time.sleep(0.1)
+        self.assertTrue(self.other.lock("search", lease=5).try_acquire())
+
+    def test_renew(self):
+        lock = self.cache.lock("search", lease=0.15)
+        self.assertTrue(lock.try_acquire())
+        time.sleep(0.1)
+        self.assertTrue(lock.renew())
+        time.sleep(0.1)
+        self.assertFalse(self.other.lock("search", lease=5).try_acquire())
+        time.sleep(0.1)
+        self.assertFalse(lock.renew())
+        self.assertTrue(self.other.lock("search", lease=5).try_acquire())
+
+    def test_renewing_outlives_the_lease(self):
+        async def run():
+            lock = self.cache.lock("search", lease=0.15)
+            self.assertTrue(await lock.try_acquire_async())
+            async with lock.renewing():
+                await asyncio.sleep(0.4)
+                return await self.other.lock("search", lease=5).try_acquire_async()
+
+        self.assertFalse(asyncio.run(run()))
+
+    def test_acquire_waits_for_release(self):
+        async def run():
+            holder = self.cache.lock("search", lease=5)
+            self.assertTrue(await holder.try_acquire_async())
+            waiter = self.other.lock("search", lease=5)
+            waiting = asyncio.ensure_future(waiter.acquire(timeout=2, poll=0.02))
+            await asyncio.sleep(0.1)
+            self.assertFalse(waiting.done())
+            await holder.release_async()
+            return await waiting
+
+        self.assertTrue(asyncio.run(run()))
+
+    def test_acquire_times_out(self):
+        self.assertTrue(self.cache.lock("search", lease=5).try_acquire())
+        acquired = asyncio.run(self.other.lock("search", lease=5).acquire(timeout=0.1, poll=0.02))
+        self.assertFalse(acquired)
+
+    def test_single_flight(self):
+        scrapes = []
+
+        async def fetch(cache):
+            jobs = await cache.get_async("q")
+            if jobs is None:
+                async with cache.lock("q", lease=5):
+                    jobs = await cache.get_async("q")
+                    if jobs is None:
+                        scrapes.append(1)
+                        await asyncio.sleep(0.1)
+                        jobs = ["job"]
+                        await cache.set_async("q", jobs)
+            return jobs
+
+        async def run():
+            return await asyncio.gather(*(fetch(self.cache if i % 2 else self.other) for i in range(6)))
+
+        self.assertEqual(asyncio.run(run()), [["job"]] * 6)
+        self.assertEqual(len(scrapes), 1)
+
+    def test_lease_granted_when_the_server_is_down(self):
+        down = RedisCache(RespClient(port=1, timeout=0.2), "down")
+        self.assertTrue(down.lock("search").try_acquire())
+        self.assertIsNone(down.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()